@@ -0,0 +1,5 @@
+"""A2A server modules used by every agent in this repository.
+
+The agent servers run from their own directories, so each `__main__.py`
+puts the repository root on `sys.path` before importing from here.
+"""
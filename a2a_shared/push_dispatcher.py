@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+from a2a.types import PushNotificationConfig, Task
+from loguru import logger
+
+if TYPE_CHECKING:
+    from .push_signing import PushSigner
+
+TOKEN_HEADER = "X-A2A-Notification-Token"
+
+
+@dataclass
+class _Notification:
+    task_id: str
+    body: bytes
+    token: Optional[str]
+    queued: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Destination:
+    # Pending notifications by task id, oldest first; a task holds at most one
+    pending: OrderedDict[str, _Notification] = field(default_factory=OrderedDict)
+    # Tasks with a POST in flight; their next status waits, so a task's updates arrive in order
+    sending: set[str] = field(default_factory=set)
+    senders: set[asyncio.Task] = field(default_factory=set)
+
+
+class PushDispatcher:
+    """Delivers push notifications from background senders, per webhook URL.
+
+    `submit` only serializes the task and queues it, so a slow or failing
+    receiver never holds up the agent. Each URL gets its own queue of at most
+    `queue_size` tasks, drained oldest first by up to `senders_per_url`
+    senders over a pooled keep-alive client; one task's notifications are
+    never in flight together. A task has at most one pending notification: a newer
+    status replaces the queued one, and a retry is dropped once a newer
+    status is waiting. Transport errors, 429 and 5xx are retried with
+    exponential backoff and jitter up to `max_attempts`; anything that is
+    not delivered (other 4xx, attempts exhausted, queue overflow, shutdown)
+    is appended to `dead_letter_file` as one JSON line.
+
+    With a `signer`, each POST carries an `Authorization: Bearer` JWT over
+    the SHA-256 of its body. The body is serialized once, in the canonical
+    compact form receivers hash, and the same bytes are hashed and sent.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 1000,
+        max_attempts: int = 5,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30,
+        timeout_seconds: float = 10,
+        connections: int = 20,
+        senders_per_url: int = 4,
+        dead_letter_file: Optional[str] = "tmp/push_dead_letters.jsonl",
+        signer: Optional["PushSigner"] = None,
+    ):
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.senders_per_url = senders_per_url
+        self.signer = signer
+        self.dead_letter_file = Path(dead_letter_file) if dead_letter_file else None
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections, keepalive_expiry=60),
+            timeout=httpx.Timeout(timeout_seconds, connect=min(timeout_seconds, 5)),
+        )
+        self._destinations: dict[str, _Destination] = {}
+        self._writes: set[asyncio.Task] = set()
+        self._file_lock = threading.Lock()
+        self._closed = False
+        self.counts = {"submitted": 0, "coalesced": 0, "sent": 0, "retried": 0, "superseded": 0, "dead_lettered": 0}
+
+    def submit(self, config: PushNotificationConfig, task: Task) -> None:
+        """Queues `task` for `config.url`; returns without waiting for the receiver."""
+        if self._closed:
+            return
+        # Snapshot now: the task object keeps changing while the notification waits. This is
+        # the compact form receivers re-serialize to check `request_body_sha256`
+        body = json.dumps(
+            task.model_dump(mode="json", exclude_none=True), ensure_ascii=False, separators=(",", ":")
+        ).encode()
+        notification = _Notification(task.id, body, config.token)
+        destination = self._destinations.setdefault(config.url, _Destination())
+        self.counts["submitted"] += 1
+        if task.id in destination.pending:
+            # Keeps its place in line; only the latest status is worth sending
+            destination.pending[task.id] = notification
+            self.counts["coalesced"] += 1
+        else:
+            if len(destination.pending) >= self.queue_size:
+                _, oldest = destination.pending.popitem(last=False)
+                self._dead_letter(config.url, oldest, 0, "queue full")
+            destination.pending[task.id] = notification
+        if len(destination.senders) < min(self.senders_per_url, len(destination.pending)):
+            sender = asyncio.create_task(self._drain(config.url, destination))
+            destination.senders.add(sender)
+            sender.add_done_callback(destination.senders.discard)
+
+    def pending(self) -> int:
+        return sum(len(d.pending) for d in self._destinations.values())
+
+    async def aclose(self, timeout: float = 5) -> None:
+        """Gives queued notifications `timeout` seconds to go out, dead-letters the rest and closes the client."""
+        self._closed = True
+        senders = [sender for d in self._destinations.values() for sender in d.senders]
+        if senders:
+            _, unfinished = await asyncio.wait(senders, timeout=timeout)
+            for sender in unfinished:
+                sender.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+        for url, destination in self._destinations.items():
+            for notification in destination.pending.values():
+                self._dead_letter(url, notification, 0, "shutdown")
+            destination.pending.clear()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        await self._client.aclose()
+
+    async def _drain(self, url: str, destination: _Destination) -> None:
+        try:
+            while True:
+                task_id = next((t for t in destination.pending if t not in destination.sending), None)
+                if task_id is None:
+                    return
+                notification = destination.pending.pop(task_id)
+                destination.sending.add(task_id)
+                try:
+                    await self._deliver(url, destination, notification)
+                except asyncio.CancelledError:
+                    self._dead_letter(url, notification, 0, "shutdown")
+                    raise
+                finally:
+                    destination.sending.discard(task_id)
+        finally:
+            if not destination.pending and not destination.sending and self._destinations.get(url) is destination:
+                del self._destinations[url]
+
+    async def _deliver(self, url: str, destination: _Destination, notification: _Notification) -> None:
+        headers = {"Content-Type": "application/json"}
+        if notification.token:
+            headers[TOKEN_HEADER] = notification.token
+        # Hashed once; a retry only gets a fresh token, since receivers reject old ones
+        digest = hashlib.sha256(notification.body).hexdigest() if self.signer else None
+        attempt = 0
+        while True:
+            attempt += 1
+            if digest:
+                headers["Authorization"] = f"Bearer {self.signer.sign(digest)}"
+            try:
+                response = await self._client.post(url, content=notification.body, headers=headers)
+                if response.status_code < 400:
+                    self.counts["sent"] += 1
+                    logger.debug(
+                        f"Push notification for {notification.task_id} sent to {url} "
+                        f"after {time.monotonic() - notification.queued:.3f}s"
+                    )
+                    return
+                error = f"HTTP {response.status_code}"
+                retryable = response.status_code == 429 or response.status_code >= 500
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+                retryable = True
+            if not retryable or attempt >= self.max_attempts:
+                self._dead_letter(url, notification, attempt, error)
+                return
+
+            delay = min(self.backoff_seconds * 2 ** (attempt - 1), self.max_backoff_seconds)
+            logger.warning(f"Push notification to {url} failed ({error}), retrying in {delay:.1f}s")
+            self.counts["retried"] += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1))
+            if notification.task_id in destination.pending:
+                self.counts["superseded"] += 1
+                return
+
+    def _dead_letter(self, url: str, notification: _Notification, attempts: int, error: str) -> None:
+        self.counts["dead_lettered"] += 1
+        logger.error(f"Push notification for {notification.task_id} to {url} dead-lettered: {error}")
+        if self.dead_letter_file is None:
+            return
+        record = json.dumps({
+            "time": time.time(),
+            "url": url,
+            "task_id": notification.task_id,
+            "attempts": attempts,
+            "error": error,
+            "body": notification.body.decode(),
+        }, ensure_ascii=False)
+        write = asyncio.create_task(asyncio.to_thread(self._append, record))
+        self._writes.add(write)
+        write.add_done_callback(self._writes.discard)
+
+    def _append(self, record: str) -> None:
+        with self._file_lock:
+            self.dead_letter_file.parent.mkdir(parents=True, exist_ok=True)
+            # One unbuffered write per line, so appends from several workers don't interleave
+            with self.dead_letter_file.open("ab", buffering=0) as f:
+                f.write((record + "\n").encode())
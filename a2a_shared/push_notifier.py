@@ -0,0 +1,114 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from a2a.server.tasks import InMemoryPushNotifier, PushNotifier
+from a2a.types import PushNotificationConfig, Task
+
+from .push_dispatcher import PushDispatcher
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS push_configs (
+    task_id TEXT PRIMARY KEY,
+    updated REAL NOT NULL,
+    config TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS push_configs_expiry ON push_configs (updated);
+"""
+
+
+class SqlitePushNotifier(PushNotifier):
+    """Push notification configs in a SQLite file, so restarts and other workers see them.
+
+    A config set on the worker that received `message/send` is read by the
+    worker that runs the task. Configs are dropped `ttl_seconds` after they
+    were set, the same lifetime finished tasks get in the task store.
+    Notifications are handed to `dispatcher`, which sends them in the
+    background.
+    """
+
+    def __init__(
+        self,
+        dispatcher: PushDispatcher,
+        db_file: str = "tmp/tasks.db",
+        ttl_seconds: float = 24 * 3600,
+        sweep_interval: float = 60,
+    ):
+        path = Path(db_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._dispatcher = dispatcher
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    async def set_info(self, task_id: str, notification_config: PushNotificationConfig):
+        await asyncio.to_thread(self._set, task_id, notification_config.model_dump_json(exclude_none=True))
+
+    async def get_info(self, task_id: str) -> Optional[PushNotificationConfig]:
+        config = await asyncio.to_thread(self._get, task_id)
+        return PushNotificationConfig.model_validate_json(config) if config else None
+
+    async def delete_info(self, task_id: str):
+        await asyncio.to_thread(self._execute, "DELETE FROM push_configs WHERE task_id = ?", (task_id,))
+
+    async def send_notification(self, task: Task):
+        push_info = await self.get_info(task.id)
+        if push_info:
+            self._dispatcher.submit(push_info, task)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _set(self, task_id: str, config: str) -> None:
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO push_configs (task_id, updated, config) VALUES (?, ?, ?)",
+            (task_id, now, config),
+        )
+        if now - self._last_sweep > self.sweep_interval:
+            self._last_sweep = now
+            self._execute("DELETE FROM push_configs WHERE updated < ?", (now - self.ttl_seconds,))
+
+    def _get(self, task_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT config FROM push_configs WHERE task_id = ?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def _execute(self, sql: str, args: tuple) -> None:
+        with self._lock:
+            self._conn.execute(sql, args)
+
+
+class QueuedInMemoryPushNotifier(InMemoryPushNotifier):
+    """`InMemoryPushNotifier` that hands notifications to a `PushDispatcher` instead of posting inline."""
+
+    def __init__(self, dispatcher: PushDispatcher):
+        super().__init__(httpx_client=None)
+        self._dispatcher = dispatcher
+
+    async def send_notification(self, task: Task):
+        push_info = await self.get_info(task.id)
+        if push_info:
+            self._dispatcher.submit(push_info, task)
+
+
+def make_push_notifier(
+    backend: str,
+    dispatcher: PushDispatcher,
+    db_file: str = "tmp/tasks.db",
+    ttl_seconds: float = 24 * 3600,
+) -> PushNotifier:
+    """Builds the push notifier matching the task store `backend` ("sqlite" or "memory")."""
+    if backend == "memory":
+        return QueuedInMemoryPushNotifier(dispatcher)
+    if backend == "sqlite":
+        return SqlitePushNotifier(dispatcher, db_file=db_file, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown push notifier backend: {backend}")
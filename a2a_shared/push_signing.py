@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from loguru import logger
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+JWKS_PATH = "/.well-known/jwks.json"
+
+
+@dataclass
+class _SigningKey:
+    kid: str
+    created: float
+    private_key: rsa.RSAPrivateKey
+    jwk: dict[str, Any]
+
+
+class PushSigner:
+    """Signs push notifications with RS256 JWTs and publishes the public keys as a JWKS.
+
+    Keys are unencrypted PEM files named `<kid>.pem` in `keys_dir`, which all
+    workers share. Each file is parsed once and the key object kept, since
+    loading a PEM costs a hundred times more than a signature.
+
+    Every key is published as soon as its file exists, but only signs once
+    it is `publish_ahead_seconds` old, so receivers that cache the JWKS have
+    already seen it. The newest such key signs. The next key is written
+    `publish_ahead_seconds` before the signing key turns `rotate_seconds`
+    old, and all but the `retain_keys` newest are deleted, which keeps the
+    previous key verifiable for tokens signed just before a rotation.
+    Dropping a new PEM into the directory rotates by hand.
+
+    A background thread lists the directory every `reload_interval` seconds
+    and does any rotation, so `sign` and the JWKS route only read keys that
+    are already in memory and never touch the disk or generate a key on the
+    event loop.
+    """
+
+    def __init__(
+        self,
+        keys_dir: str = "tmp/push_keys",
+        rotate_seconds: float = 30 * 24 * 3600,
+        publish_ahead_seconds: float = 900,
+        retain_keys: int = 3,
+        reload_interval: float = 5,
+        key_size: int = 2048,
+    ):
+        self.keys_dir = Path(keys_dir)
+        self.keys_dir.mkdir(parents=True, exist_ok=True)
+        self.rotate_seconds = rotate_seconds
+        self.publish_ahead_seconds = min(publish_ahead_seconds, rotate_seconds / 2)
+        self.retain_keys = retain_keys
+        self.reload_interval = reload_interval
+        self.key_size = key_size
+        self._keys: dict[str, _SigningKey] = {}
+        self._active: Optional[_SigningKey] = None
+        self._jwks = b'{"keys":[]}'
+        self._jwks_kids: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.reload()
+        self._reloader = threading.Thread(target=self._reload_loop, name="push-key-reloader", daemon=True)
+        self._reloader.start()
+
+    def sign(self, body_sha256: str) -> str:
+        """A JWT over the SHA-256 of the exact body that will be sent."""
+        key = self._active
+        return jwt.encode(
+            {"iat": int(time.time()), "request_body_sha256": body_sha256},
+            key.private_key,
+            algorithm="RS256",
+            headers={"kid": key.kid},
+        )
+
+    def jwks(self) -> bytes:
+        return self._jwks
+
+    def route(self) -> Route:
+        async def jwks(request: Request) -> Response:
+            return Response(self.jwks(), media_type="application/json", headers={"Cache-Control": "max-age=60"})
+
+        return Route(JWKS_PATH, jwks, methods=["GET"])
+
+    def close(self) -> None:
+        self._stop.set()
+        self._reloader.join()
+
+    def reload(self) -> None:
+        """Picks up added and removed key files, and rotates when the newest key is too old."""
+        with self._lock:
+            now = time.time()
+            newest = self._scan()
+            if newest is None or now - newest.created >= self.rotate_seconds - self.publish_ahead_seconds:
+                self._generate()
+                self._prune()
+                self._scan()
+            by_age = sorted(self._keys.values(), key=lambda k: k.created, reverse=True)
+            # Before any key is old enough (a fresh keys directory) the newest has to sign anyway
+            active = next((k for k in by_age if now - k.created >= self.publish_ahead_seconds), by_age[0])
+            if active is not self._active or self._jwks_kids != set(self._keys):
+                self._active = active
+                self._jwks_kids = set(self._keys)
+                self._jwks = json.dumps({"keys": [k.jwk for k in by_age]}).encode()
+                logger.info(f"Push notifications signed with key {active.kid}, {len(by_age)} published")
+
+    def _reload_loop(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                # The keys already loaded keep signing until the directory can be read again
+                logger.error(f"Could not reload push signing keys: {e}")
+
+    def _scan(self) -> Optional[_SigningKey]:
+        files = {path.stem: path for path in self.keys_dir.glob("*.pem")}
+        for kid in set(self._keys) - set(files):
+            del self._keys[kid]
+        for kid, path in files.items():
+            if kid not in self._keys:
+                key = self._load(kid, path)
+                if key is not None:
+                    self._keys[kid] = key
+        return max(self._keys.values(), key=lambda k: k.created, default=None)
+
+    def _generate(self) -> None:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=self.key_size)
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        # Numbered after the keys already there, so workers rotating at once agree on one key
+        kid = f"{1 + max((int(k) for k in self._keys if k.isdigit()), default=0):06d}"
+        tmp = self.keys_dir / f".{kid}.{os.getpid()}.tmp"
+        tmp.write_bytes(pem)
+        tmp.chmod(0o600)
+        try:
+            os.link(tmp, self.keys_dir / f"{kid}.pem")
+            logger.info(f"Generated push signing key {kid}")
+        except FileExistsError:
+            pass
+        finally:
+            tmp.unlink()
+
+    def _prune(self) -> None:
+        paths = sorted(self.keys_dir.glob("*.pem"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in paths[self.retain_keys:]:
+            path.unlink(missing_ok=True)
+            logger.info(f"Retired push signing key {path.stem}")
+
+    def _load(self, kid: str, path: Path) -> Optional[_SigningKey]:
+        try:
+            private_key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+            created = path.stat().st_mtime
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Skipping push signing key {path}: {e}")
+            return None
+        if not isinstance(private_key, rsa.RSAPrivateKey):
+            logger.error(f"Skipping push signing key {path}: not an RSA key")
+            return None
+        jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+        jwk.update(kid=kid, use="sig", alg="RS256")
+        return _SigningKey(kid, created, private_key, jwk)
@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional
+
+from a2a.server.tasks import InMemoryTaskStore, TaskStore
+from a2a.types import Task, TaskState
+from loguru import logger
+
+TERMINAL_STATES = {TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected}
+# Rows written before parts were stored one by one hold a whole artifact under BLOB_KEY
+BLOB_KEY = "$blob"
+PARTS_KEY = "$parts"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    context_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    terminal INTEGER NOT NULL,
+    updated REAL NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_context ON tasks (context_id, updated);
+CREATE INDEX IF NOT EXISTS tasks_expiry ON tasks (terminal, updated);
+CREATE TABLE IF NOT EXISTS task_blobs (
+    task_id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (task_id, digest)
+);
+CREATE INDEX IF NOT EXISTS task_blobs_digest ON task_blobs (digest);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+class SqliteTaskStore(TaskStore):
+    """A2A task store on a SQLite/WAL file with an in-memory LRU hot tier.
+
+    Every save is written through, so a restart keeps in-flight tasks.
+    The parts of an artifact larger than `artifact_inline_bytes` are stored
+    out of the task row, one content-addressed blob per part, and the row
+    keeps their digests. Streamed artifacts grow by appended parts, so a
+    save only inserts the parts that are new since the task's last save,
+    plus the row itself, which grows by one digest per part. The hot tier
+    holds at most `hot_size` tasks, and only those without out-of-line
+    artifacts, so memory stays flat however many tasks pass through. Tasks in a terminal
+    state are deleted `ttl_seconds` after their last update.
+
+    With `shared`, other processes write to the same file, so a cached task is
+    only served after checking its row was not updated since.
+    """
+
+    def __init__(
+        self,
+        db_file: str = "tmp/tasks.db",
+        hot_size: int = 256,
+        ttl_seconds: float = 24 * 3600,
+        artifact_inline_bytes: int = 16 * 1024,
+        sweep_interval: float = 60,
+        shared: bool = False,
+    ):
+        path = Path(db_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.hot_size = hot_size
+        self.ttl_seconds = ttl_seconds
+        self.artifact_inline_bytes = artifact_inline_bytes
+        self.sweep_interval = sweep_interval
+        self.shared = shared
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        self._hot: OrderedDict[str, tuple[Task, float]] = OrderedDict()
+        self._hot_lock = threading.Lock()
+        self._last_sweep = 0.0
+        logger.info(f"Task store: {self.count()} tasks in {path}")
+
+    async def save(self, task: Task) -> None:
+        await asyncio.to_thread(self._save, task)
+
+    async def get(self, task_id: str) -> Optional[Task]:
+        if not self.shared:
+            with self._hot_lock:
+                cached = self._hot.get(task_id)
+                if cached is not None:
+                    self._hot.move_to_end(task_id)
+                    return cached[0]
+        return await asyncio.to_thread(self._get, task_id)
+
+    async def delete(self, task_id: str) -> None:
+        await asyncio.to_thread(self._delete, [task_id])
+
+    async def list_by_context(self, context_id: str) -> list[Task]:
+        """Tasks of one conversation, oldest first."""
+        return await asyncio.to_thread(self._list_by_context, context_id)
+
+    def count(self) -> int:
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def sweep(self) -> int:
+        """Deletes terminal tasks older than the TTL and blobs nobody references."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._db_lock:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT id FROM tasks WHERE terminal = 1 AND updated < ?", (cutoff,)
+            )]
+        if expired:
+            self._delete(expired)
+            logger.debug(f"Expired {len(expired)} finished tasks")
+        # Catches blobs left behind by a writer that died between its statements
+        with self._db_lock:
+            orphans = self._conn.execute(
+                "DELETE FROM blobs WHERE digest NOT IN (SELECT digest FROM task_blobs)"
+            ).rowcount
+        if orphans:
+            logger.debug(f"Deleted {orphans} unreferenced task blobs")
+        return len(expired)
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._conn.close()
+
+    def _save(self, task: Task) -> None:
+        body, digests, blobs = self._split(task)
+        now = time.time()
+        state = task.status.state
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                previous = [row[0] for row in self._conn.execute(
+                    "SELECT digest FROM task_blobs WHERE task_id = ?", (task.id,)
+                )]
+                # Parts this task already references are stored; only appended ones are written
+                known = set(previous)
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)",
+                    [(digest, data) for digest, data in blobs.items() if digest not in known],
+                )
+                self._conn.execute("DELETE FROM task_blobs WHERE task_id = ?", (task.id,))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO task_blobs (task_id, digest) VALUES (?, ?)",
+                    [(task.id, digest) for digest in digests],
+                )
+                # An artifact that changed since the last save leaves its old version behind
+                self._drop_unreferenced(set(previous) - set(digests))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tasks (id, context_id, state, terminal, updated, body) VALUES (?, ?, ?, ?, ?, ?)",
+                    (task.id, task.contextId, state.value, int(state in TERMINAL_STATES), now, body),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        with self._hot_lock:
+            if digests:
+                # Keep heavy tasks out of memory; they are rebuilt from the blobs on demand
+                self._hot.pop(task.id, None)
+            else:
+                self._hot[task.id] = (task, now)
+                self._hot.move_to_end(task.id)
+                while len(self._hot) > self.hot_size:
+                    self._hot.popitem(last=False)
+        if now - self._last_sweep > self.sweep_interval:
+            self._last_sweep = now
+            self.sweep()
+
+    def _get(self, task_id: str) -> Optional[Task]:
+        if self.shared:
+            # The update stamp is an index lookup; only a changed row is parsed again
+            with self._db_lock:
+                row = self._conn.execute("SELECT updated FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            with self._hot_lock:
+                cached = self._hot.get(task_id)
+                if cached is not None and row is not None and cached[1] == row[0]:
+                    self._hot.move_to_end(task_id)
+                    return cached[0]
+        with self._db_lock, self._snapshot():
+            row = self._conn.execute("SELECT body, updated FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            blobs = self._blobs(task_id, row[0]) if row else {}
+        if row is None:
+            with self._hot_lock:
+                self._hot.pop(task_id, None)
+            return None
+        body, updated = row
+        task = self._join(body, blobs)
+        if not blobs:
+            with self._hot_lock:
+                self._hot[task_id] = (task, updated)
+                while len(self._hot) > self.hot_size:
+                    self._hot.popitem(last=False)
+        return task
+
+    def _list_by_context(self, context_id: str) -> list[Task]:
+        with self._db_lock, self._snapshot():
+            rows = self._conn.execute(
+                "SELECT id, body FROM tasks WHERE context_id = ? ORDER BY updated", (context_id,)
+            ).fetchall()
+            blobs = [self._blobs(task_id, body) for task_id, body in rows]
+        return [self._join(body, task_blobs) for (_, body), task_blobs in zip(rows, blobs)]
+
+    def _delete(self, task_ids: list[str]) -> None:
+        with self._hot_lock:
+            for task_id in task_ids:
+                self._hot.pop(task_id, None)
+        marks = ",".join("?" * len(task_ids))
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                digests = [row[0] for row in self._conn.execute(
+                    f"SELECT DISTINCT digest FROM task_blobs WHERE task_id IN ({marks})", task_ids
+                )]
+                self._conn.execute(f"DELETE FROM tasks WHERE id IN ({marks})", task_ids)
+                self._conn.execute(f"DELETE FROM task_blobs WHERE task_id IN ({marks})", task_ids)
+                self._drop_unreferenced(digests)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _drop_unreferenced(self, digests) -> None:
+        # Blobs are shared by content; drop only those no other task points at
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE digest = ? AND NOT EXISTS (SELECT 1 FROM task_blobs WHERE digest = ?)",
+            [(digest, digest) for digest in digests],
+        )
+
+    def _split(self, task: Task) -> tuple[str, list[str], dict[str, str]]:
+        """Task JSON with the parts of large artifacts replaced by digests, plus those parts by digest."""
+        data = task.model_dump(mode="json", exclude_none=True)
+        blobs: dict[str, str] = {}
+        for artifact in data.get("artifacts") or []:
+            parts = [json.dumps(part, separators=(",", ":")) for part in artifact.get("parts", [])]
+            if sum(map(len, parts)) <= self.artifact_inline_bytes:
+                continue
+            digests = [hashlib.sha256(encoded.encode()).hexdigest() for encoded in parts]
+            blobs.update(zip(digests, parts))
+            del artifact["parts"]
+            artifact[PARTS_KEY] = digests
+        return json.dumps(data, separators=(",", ":")), list(blobs), blobs
+
+    @contextmanager
+    def _snapshot(self) -> Iterator[None]:
+        # One read transaction, so a row and its blobs come from the same commit
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            self._conn.execute("COMMIT")
+
+    def _blobs(self, task_id: str, body: str) -> dict[str, str]:
+        if PARTS_KEY not in body and BLOB_KEY not in body:
+            return {}
+        return dict(self._conn.execute(
+            "SELECT blobs.digest, blobs.data FROM task_blobs JOIN blobs ON blobs.digest = task_blobs.digest "
+            "WHERE task_blobs.task_id = ?",
+            (task_id,),
+        ))
+
+    @staticmethod
+    def _join(body: str, blobs: dict[str, str]) -> Task:
+        data: dict[str, Any] = json.loads(body)
+        if blobs:
+            artifacts = []
+            for artifact in data.get("artifacts") or []:
+                if BLOB_KEY in artifact:
+                    artifact = json.loads(blobs[artifact[BLOB_KEY]])
+                elif PARTS_KEY in artifact:
+                    artifact["parts"] = [json.loads(blobs[digest]) for digest in artifact.pop(PARTS_KEY)]
+                artifacts.append(artifact)
+            data["artifacts"] = artifacts
+        return Task.model_validate(data)
+
+
+def make_task_store(
+    backend: str = "sqlite",
+    db_file: str = "tmp/tasks.db",
+    hot_size: int = 256,
+    ttl_seconds: float = 24 * 3600,
+    artifact_inline_bytes: int = 16 * 1024,
+    shared: bool = False,
+) -> TaskStore:
+    """Builds the A2A task store for `backend` ("sqlite" or "memory")."""
+    if backend == "memory":
+        if shared:
+            raise ValueError("The memory task store can't be shared by several workers; use sqlite")
+        return InMemoryTaskStore()
+    if backend == "sqlite":
+        return SqliteTaskStore(
+            db_file=db_file,
+            hot_size=hot_size,
+            ttl_seconds=ttl_seconds,
+            artifact_inline_bytes=artifact_inline_bytes,
+            shared=shared,
+        )
+    raise ValueError(f"Unknown task store backend: {backend}")
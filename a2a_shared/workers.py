@@ -0,0 +1,343 @@
+import asyncio
+import multiprocessing
+import os
+import runpy
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncGenerator, Optional
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from a2a.server.context import ServerCallContext
+from a2a.server.events import Event, EventQueue, InMemoryQueueManager
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.types import (
+    CancelTaskRequest,
+    CancelTaskResponse,
+    JSONRPCErrorResponse,
+    Message,
+    MessageSendParams,
+    SendMessageRequest,
+    SendMessageResponse,
+    SendStreamingMessageRequest,
+    SendStreamingMessageResponse,
+    Task,
+    TaskIdParams,
+    TaskResubscriptionRequest,
+)
+from a2a.utils.errors import ServerError
+from httpx_sse import aconnect_sse
+from loguru import logger
+
+OWNERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_owners (
+    task_id TEXT PRIMARY KEY,
+    worker_url TEXT NOT NULL,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS context_owners (
+    context_id TEXT PRIMARY KEY,
+    worker_url TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS context_owners_expiry ON context_owners (updated);
+"""
+
+
+class OwnerRegistry:
+    """Which worker owns each running task and each conversation, in SQLite tables all workers share.
+
+    A task's event queue lives in the memory of the worker that runs it, so
+    resubscribe and cancel must reach that worker; workers claim a task when
+    its queue is created and release it when the queue closes. A conversation
+    (A2A contextId) belongs to the worker that served its last turn, which
+    holds its cached agent state. Conversation claims expire after
+    `context_ttl_seconds` without a turn.
+    """
+
+    def __init__(self, db_file: str = "tmp/tasks.db", context_ttl_seconds: float = 24 * 3600, sweep_interval: float = 60):
+        path = Path(db_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.context_ttl_seconds = context_ttl_seconds
+        self.sweep_interval = sweep_interval
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(OWNERS_SCHEMA)
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    async def claim_task(self, task_id: str, worker_url: str) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO task_owners (task_id, worker_url, started) VALUES (?, ?, ?)",
+            (task_id, worker_url, time.time()),
+        )
+
+    async def release_task(self, task_id: str, worker_url: str) -> None:
+        await asyncio.to_thread(
+            self._execute, "DELETE FROM task_owners WHERE task_id = ? AND worker_url = ?", (task_id, worker_url)
+        )
+
+    async def task_owner(self, task_id: str) -> Optional[str]:
+        return await asyncio.to_thread(self._select, "SELECT worker_url FROM task_owners WHERE task_id = ?", task_id)
+
+    async def claim_context(self, context_id: str, worker_url: str) -> None:
+        await asyncio.to_thread(self._claim_context, context_id, worker_url)
+
+    async def context_owner(self, context_id: str) -> Optional[str]:
+        return await asyncio.to_thread(
+            self._select,
+            "SELECT worker_url FROM context_owners WHERE context_id = ? AND updated >= ?",
+            context_id,
+            time.time() - self.context_ttl_seconds,
+        )
+
+    async def forget_worker(self, worker_url: str) -> None:
+        """Drops every claim of a worker that is gone."""
+        await asyncio.to_thread(self._forget_worker, worker_url)
+
+    def clear(self) -> None:
+        """Forgets every owner; called before any worker starts."""
+        self._execute("DELETE FROM task_owners", ())
+        self._execute("DELETE FROM context_owners", ())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _claim_context(self, context_id: str, worker_url: str) -> None:
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO context_owners (context_id, worker_url, updated) VALUES (?, ?, ?)",
+            (context_id, worker_url, now),
+        )
+        if now - self._last_sweep > self.sweep_interval:
+            self._last_sweep = now
+            self._execute("DELETE FROM context_owners WHERE updated < ?", (now - self.context_ttl_seconds,))
+
+    def _forget_worker(self, worker_url: str) -> None:
+        self._execute("DELETE FROM task_owners WHERE worker_url = ?", (worker_url,))
+        self._execute("DELETE FROM context_owners WHERE worker_url = ?", (worker_url,))
+
+    def _select(self, sql: str, *args: Any) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(sql, args).fetchone()
+        return row[0] if row else None
+
+    def _execute(self, sql: str, args: tuple) -> None:
+        with self._lock:
+            self._conn.execute(sql, args)
+
+
+class OwnedQueueManager(InMemoryQueueManager):
+    """In-memory event queues that record this worker as the owner of their task."""
+
+    def __init__(self, owners: OwnerRegistry, worker_url: str):
+        super().__init__()
+        self.owners = owners
+        self.worker_url = worker_url
+
+    async def add(self, task_id: str, queue: EventQueue):
+        await super().add(task_id, queue)
+        await self.owners.claim_task(task_id, self.worker_url)
+
+    async def create_or_tap(self, task_id: str) -> EventQueue:
+        created = await self.get(task_id) is None
+        queue = await super().create_or_tap(task_id)
+        if created:
+            await self.owners.claim_task(task_id, self.worker_url)
+        return queue
+
+    async def close(self, task_id: str):
+        try:
+            await super().close(task_id)
+        finally:
+            await self.owners.release_task(task_id, self.worker_url)
+
+
+class WorkerRequestHandler(DefaultRequestHandler):
+    """Request handler for one of several workers sharing a port.
+
+    Task state and push configs are in shared stores, so `tasks/get` and the
+    push config methods are answered by whichever worker receives them. The
+    rest is forwarded to the owning worker's private address: resubscribe and
+    cancel to the worker running the task, whose queue they need, and new
+    messages to the worker that served the conversation's last turn, so agent
+    state it caches per conversation stays authoritative. A request for a
+    worker that is gone is handled locally, as a single worker would.
+    """
+
+    def __init__(self, *, owners: OwnerRegistry, worker_url: str, **kwargs: Any):
+        super().__init__(queue_manager=OwnedQueueManager(owners, worker_url), **kwargs)
+        self.owners = owners
+        self.worker_url = worker_url
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def on_message_send(
+        self, params: MessageSendParams, context: ServerCallContext | None = None
+    ) -> Message | Task:
+        owner = await self._remote(self.owners.context_owner, await self._context_id(params))
+        if owner is not None:
+            try:
+                request = SendMessageRequest(id=str(uuid4()), params=params)
+                return self._result(SendMessageResponse.model_validate_json(await self._post(owner, request)))
+            except httpx.ConnectError as e:
+                await self._forget(owner, e)
+        result = await super().on_message_send(params, context)
+        if result.contextId:
+            await self.owners.claim_context(result.contextId, self.worker_url)
+        return result
+
+    async def on_message_send_stream(
+        self, params: MessageSendParams, context: ServerCallContext | None = None
+    ) -> AsyncGenerator[Event, None]:
+        owner = await self._remote(self.owners.context_owner, await self._context_id(params))
+        if owner is not None:
+            try:
+                async for event in self._stream(owner, SendStreamingMessageRequest(id=str(uuid4()), params=params)):
+                    yield event
+                return
+            except httpx.ConnectError as e:
+                await self._forget(owner, e)
+        claimed = False
+        async for event in super().on_message_send_stream(params, context):
+            if not claimed and getattr(event, "contextId", None):
+                await self.owners.claim_context(event.contextId, self.worker_url)
+                claimed = True
+            yield event
+
+    async def on_resubscribe_to_task(
+        self, params: TaskIdParams, context: ServerCallContext | None = None
+    ) -> AsyncGenerator[Event, None]:
+        owner = await self._remote(self.owners.task_owner, params.id)
+        if owner is not None:
+            try:
+                async for event in self._stream(owner, TaskResubscriptionRequest(id=str(uuid4()), params=params)):
+                    yield event
+                return
+            except httpx.ConnectError as e:
+                await self._forget(owner, e)
+        async for event in super().on_resubscribe_to_task(params, context):
+            yield event
+
+    async def on_cancel_task(
+        self, params: TaskIdParams, context: ServerCallContext | None = None
+    ) -> Task | None:
+        owner = await self._remote(self.owners.task_owner, params.id)
+        if owner is not None:
+            try:
+                request = CancelTaskRequest(id=str(uuid4()), params=params)
+                return self._result(CancelTaskResponse.model_validate_json(await self._post(owner, request)))
+            except httpx.ConnectError as e:
+                await self._forget(owner, e)
+        return await super().on_cancel_task(params, context)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self.owners.close()
+
+    async def _context_id(self, params: MessageSendParams) -> Optional[str]:
+        if params.message.contextId:
+            return params.message.contextId
+        if params.message.taskId:
+            task = await self.task_store.get(params.message.taskId)
+            return task.contextId if task else None
+        return None
+
+    async def _remote(self, lookup, key: Optional[str]) -> Optional[str]:
+        owner = await lookup(key) if key else None
+        return owner if owner not in (None, self.worker_url) else None
+
+    async def _forget(self, owner: str, error: Exception) -> None:
+        logger.warning(f"Worker {owner} is unreachable, taking over its requests: {error}")
+        await self.owners.forget_worker(owner)
+
+    async def _post(self, owner: str, request: Any) -> bytes:
+        reply = await self._http().post(owner, json=request.model_dump(mode="json", exclude_none=True))
+        return reply.content
+
+    async def _stream(self, owner: str, request: Any) -> AsyncGenerator[Event, None]:
+        async with aconnect_sse(
+            self._http(), "POST", owner, json=request.model_dump(mode="json", exclude_none=True)
+        ) as source:
+            async for sse in source.aiter_sse():
+                yield self._result(SendStreamingMessageResponse.model_validate_json(sse.data))
+
+    @staticmethod
+    def _result(response: Any) -> Any:
+        if isinstance(response.root, JSONRPCErrorResponse):
+            raise ServerError(error=response.root.error)
+        return response.root.result
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=None)
+        return self._client
+
+
+def make_request_handler(worker_url: Optional[str] = None, db_file: str = "tmp/tasks.db", **kwargs: Any) -> DefaultRequestHandler:
+    """The SDK's handler for a single process, a `WorkerRequestHandler` for a worker."""
+    if worker_url is None:
+        return DefaultRequestHandler(**kwargs)
+    return WorkerRequestHandler(owners=OwnerRegistry(db_file), worker_url=worker_url, **kwargs)
+
+
+def _worker(app_file: str, factory: str, host: str, port: int, sock: socket.socket) -> None:
+    # A spawned child can't import the parent's `__main__.py` by name, so it
+    # runs the file again without its `__main__` block and calls the factory
+    namespace = runpy.run_path(app_file, run_name="__a2a_worker__")
+    private = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    private.bind(("127.0.0.1", 0))
+    worker_url = f"http://127.0.0.1:{private.getsockname()[1]}/"
+    app = namespace[factory](host, port, worker_url=worker_url)
+    logger.info(f"Worker {os.getpid()} serving, private address {worker_url}")
+    uvicorn.Server(uvicorn.Config(app, timeout_graceful_shutdown=10)).run(sockets=[sock, private])
+
+
+def run_workers(app_file: str, factory: str, host: str, port: int, workers: int, db_file: str = "tmp/tasks.db") -> None:
+    """Serves `factory(host, port, worker_url=...)` from `app_file` on `workers` processes sharing one port.
+
+    Workers are spawned, not forked, so every worker builds its own clients,
+    threads and database connections. Owners left in `db_file` by a previous
+    run are cleared first. A worker that dies is replaced; SIGINT or
+    SIGTERM stops them all.
+    """
+    owners = OwnerRegistry(db_file)
+    owners.clear()
+    owners.close()
+    sock = uvicorn.Config(app=None, host=host, port=port).bind_socket()
+    context = multiprocessing.get_context("spawn")
+    stopping = threading.Event()
+
+    def start() -> multiprocessing.process.BaseProcess:
+        process = context.Process(target=_worker, args=(app_file, factory, host, port, sock), name="a2a-worker")
+        process.start()
+        return process
+
+    def stop(*_: Any) -> None:
+        stopping.set()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, stop)
+    processes = [start() for _ in range(workers)]
+    logger.info(f"Started {workers} workers on http://{host}:{port}")
+    try:
+        while not stopping.wait(0.5):
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    logger.warning(f"Worker {process.pid} exited with {process.exitcode}, restarting")
+                    processes[i] = start()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(15)
+            if process.is_alive():
+                process.kill()
+        sock.close()
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Optional, TypeVar
+
+from loguru import logger
+
+AgentT = TypeVar("AgentT")
+
+
+class AgentPool(Generic[AgentT]):
+    """Bounded pool of pre-warmed agent instances, checked out per task.
+
+    agno Agents keep run state, session ID and memory on the instance, so an
+    instance serves one task at a time. A context is pinned to the instance
+    that served its last turn; a follow-up turn waits for that instance
+    rather than racing it from a second one. Instances idle for longer than
+    `idle_timeout` are dropped, down to `min_size`.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], AgentT],
+        max_size: int = 8,
+        min_size: int = 1,
+        idle_timeout: float = 300,
+    ):
+        self.factory = factory
+        self.max_size = max_size
+        self.min_size = min(min_size, max_size)
+        self.idle_timeout = idle_timeout
+
+        self._idle: OrderedDict[AgentT, float] = OrderedDict()
+        self._in_use: set[AgentT] = set()
+        self._pins: dict[str, AgentT] = {}
+        self._pinned_context: dict[AgentT, str] = {}
+        self._size = 0
+        self._waiting = 0
+        self._condition = asyncio.Condition()
+        self._reaper: Optional[asyncio.Task] = None
+        self.counters = {
+            "created": 0,
+            "evicted": 0,
+            "checkouts": 0,
+            "pinned_checkouts": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+        for _ in range(self.min_size):
+            self._idle[self._create()] = time.monotonic()
+            self._size += 1
+
+    async def acquire(self, context_id: str) -> AgentT:
+        started = time.monotonic()
+        self._ensure_reaper()
+        agent = None
+        async with self._condition:
+            self._waiting += 1
+            try:
+                while agent is None:
+                    pinned = self._pins.get(context_id)
+                    if pinned is not None:
+                        if pinned in self._idle:
+                            agent = self._take(pinned)
+                            self.counters["pinned_checkouts"] += 1
+                            break
+                    elif self._idle:
+                        agent = self._take(self._pick_idle())
+                        break
+                    elif self._size < self.max_size:
+                        self._size += 1
+                        break
+                    await self._condition.wait()
+            finally:
+                self._waiting -= 1
+
+        if agent is None:
+            try:
+                agent = await asyncio.to_thread(self._create)
+            except Exception:
+                async with self._condition:
+                    self._size -= 1
+                    self._condition.notify_all()
+                raise
+            self._in_use.add(agent)
+
+        waited = time.monotonic() - started
+        self.counters["checkouts"] += 1
+        self.counters["total_wait_seconds"] += waited
+        self.counters["max_wait_seconds"] = max(self.counters["max_wait_seconds"], waited)
+        return agent
+
+    async def release(self, context_id: str, agent: AgentT) -> None:
+        async with self._condition:
+            self._in_use.discard(agent)
+            self._pin(context_id, agent)
+            self._idle[agent] = time.monotonic()
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        checkouts = self.counters["checkouts"]
+        return {
+            **self.counters,
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": len(self._in_use),
+            "waiting": self._waiting,
+            "pinned_contexts": len(self._pins),
+            "avg_wait_seconds": self.counters["total_wait_seconds"] / checkouts if checkouts else 0.0,
+        }
+
+    def _create(self) -> AgentT:
+        agent = self.factory()
+        self.counters["created"] += 1
+        return agent
+
+    def _take(self, agent: AgentT) -> AgentT:
+        del self._idle[agent]
+        self._in_use.add(agent)
+        return agent
+
+    def _pick_idle(self) -> AgentT:
+        # Prefer an instance no other context is pinned to, else steal the LRU one
+        for agent in self._idle:
+            if agent not in self._pinned_context:
+                return agent
+        agent = next(iter(self._idle))
+        self._unpin(agent)
+        return agent
+
+    def _pin(self, context_id: str, agent: AgentT) -> None:
+        previous = self._pins.get(context_id)
+        if previous is not None and previous is not agent:
+            self._pinned_context.pop(previous, None)
+        self._unpin(agent)
+        self._pins[context_id] = agent
+        self._pinned_context[agent] = context_id
+
+    def _unpin(self, agent: AgentT) -> None:
+        context_id = self._pinned_context.pop(agent, None)
+        if context_id is not None and self._pins.get(context_id) is agent:
+            del self._pins[context_id]
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 4, 1))
+            async with self._condition:
+                cutoff = time.monotonic() - self.idle_timeout
+                for agent, last_used in list(self._idle.items()):
+                    if self._size <= self.min_size or last_used > cutoff:
+                        break
+                    del self._idle[agent]
+                    self._unpin(agent)
+                    self._size -= 1
+                    self.counters["evicted"] += 1
+                    logger.debug(f"Evicted idle agent instance, pool size now {self._size}")
+                self._condition.notify_all()
@@ -1,26 +1,77 @@
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
 from dotenv import load_dotenv
 from loguru import logger
-from typing import AsyncIterator, Iterator
+from typing import AsyncIterator, Iterator, Optional
+from uuid import uuid4
 from agno.run.response import RunResponse
 from agno.agent import Agent
+from agno.memory.agent import AgentMemory, AgentRun
+from agno.models.message import Message
 from agno.models.cerebras import Cerebras
-from agno.tools.youtube import YouTubeTools
-from agno.storage.sqlite import SqliteStorage
+from long_transcript import LongTranscriptSummarizer
+from session_cache import WriteBehindSqliteStorage
+from youtube_cache import CachedYouTubeTools, TranscriptCache, find_video_id
 import time
 import json
 
 load_dotenv()
 
+# agno's `arun` still calls the synchronous YouTube tools and SqliteStorage
+# inline, so streaming runs are driven on a bounded thread pool instead.
+STREAM_WORKERS = int(os.getenv("YOUTUBE_AGENT_STREAM_WORKERS", "8"))
+STREAM_QUEUE_SIZE = int(os.getenv("YOUTUBE_AGENT_STREAM_QUEUE_SIZE", "64"))
+
+_stream_executor = ThreadPoolExecutor(
+    max_workers=STREAM_WORKERS,
+    thread_name_prefix="youtube-agent-stream",
+)
+_STREAM_DONE = object()
+
+# Shared by every agent instance so repeat analyses of a video skip the network.
+transcript_cache = TranscriptCache(
+    db_file=os.getenv("YOUTUBE_CACHE_DB", "tmp/youtube_cache.db"),
+    memory_max_entries=int(os.getenv("YOUTUBE_CACHE_MEMORY_ENTRIES", "256")),
+    disk_max_bytes=int(os.getenv("YOUTUBE_CACHE_DISK_MB", "512")) * 1024 * 1024,
+)
+
+
+def cerebras_model() -> Cerebras:
+    return Cerebras(id="llama-4-scout-17b-16e-instruct", api_key=os.getenv("CEREBRAS_API_KEY"))
+
+
+# Videos longer than YOUTUBE_LONG_TRANSCRIPT_SECONDS are summarized window by
+# window instead of pushing the whole transcript into one context.
+long_transcript_summarizer = LongTranscriptSummarizer(
+    model_factory=cerebras_model,
+    fan_out=int(os.getenv("YOUTUBE_SUMMARY_FAN_OUT", "4")),
+    window_seconds=float(os.getenv("YOUTUBE_WINDOW_SECONDS", "600")),
+    overlap_seconds=float(os.getenv("YOUTUBE_WINDOW_OVERLAP_SECONDS", "60")),
+    min_duration_seconds=float(os.getenv("YOUTUBE_LONG_TRANSCRIPT_SECONDS", "1800")),
+)
+
+# Session history keyed by the A2A contextId, cached in memory and written
+# to tmp/agents.db in batches by a dedicated writer thread.
+session_storage = WriteBehindSqliteStorage(
+    table_name="Youtube_Agent",
+    db_file="tmp/agents.db",
+    max_sessions=int(os.getenv("YOUTUBE_SESSION_CACHE_SIZE", "1024")),
+    flush_interval=float(os.getenv("YOUTUBE_SESSION_FLUSH_SECONDS", "1.0")),
+)
+
 class YouTubeAgent:
     def __init__(self):
         self.agent_storage: str = "tmp/agents.db"
+        self.youtube_tools = CachedYouTubeTools(cache=transcript_cache)
+        self.summarizer = long_transcript_summarizer
 
         self.agent = Agent(
             name="YouTube Agent",
-            model=Cerebras(id="llama-4-scout-17b-16e-instruct", api_key=os.getenv("CEREBRAS_API_KEY")),
-            tools=[YouTubeTools()],
+            model=cerebras_model(),
+            tools=[self.youtube_tools],
             show_tool_calls=True,
             instructions=dedent("""\
                 You are an expert YouTube content analyst with a keen eye for detail! 🎓
@@ -77,10 +128,7 @@ class YouTubeAgent:
                 - Do not proceed with partial data
                 - Always be clear about what's missing
             """),
-            storage=SqliteStorage(
-                table_name="Youtube_Agent",
-                db_file=self.agent_storage
-            ),
+            storage=session_storage,
             add_datetime_to_instructions=True,
             add_history_to_messages=True,
             num_history_responses=5,
@@ -90,7 +138,7 @@ class YouTubeAgent:
     def invoke(self, query: str, session_id: str = None) -> list[dict]:
         try:
             logger.info(f"Invoking YouTube Agent with query: {query}")
-            result = self.agent.run(query)
+            result = self.agent.run(query, session_id=session_id)
             
             # Handle RunResponse object
             if isinstance(result, RunResponse):
@@ -141,8 +189,82 @@ class YouTubeAgent:
                 "content": f"Error: {str(e)}"
             }]
 
+    def _load_long_transcript(self, query: str) -> Optional[list[dict]]:
+        """Returns the caption segments when the query targets a long video."""
+        video_id = find_video_id(query)
+        if not video_id:
+            return None
+        try:
+            segments = self.youtube_tools.get_transcript_segments(video_id)
+        except Exception as e:
+            # Let the regular tool-calling run report the failure to the user
+            logger.warning(f"Could not prefetch transcript for {video_id}: {e}")
+            return None
+        return segments if self.summarizer.is_long(segments) else None
+
+    def _record_turn(self, query: str, answer: str, session_id: Optional[str]) -> None:
+        """Stores a turn answered outside `agent.run` in the session history, as a run would."""
+        if not session_id:
+            return
+        self.agent.initialize_agent()
+        self.agent.read_from_storage(session_id=session_id)
+        messages = [Message(role="user", content=query), Message(role="assistant", content=answer)]
+        run = RunResponse(
+            run_id=str(uuid4()),
+            session_id=session_id,
+            agent_id=self.agent.agent_id,
+            content=answer,
+            messages=messages,
+        )
+        if isinstance(self.agent.memory, AgentMemory):
+            self.agent.memory.add_run(AgentRun(message=messages[0], response=run))
+        else:
+            self.agent.memory.add_run(session_id=session_id, run=run)
+        self.agent.write_to_storage(session_id=session_id)
+
+    def _stream_long_transcript(self, query: str, segments: list[dict], session_id: Optional[str]) -> Iterator[dict]:
+        windows = self.summarizer.split(segments)
+        yield {
+            "is_task_complete": False,
+            "require_user_input": False,
+            "content": f"Long video detected: summarizing {len(windows)} sections, {self.summarizer.fan_out} at a time",
+        }
+
+        summaries = []
+        for window, summary in self.summarizer.map_windows(windows, query):
+            summaries.append((window, summary))
+            yield {
+                "is_task_complete": False,
+                "require_user_input": False,
+                "content": f"Summarized section {len(summaries)}/{len(windows)} {window.label}",
+            }
+
+        video_data = self.youtube_tools.get_youtube_video_data(find_video_id(query))
+        answer = []
+        for chunk in self.summarizer.reduce_stream(query, video_data, summaries):
+            if isinstance(chunk, RunResponse) and chunk.content:
+                answer.append(str(chunk.content))
+                yield {
+                    "is_task_complete": False,
+                    "require_user_input": False,
+                    "is_delta": True,
+                    "content": str(chunk.content)
+                }
+        # Follow-up questions in this conversation see the analysis like any other turn
+        self._record_turn(query, "".join(answer), session_id)
+
     def stream(self, query: str, session_id: str = None) -> Iterator[dict]:
         try:
+            segments = self._load_long_transcript(query)
+            if segments is not None:
+                yield from self._stream_long_transcript(query, segments, session_id)
+                yield {
+                    "is_task_complete": True,
+                    "require_user_input": False,
+                    "content": ""
+                }
+                return
+
             response_stream = self.agent.run(query, session_id=session_id, stream=True)
 
             for chunk in response_stream:
@@ -151,6 +273,7 @@ class YouTubeAgent:
                         yield {
                             "is_task_complete": False,
                             "require_user_input": False,
+                            "is_delta": True,
                             "content": str(chunk.content)
                         }
                     
@@ -166,7 +289,7 @@ class YouTubeAgent:
             yield {
                 "is_task_complete": True,
                 "require_user_input": False,
-                "content": "Analysis completed."
+                "content": ""
             }
         
         except Exception as e:
@@ -176,4 +299,44 @@ class YouTubeAgent:
                 "content": f"Error: {str(e)}"
             }
 
+    async def astream(self, query: str, session_id: str = None) -> AsyncIterator[dict]:
+        """Async variant of `stream` that never blocks the event loop.
+
+        The synchronous `stream` generator runs on the shared thread pool and
+        hands its items over through a bounded queue, so a slow consumer
+        parks the worker thread instead of buffering the whole run in memory.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        cancelled = threading.Event()
+
+        def produce() -> None:
+            try:
+                for item in self.stream(query, session_id=session_id):
+                    if cancelled.is_set():
+                        break
+                    asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            except Exception as e:
+                logger.error(f"Error while bridging agent stream: {e}", exc_info=True)
+            finally:
+                if not cancelled.is_set():
+                    asyncio.run_coroutine_threadsafe(queue.put(_STREAM_DONE), loop)
+
+        producer = loop.run_in_executor(_stream_executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_DONE:
+                    break
+                yield item
+            await producer
+        finally:
+            cancelled.set()
+            # Unblock a producer parked on a full queue; it sees `cancelled`
+            # before handing over the next item.
+            while not queue.empty():
+                queue.get_nowait()
+            # Hold on until the worker thread has let go of this agent instance
+            await asyncio.wait({producer})
+
     SUPPORTED_CONTENT_TYPES = ['text', 'text/plain']
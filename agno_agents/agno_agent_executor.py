@@ -1,12 +1,16 @@
 import logging
+import os
+from uuid import uuid4
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import Event, EventQueue
 from a2a.server.tasks import TaskUpdater
 from a2a.types import (
+    Artifact,
     InternalError,
     InvalidParamsError,
     Part,
     Task,
+    TaskArtifactUpdateEvent,
     TaskState,
     TextPart,
     UnsupportedOperationError,
@@ -16,7 +20,9 @@ from a2a.utils import (
     new_task,
 )
 from a2a.utils.errors import ServerError
-from agno_agent import YouTubeAgent
+from agent_pool import AgentPool
+from agno_agent import STREAM_WORKERS, YouTubeAgent
+from stream_coalescer import StreamCoalescer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,7 +31,19 @@ class YoutubeAgentExecutor(AgentExecutor):
     """Addition Agent Executor with proper event queue handling."""
     
     def __init__(self):
-        self.agent = YouTubeAgent()
+        # One agno Agent per in-flight task; a context sticks to the instance of its last turn
+        self.pool = AgentPool(
+            YouTubeAgent,
+            max_size=int(os.getenv("YOUTUBE_AGENT_POOL_SIZE", str(STREAM_WORKERS))),
+            min_size=int(os.getenv("YOUTUBE_AGENT_POOL_MIN_SIZE", "1")),
+            idle_timeout=float(os.getenv("YOUTUBE_AGENT_POOL_IDLE_SECONDS", "300")),
+        )
+        # Batches token deltas so each status update carries a phrase, not a token
+        self.coalescer = StreamCoalescer(
+            window_seconds=float(os.getenv("STATUS_COALESCE_WINDOW_MS", "100")) / 1000,
+            max_bytes=int(os.getenv("STATUS_COALESCE_MAX_BYTES", "1024")),
+            flush_on_sentence=os.getenv("STATUS_COALESCE_ON_SENTENCE", "true").lower() == "true",
+        )
     
     async def execute(
         self,
@@ -55,13 +73,18 @@ class YoutubeAgentExecutor(AgentExecutor):
                 raise ServerError(error=InternalError())
         
         updater = TaskUpdater(event_queue, task.id, task.contextId)
+        # The analysis is streamed as appended chunks of this one artifact
+        artifact_id = str(uuid4())
+        artifact_started = False
+        
+        agent = await self.pool.acquire(task.contextId)
+        # Stream on a worker thread so the event loop keeps serving other tasks
+        response_items = self.coalescer.coalesce(
+            agent.astream(query=query, session_id=task.contextId)
+        )
         
         try:
-            # Get response items (either from invoke or stream)
-            response_items = self.agent.stream(query=query, session_id=task.contextId)
-            
-            # Process each response item
-            for item in response_items:
+            async for item in response_items:
                 # Check if queue is still open before each update
                 if event_queue.is_closed():
                     logger.warning("Event queue closed during streaming - stopping execution")
@@ -75,7 +98,15 @@ class YoutubeAgentExecutor(AgentExecutor):
                 require_user_input = item.get('require_user_input', False)
                 content = item.get('content', '')
                 
-                if not is_task_complete and not require_user_input:
+                if item.get('is_delta'):
+                    self._add_artifact_chunk(
+                        updater,
+                        artifact_id,
+                        [Part(root=TextPart(text=content))],
+                        append=artifact_started,
+                    )
+                    artifact_started = True
+                elif not is_task_complete and not require_user_input:
                     # Add status message for tool execution
                     logger.info(f"Tool execution status: {content}")
                     updater.update_status(
@@ -98,10 +129,13 @@ class YoutubeAgentExecutor(AgentExecutor):
                     )
                     break
                 else:
-                    # Final result
-                    updater.add_artifact(
-                        [Part(root=TextPart(text=content))],
-                        name='youtube_result',
+                    # Close the streamed artifact; the final item only carries trailing text
+                    self._add_artifact_chunk(
+                        updater,
+                        artifact_id,
+                        [Part(root=TextPart(text=content))] if content else [],
+                        append=artifact_started,
+                        last_chunk=True,
                     )
                     updater.complete()
                     break
@@ -123,7 +157,39 @@ class YoutubeAgentExecutor(AgentExecutor):
                 except:
                     pass  # Queue might have closed during error handling
             raise ServerError(error=InternalError()) from e
+        finally:
+            # Stop the agent run before handing the instance to another task
+            await response_items.aclose()
+            await self.pool.release(task.contextId, agent)
+            logger.debug(f"Executor stats: {self.stats()}")
+
+    def stats(self) -> dict:
+        """Agent pool usage, and stream coalescing totals over finished tasks."""
+        return {"pool": self.pool.stats(), "coalescer": self.coalescer.stats()}
     
+    def _add_artifact_chunk(
+        self,
+        updater: TaskUpdater,
+        artifact_id: str,
+        parts: list[Part],
+        append: bool,
+        last_chunk: bool = False,
+    ) -> None:
+        # TaskUpdater.add_artifact cannot set append/lastChunk, so enqueue the event directly
+        updater.event_queue.enqueue_event(
+            TaskArtifactUpdateEvent(
+                taskId=updater.task_id,
+                contextId=updater.context_id,
+                append=append,
+                lastChunk=last_chunk,
+                artifact=Artifact(
+                    artifactId=artifact_id,
+                    name='youtube_result',
+                    parts=parts,
+                ),
+            )
+        )
+
     def _validate_request(self, context: RequestContext) -> bool:
         # Add actual validation logic if needed
         user_input = context.get_user_input()
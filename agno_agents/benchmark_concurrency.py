@@ -0,0 +1,100 @@
+"""Concurrent-request throughput of the YouTube agent stream bridge.
+
+Runs N simulated analyses at once, the way the A2A server does, and compares
+iterating the blocking `stream` generator on the event loop (the old executor
+behaviour) with the thread-pool backed `astream`. The agent is replaced by a
+stub whose chunks take a fixed amount of blocking time, so no API keys or
+network access are needed.
+
+    uv run benchmark_concurrency.py --requests 16 --chunks 20 --chunk-delay 0.01
+"""
+import asyncio
+import time
+from typing import Iterator
+
+import click
+
+from agno_agent import YouTubeAgent
+
+
+class SlowYouTubeAgent(YouTubeAgent):
+    """Stand-in whose `stream` blocks like a model + YouTube HTTP round trip."""
+
+    def __init__(self, chunks: int, chunk_delay: float):
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+
+    def stream(self, query: str, session_id: str = None) -> Iterator[dict]:
+        for i in range(self.chunks):
+            time.sleep(self.chunk_delay)
+            yield {
+                "is_task_complete": False,
+                "require_user_input": False,
+                "content": f"chunk {i}",
+            }
+        yield {
+            "is_task_complete": True,
+            "require_user_input": False,
+            "content": "Analysis completed.",
+        }
+
+
+async def _blocking_request(agent: YouTubeAgent, session_id: str) -> int:
+    count = 0
+    for _ in agent.stream("benchmark", session_id=session_id):
+        count += 1
+        await asyncio.sleep(0)
+    return count
+
+
+async def _bridged_request(agent: YouTubeAgent, session_id: str) -> int:
+    count = 0
+    async for _ in agent.astream("benchmark", session_id=session_id):
+        count += 1
+    return count
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Returns the worst event-loop stall observed while requests were running."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def _run(mode: str, agent: YouTubeAgent, requests: int) -> dict:
+    handler = _blocking_request if mode == "blocking" else _bridged_request
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(handler(agent, f"session-{i}") for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "requests_per_s": requests / elapsed,
+        "max_loop_stall_ms": await heartbeat * 1000,
+    }
+
+
+@click.command()
+@click.option('--requests', 'requests', default=16)
+@click.option('--chunks', 'chunks', default=20)
+@click.option('--chunk-delay', 'chunk_delay', default=0.01)
+def main(requests, chunks, chunk_delay):
+    """Benchmarks blocking vs. bridged streaming under concurrent load."""
+    agent = SlowYouTubeAgent(chunks=chunks, chunk_delay=chunk_delay)
+    for mode in ("blocking", "bridged"):
+        result = asyncio.run(_run(mode, agent, requests))
+        print(
+            f"{result['mode']:>9}: {result['elapsed_s']:.2f}s total, "
+            f"{result['requests_per_s']:.1f} req/s, "
+            f"max loop stall {result['max_loop_stall_ms']:.0f} ms"
+        )
+
+
+if __name__ == '__main__':
+    main()
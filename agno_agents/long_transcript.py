@@ -0,0 +1,177 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from textwrap import dedent
+from typing import Callable, Iterator
+
+from agno.agent import Agent
+from agno.models.base import Model
+from agno.run.response import RunResponse
+from loguru import logger
+
+
+def format_timestamp(seconds: float) -> str:
+    """Formats seconds as MM:SS; minutes keep counting past the hour."""
+    minutes, secs = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{secs:02d}"
+
+
+@dataclass
+class TranscriptWindow:
+    index: int
+    start: float
+    end: float
+    text: str
+
+    @property
+    def label(self) -> str:
+        return f"[{format_timestamp(self.start)}] - [{format_timestamp(self.end)}]"
+
+
+def transcript_duration(segments: list[dict]) -> float:
+    if not segments:
+        return 0.0
+    last = segments[-1]
+    return float(last["start"]) + float(last.get("duration", 0.0))
+
+
+def split_transcript(
+    segments: list[dict],
+    window_seconds: float = 600,
+    overlap_seconds: float = 60,
+    line_seconds: float = 30,
+) -> list[TranscriptWindow]:
+    """Splits caption segments into overlapping, timestamped windows.
+
+    Each window starts `window_seconds - overlap_seconds` after the previous
+    one, so a point made across a window edge appears in both. Consecutive
+    segments are grouped into `[MM:SS]`-prefixed lines of roughly
+    `line_seconds` so the summaries can cite exact timestamps.
+    """
+    if not segments:
+        return []
+    if overlap_seconds >= window_seconds:
+        raise ValueError("overlap_seconds must be smaller than window_seconds")
+
+    step = window_seconds - overlap_seconds
+    duration = transcript_duration(segments)
+    windows = []
+    window_start = 0.0
+    while True:
+        window_end = window_start + window_seconds
+        lines = []
+        line_start = None
+        line_text = []
+        for segment in segments:
+            start = float(segment["start"])
+            if start < window_start:
+                continue
+            if start >= window_end:
+                break
+            if line_start is None or start - line_start >= line_seconds:
+                if line_text:
+                    lines.append(f"[{format_timestamp(line_start)}] {' '.join(line_text)}")
+                line_start = start
+                line_text = []
+            line_text.append(segment["text"].replace("\n", " "))
+        if line_text:
+            lines.append(f"[{format_timestamp(line_start)}] {' '.join(line_text)}")
+        if lines:
+            windows.append(TranscriptWindow(
+                index=len(windows),
+                start=window_start,
+                end=min(window_end, duration),
+                text="\n".join(lines),
+            ))
+        if window_end >= duration:
+            break
+        window_start += step
+    return windows
+
+
+WINDOW_INSTRUCTIONS = dedent("""\
+    You summarize one section of a longer YouTube video transcript.
+    - Every line of the transcript starts with its [MM:SS] timestamp
+    - Return 3-8 bullet points covering the key points of this section only
+    - Start every bullet with the [MM:SS] timestamp where the point is made
+    - Cover first whatever in this section bears on the user's request, and
+      say so if nothing does
+    - Do not add an introduction or a conclusion
+""")
+
+REDUCE_INSTRUCTIONS = dedent("""\
+    You are an expert YouTube content analyst. You receive the user's request,
+    the video metadata and timestamped summaries of consecutive, slightly
+    overlapping sections of the video, in order. Merge them into one analysis
+    that answers the request; when it asks about something specific, focus on
+    that and cite where in the video it comes up.
+
+    Format Guidelines:
+    - Use markdown for better readability
+    - Start with ## Video Analysis
+    - Use ### for major sections (Video Overview, Content Analysis, Final Summary)
+    - Use bullet points for key points
+    - Format timestamps as [MM:SS] and keep the timestamps from the section summaries
+    - Merge points repeated in the overlap between neighbouring sections
+""")
+
+
+class LongTranscriptSummarizer:
+    """Map-reduce summarization for transcripts too long for one context.
+
+    Windows are summarized concurrently on a pool of `fan_out` threads, each
+    with its own short-lived agno Agent, and a final agent merges the window
+    summaries into the usual `## Video Analysis` format.
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Model],
+        fan_out: int = 4,
+        window_seconds: float = 600,
+        overlap_seconds: float = 60,
+        min_duration_seconds: float = 1800,
+    ):
+        self.model_factory = model_factory
+        self.fan_out = fan_out
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self.min_duration_seconds = min_duration_seconds
+        self._executor = ThreadPoolExecutor(max_workers=fan_out, thread_name_prefix="youtube-window")
+
+    def is_long(self, segments: list[dict]) -> bool:
+        return transcript_duration(segments) >= self.min_duration_seconds
+
+    def split(self, segments: list[dict]) -> list[TranscriptWindow]:
+        return split_transcript(segments, self.window_seconds, self.overlap_seconds)
+
+    def summarize_window(self, window: TranscriptWindow, query: str) -> str:
+        agent = Agent(model=self.model_factory(), instructions=WINDOW_INSTRUCTIONS, markdown=True)
+        response = agent.run(f"User request: {query}\n\nTranscript section {window.label}:\n\n{window.text}")
+        return str(response.content)
+
+    def map_windows(self, windows: list[TranscriptWindow], query: str) -> Iterator[tuple[TranscriptWindow, str]]:
+        """Summarizes all windows concurrently with the user's request in view, yielding them as they finish."""
+        futures = {self._executor.submit(self.summarize_window, window, query): window for window in windows}
+        try:
+            for future in as_completed(futures):
+                window = futures[future]
+                summary = future.result()
+                logger.info(f"Summarized transcript window {window.index + 1}/{len(windows)} {window.label}")
+                yield window, summary
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def reduce_stream(
+        self, query: str, video_data: str, summaries: list[tuple[TranscriptWindow, str]]
+    ) -> Iterator[RunResponse]:
+        """Streams the answer to `query` merged from the ordered window summaries."""
+        sections = "\n\n".join(
+            f"#### Section {window.index + 1} {window.label}\n{summary}"
+            for window, summary in sorted(summaries, key=lambda item: item[0].index)
+        )
+        agent = Agent(model=self.model_factory(), instructions=REDUCE_INSTRUCTIONS, markdown=True)
+        yield from agent.run(
+            f"User request: {query}\n\nVideo metadata:\n{video_data}\n\nSection summaries:\n\n{sections}",
+            stream=True,
+        )
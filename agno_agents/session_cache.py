@@ -0,0 +1,217 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from agno.storage.session import Session
+from agno.storage.sqlite import SqliteStorage
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.dialects import sqlite
+
+
+def _enable_wal(dbapi_connection, _):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+class WriteBehindSqliteStorage(SqliteStorage):
+    """SqliteStorage with an in-memory, write-behind session cache.
+
+    Recent sessions are served from an LRU keyed by session ID (the A2A
+    contextId). `upsert` only updates the cache and marks the session dirty;
+    a dedicated writer thread flushes dirty sessions to SQLite in batches, one
+    transaction per batch, so agent runs never wait on the database file lock.
+    Dirty sessions, and sessions whose flush has not committed yet, are
+    never evicted, so a read can't fall back to an older row on disk.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        db_file: str,
+        max_sessions: int = 1024,
+        flush_interval: float = 1.0,
+        flush_batch_size: int = 128,
+    ):
+        db_path = Path(db_file).resolve()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # SqliteStorage drops a passed-in db_engine, so hook the engine it builds.
+        # WAL lets session reads proceed while the writer thread commits.
+        super().__init__(table_name=table_name, db_url=f"sqlite:///{db_path}")
+        event.listen(self.db_engine, "connect", _enable_wal)
+        self.db_engine.dispose()
+        self.max_sessions = max_sessions
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._dirty: OrderedDict[str, Session] = OrderedDict()
+        # Taken out of `_dirty` by the batch being written, until it commits
+        self._inflight: dict[str, Session] = {}
+        self._wake = threading.Event()
+        self._closed = False
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "flushes": 0, "flushed_sessions": 0}
+
+        self._writer = threading.Thread(target=self._flush_loop, name="session-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def read(self, session_id: str, user_id: Optional[str] = None) -> Optional[Session]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and (not user_id or session.user_id == user_id):
+                self._sessions.move_to_end(session_id)
+                self.counters["hits"] += 1
+                return session
+            session = self._inflight.get(session_id)
+            if session is not None and (not user_id or session.user_id == user_id):
+                # Newer than the disk row until its batch commits
+                self._remember(session)
+                self.counters["hits"] += 1
+                return session
+            self.counters["misses"] += 1
+
+        session = super().read(session_id=session_id, user_id=user_id)
+        if session is not None:
+            with self._lock:
+                # A concurrent upsert wins over what was just read from disk
+                if session_id not in self._sessions:
+                    self._remember(session)
+        return session
+
+    def upsert(self, session: Session, create_and_retry: bool = True) -> Optional[Session]:
+        with self._lock:
+            self._dirty[session.session_id] = session
+            self._dirty.move_to_end(session.session_id)
+            self._remember(session)
+            if len(self._dirty) >= self.flush_batch_size:
+                self._wake.set()
+        return session
+
+    def delete_session(self, session_id: Optional[str] = None):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._dirty.pop(session_id, None)
+            self._inflight.pop(session_id, None)
+        super().delete_session(session_id=session_id)
+
+    def get_all_session_ids(self, user_id: Optional[str] = None, entity_id: Optional[str] = None) -> List[str]:
+        self.flush()
+        return super().get_all_session_ids(user_id=user_id, entity_id=entity_id)
+
+    def get_all_sessions(self, user_id: Optional[str] = None, entity_id: Optional[str] = None) -> List[Session]:
+        self.flush()
+        return super().get_all_sessions(user_id=user_id, entity_id=entity_id)
+
+    def get_recent_sessions(self, *args, **kwargs) -> List[Session]:
+        self.flush()
+        return super().get_recent_sessions(*args, **kwargs)
+
+    def flush(self) -> int:
+        """Writes every dirty session to SQLite in batches; returns how many were written."""
+        written = 0
+        with self._write_lock:
+            while True:
+                with self._lock:
+                    batch = []
+                    while self._dirty and len(batch) < self.flush_batch_size:
+                        session = self._dirty.popitem(last=False)[1]
+                        self._inflight[session.session_id] = session
+                        batch.append(session)
+                if not batch:
+                    break
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    logger.error(f"Failed to flush {len(batch)} sessions, will retry: {e}")
+                    with self._lock:
+                        for session in batch:
+                            # Keep a newer upsert that arrived while we were writing
+                            self._dirty.setdefault(session.session_id, session)
+                        self._inflight.clear()
+                    break
+                with self._lock:
+                    self._inflight.clear()
+                written += len(batch)
+                self.counters["flushes"] += 1
+                self.counters["flushed_sessions"] += len(batch)
+        if written:
+            with self._lock:
+                self._evict()
+        return written
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join(timeout=self.flush_interval * 5)
+        self.flush()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self.counters, "cached_sessions": len(self._sessions), "dirty_sessions": len(self._dirty) + len(self._inflight)}
+
+    def _remember(self, session: Session) -> None:
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        self._evict()
+
+    def _evict(self) -> None:
+        overflow = len(self._sessions) - self.max_sessions
+        if overflow <= 0:
+            return
+        evictable = [sid for sid in self._sessions if sid not in self._dirty and sid not in self._inflight]
+        for session_id in evictable[:overflow]:
+            del self._sessions[session_id]
+            self.counters["evictions"] += 1
+        if len(self._sessions) > self.max_sessions:
+            self._wake.set()
+
+    def _write_batch(self, batch: List[Session]) -> None:
+        if self.mode != "agent":
+            for session in batch:
+                super().upsert(session)
+            return
+        if not self.table_exists():
+            self.create()
+        now = int(time.time())
+        with self.SqlSession() as sess, sess.begin():
+            for session in batch:
+                values = dict(
+                    agent_id=session.agent_id,  # type: ignore
+                    team_session_id=session.team_session_id,  # type: ignore
+                    user_id=session.user_id,
+                    memory=session.memory,
+                    agent_data=session.agent_data,  # type: ignore
+                    session_data=session.session_data,
+                    extra_data=session.extra_data,
+                )
+                stmt = sqlite.insert(self.table).values(session_id=session.session_id, **values)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["session_id"],
+                    set_=dict(values, updated_at=now),
+                )
+                sess.execute(stmt)
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Session writer failed: {e}")
+
+    def __deepcopy__(self, memo):
+        # Agent copies must share the cache and writer thread, not clone them
+        memo[id(self)] = self
+        return self
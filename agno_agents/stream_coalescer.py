@@ -0,0 +1,118 @@
+import asyncio
+import re
+import time
+from typing import AsyncIterator, Optional
+
+SENTENCE_END = re.compile(r"[.!?:;\n]\s*$")
+
+
+class StreamCoalescer:
+    """Merges consecutive token-delta stream items into fewer, larger ones.
+
+    Items flagged with `is_delta` are buffered and released as one item when
+    the oldest buffered delta is `window_seconds` old, the buffer reaches
+    `max_bytes`, or (with `flush_on_sentence`) the text ends a sentence and is
+    at least `min_bytes` long. Any other item flushes the buffer and passes
+    through unchanged, so tool progress and the final result keep their order.
+
+    Each stream counts its own events and flushes, and adds them to
+    `counters` when it ends; `stats()` reports the totals over every stream
+    coalesced by this instance.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 0.1,
+        max_bytes: int = 1024,
+        min_bytes: int = 48,
+        flush_on_sentence: bool = True,
+    ):
+        self.window_seconds = window_seconds
+        self.max_bytes = max_bytes
+        self.min_bytes = min_bytes
+        self.flush_on_sentence = flush_on_sentence
+        self.counters = {
+            "streams": 0,
+            "events_in": 0,
+            "events_out": 0,
+            "flush_window": 0,
+            "flush_bytes": 0,
+            "flush_sentence": 0,
+            "flush_passthrough": 0,
+        }
+
+    async def coalesce(self, source: AsyncIterator[dict]) -> AsyncIterator[dict]:
+        counters = dict.fromkeys(self.counters, 0)
+        buffer: list[str] = []
+        buffered_bytes = 0
+        deadline: Optional[float] = None
+        next_item = asyncio.ensure_future(anext(source))
+        try:
+            while True:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, _ = await asyncio.wait({next_item}, timeout=timeout)
+                if not done:
+                    yield self._flush(counters, buffer, "flush_window")
+                    buffer, buffered_bytes, deadline = [], 0, None
+                    continue
+
+                try:
+                    item = next_item.result()
+                except StopAsyncIteration:
+                    break
+                counters["events_in"] += 1
+
+                if not item.get("is_delta"):
+                    if buffer:
+                        yield self._flush(counters, buffer, "flush_passthrough")
+                        buffer, buffered_bytes, deadline = [], 0, None
+                    counters["events_out"] += 1
+                    yield item
+                    next_item = asyncio.ensure_future(anext(source))
+                    continue
+
+                content = item.get("content", "")
+                buffer.append(content)
+                buffered_bytes += len(content.encode())
+                if deadline is None:
+                    deadline = time.monotonic() + self.window_seconds
+
+                reason = None
+                if buffered_bytes >= self.max_bytes:
+                    reason = "flush_bytes"
+                elif self.flush_on_sentence and buffered_bytes >= self.min_bytes and SENTENCE_END.search(content):
+                    reason = "flush_sentence"
+                elif time.monotonic() >= deadline:
+                    # Deltas that were already queued never let the wait above time out
+                    reason = "flush_window"
+                if reason:
+                    yield self._flush(counters, buffer, reason)
+                    buffer, buffered_bytes, deadline = [], 0, None
+                next_item = asyncio.ensure_future(anext(source))
+
+            if buffer:
+                yield self._flush(counters, buffer, "flush_passthrough")
+        finally:
+            next_item.cancel()
+            await asyncio.wait({next_item})
+            await source.aclose()
+            counters["streams"] = 1
+            for name, count in counters.items():
+                self.counters[name] += count
+
+    def stats(self) -> dict:
+        events_out = self.counters["events_out"]
+        return {
+            **self.counters,
+            "events_per_update": self.counters["events_in"] / events_out if events_out else 0.0,
+        }
+
+    def _flush(self, counters: dict, buffer: list[str], reason: str) -> dict:
+        counters[reason] += 1
+        counters["events_out"] += 1
+        return {
+            "is_task_complete": False,
+            "require_user_input": False,
+            "is_delta": True,
+            "content": "".join(buffer),
+        }
@@ -0,0 +1,310 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+from agno.tools.youtube import YouTubeTools
+from loguru import logger
+
+try:
+    from youtube_transcript_api import YouTubeTranscriptApi
+except ImportError:
+    raise ImportError(
+        "`youtube_transcript_api` not installed. Please install using `pip install youtube_transcript_api`"
+    )
+
+YOUTUBE_HOSTS = {
+    "youtube.com",
+    "www.youtube.com",
+    "m.youtube.com",
+    "music.youtube.com",
+    "youtube-nocookie.com",
+    "www.youtube-nocookie.com",
+}
+VIDEO_ID_LENGTH = 11
+YOUTUBE_URL_PATTERN = re.compile(r"(?:https?://)?(?:[\w-]+\.)?(?:youtube\.com|youtube-nocookie\.com|youtu\.be)/\S+")
+
+
+def normalize_video_id(url: str) -> Optional[str]:
+    """Maps every supported YouTube URL form (or a bare ID) to its video ID."""
+    if not url:
+        return None
+    url = url.strip()
+    if len(url) == VIDEO_ID_LENGTH and "/" not in url and "." not in url:
+        return url
+    if "://" not in url:
+        url = f"https://{url}"
+
+    parsed_url = urlparse(url)
+    hostname = (parsed_url.hostname or "").lower()
+    path_parts = [part for part in parsed_url.path.split("/") if part]
+
+    video_id = None
+    if hostname == "youtu.be" and path_parts:
+        video_id = path_parts[0]
+    elif hostname in YOUTUBE_HOSTS:
+        if parsed_url.path == "/watch":
+            video_id = parse_qs(parsed_url.query).get("v", [None])[0]
+        elif len(path_parts) >= 2 and path_parts[0] in ("embed", "v", "shorts", "live", "e"):
+            video_id = path_parts[1]
+
+    if video_id and len(video_id) == VIDEO_ID_LENGTH:
+        return video_id
+    return None
+
+
+def find_video_id(text: str) -> Optional[str]:
+    """Returns the video ID of the first YouTube URL mentioned in free text."""
+    for match in YOUTUBE_URL_PATTERN.finditer(text or ""):
+        video_id = normalize_video_id(match.group(0).rstrip(".,;:!?)\"'"))
+        if video_id:
+            return video_id
+    return None
+
+
+class TranscriptCache:
+    """Two-tier cache for YouTube metadata and transcripts.
+
+    Hot entries live in an in-memory LRU; everything is also written to a
+    SQLite file so repeat analyses survive restarts. Both tiers are bounded
+    by size and entries expire after a per-kind TTL.
+    """
+
+    def __init__(
+        self,
+        db_file: str = "tmp/youtube_cache.db",
+        memory_max_entries: int = 256,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        disk_max_bytes: int = 512 * 1024 * 1024,
+        ttls: Optional[dict[str, float]] = None,
+    ):
+        self.db_file = db_file
+        self.memory_max_entries = memory_max_entries
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.ttls = {"data": 24 * 3600, "captions": 7 * 24 * 3600, **(ttls or {})}
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[Any, int, float]] = OrderedDict()
+        self._memory_bytes = 0
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        if os.path.dirname(db_file):
+            os.makedirs(os.path.dirname(db_file), exist_ok=True)
+        self._db = sqlite3.connect(db_file, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS youtube_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS youtube_cache_last_access ON youtube_cache (last_access)")
+        self._db.commit()
+
+    def get(self, kind: str, video_id: str) -> Optional[Any]:
+        key = f"{kind}:{video_id}"
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return value
+                self._drop_memory(key)
+
+            row = self._db.execute(
+                "SELECT value, expires_at FROM youtube_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            raw, expires_at = row
+            if expires_at <= now:
+                self._db.execute("DELETE FROM youtube_cache WHERE key = ?", (key,))
+                self._db.commit()
+                self.counters["misses"] += 1
+                return None
+
+            self._db.execute("UPDATE youtube_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            value = json.loads(raw)
+            self._put_memory(key, value, len(raw), expires_at)
+            self.counters["disk_hits"] += 1
+            return value
+
+    def set(self, kind: str, video_id: str, value: Any) -> None:
+        key = f"{kind}:{video_id}"
+        raw = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        expires_at = now + self.ttls.get(kind, self.ttls["data"])
+        with self._lock:
+            self._put_memory(key, value, len(raw), expires_at)
+            self._db.execute(
+                "INSERT OR REPLACE INTO youtube_cache (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, raw, len(raw), expires_at, now),
+            )
+            self._evict_disk()
+            self._db.commit()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            disk_entries, disk_bytes = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM youtube_cache"
+            ).fetchone()
+            return {
+                **self.counters,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": disk_entries,
+                "disk_bytes": disk_bytes,
+            }
+
+    def _put_memory(self, key: str, value: Any, size: int, expires_at: float) -> None:
+        self._drop_memory(key)
+        if size > self.memory_max_bytes:
+            return
+        self._memory[key] = (value, size, expires_at)
+        self._memory_bytes += size
+        while len(self._memory) > self.memory_max_entries or self._memory_bytes > self.memory_max_bytes:
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+            self.counters["memory_evictions"] += 1
+
+    def _drop_memory(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+
+    def _evict_disk(self) -> None:
+        self._db.execute("DELETE FROM youtube_cache WHERE expires_at <= ?", (time.time(),))
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM youtube_cache").fetchone()
+        if total <= self.disk_max_bytes:
+            return
+        for key, size in self._db.execute(
+            "SELECT key, size FROM youtube_cache ORDER BY last_access"
+        ).fetchall():
+            self._db.execute("DELETE FROM youtube_cache WHERE key = ?", (key,))
+            self.counters["disk_evictions"] += 1
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+
+
+class CachedYouTubeTools(YouTubeTools):
+    """YouTubeTools that serve metadata and captions from a TranscriptCache.
+
+    Every URL form is normalized to the video ID before lookup, so
+    `youtu.be/<id>` and `youtube.com/watch?v=<id>` share one entry.
+    Error responses are never cached.
+    """
+
+    def __init__(self, cache: TranscriptCache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def get_youtube_video_id(self, url: str) -> Optional[str]:
+        return normalize_video_id(url)
+
+    def get_transcript_segments(self, url: str) -> list[dict]:
+        """Returns the raw caption segments ({text, start, duration}) for a video."""
+        video_id = self.get_youtube_video_id(url)
+        if not video_id:
+            raise ValueError(f"Could not extract a YouTube video ID from: {url}")
+
+        segments = self.cache.get("captions", video_id)
+        if segments is None:
+            logger.info(f"Transcript cache miss for video {video_id}")
+            kwargs: dict = {}
+            if self.languages:
+                kwargs["languages"] = self.languages
+            if self.proxies:
+                kwargs["proxies"] = self.proxies
+            segments = [
+                {"text": line["text"], "start": line["start"], "duration": line.get("duration", 0.0)}
+                for line in YouTubeTranscriptApi.get_transcript(video_id, **kwargs)
+            ]
+            self.cache.set("captions", video_id, segments)
+        return segments
+
+    def get_youtube_video_data(self, url: str) -> str:
+        """Function to get video data from a YouTube URL.
+        Data returned includes {title, author_name, author_url, type, height, width, version, provider_name, provider_url, thumbnail_url}
+
+        Args:
+            url: The URL of the YouTube video.
+
+        Returns:
+            str: JSON data of the YouTube video.
+        """
+        video_id = self.get_youtube_video_id(url)
+        if not video_id:
+            return "Error getting video ID from URL, please provide a valid YouTube url"
+
+        cached = self.cache.get("data", video_id)
+        if cached is not None:
+            return cached
+
+        logger.info(f"Video data cache miss for video {video_id}")
+        video_data = super().get_youtube_video_data(f"https://www.youtube.com/watch?v={video_id}")
+        if not video_data.startswith("Error"):
+            self.cache.set("data", video_id, video_data)
+        return video_data
+
+    def get_youtube_video_captions(self, url: str) -> str:
+        """Use this function to get captions from a YouTube video.
+
+        Args:
+            url: The URL of the YouTube video.
+
+        Returns:
+            str: The captions of the YouTube video.
+        """
+        if not url:
+            return "No URL provided"
+        try:
+            segments = self.get_transcript_segments(url)
+        except Exception as e:
+            return f"Error getting captions for video: {e}"
+        if segments:
+            return " ".join(segment["text"] for segment in segments)
+        return "No captions found for video"
+
+    def get_video_timestamps(self, url: str) -> str:
+        """Generate timestamps for a YouTube video based on captions.
+
+        Args:
+            url: The URL of the YouTube video.
+
+        Returns:
+            str: Timestamps and summaries for the video.
+        """
+        if not url:
+            return "No URL provided"
+        try:
+            segments = self.get_transcript_segments(url)
+        except Exception as e:
+            return f"Error generating timestamps: {e}"
+        timestamps = []
+        for segment in segments:
+            minutes, seconds = divmod(int(segment["start"]), 60)
+            timestamps.append(f"{minutes}:{seconds:02d} - {segment['text']}")
+        return "\n".join(timestamps)
@@ -0,0 +1,104 @@
+"""Wall-clock time of a multi-stop routing query through the GeoPal graph.
+
+Replays the tool-call pattern of "plan a delivery round over these stops":
+the model first geocodes every stop in one turn, then asks for a TSP over
+the results, then answers. The model and the geo_pal tools are replaced by
+stubs with a fixed latency per call, so no API keys or network access are
+needed. Runs the graph once with the tool calls of a turn executed one at a
+time (`max_concurrency=1`, the old behaviour) and once in parallel.
+
+    uv run benchmark_parallel_tools.py --stops 5 --latency 0.3 --max-concurrency 4
+"""
+import asyncio
+import json
+import os
+import random
+import time
+
+import click
+
+os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+
+from langgraph_agent import build_graph
+
+STOPS = ["Berlin", "Potsdam", "Leipzig", "Dresden", "Magdeburg", "Rostock", "Hamburg", "Hanover", "Erfurt", "Kassel"]
+
+
+class RoutingPlanModel(BaseChatModel):
+    """Scripted model: geocode every stop, solve the TSP, then answer."""
+
+    stops: list[str]
+
+    @property
+    def _llm_type(self) -> str:
+        return "routing-plan"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        tool_turns = sum(1 for m in messages if isinstance(m, AIMessage) and m.tool_calls)
+        if tool_turns == 0:
+            message = AIMessage(content="", tool_calls=[
+                {"name": "geocode_address", "args": {"address": stop}, "id": f"geocode-{i}"}
+                for i, stop in enumerate(self.stops)
+            ])
+        elif tool_turns == 1:
+            locations = [json.loads(m.content)["coordinates"] for m in messages if isinstance(m, ToolMessage)]
+            message = AIMessage(content="", tool_calls=[
+                {"name": "optimize_traveling_salesman", "args": {"locations": locations}, "id": "tsp"}
+            ])
+        else:
+            message = AIMessage(content="Here is the optimized delivery round.")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _stub_tools(latency: float) -> list[StructuredTool]:
+    async def geocode_address(address: str) -> str:
+        """Converts an address to coordinates."""
+        # Jitter so calls finish out of order and result ordering is exercised
+        await asyncio.sleep(latency * random.uniform(0.8, 1.2))
+        return json.dumps({"address": address, "coordinates": [13.0 + len(address) / 10, 52.0]})
+
+    async def optimize_traveling_salesman(locations: list[list[float]]) -> str:
+        """Finds the shortest round trip over the locations."""
+        await asyncio.sleep(latency)
+        return json.dumps({"order": list(range(len(locations)))})
+
+    return [
+        StructuredTool.from_function(coroutine=geocode_address),
+        StructuredTool.from_function(coroutine=optimize_traveling_salesman),
+    ]
+
+
+async def _run(stops: list[str], latency: float, max_concurrency: int) -> tuple[float, list[str]]:
+    model = RoutingPlanModel(stops=stops)
+    graph = build_graph(model, {"geo_pal": _stub_tools(latency)}, max_concurrency=max_concurrency).compile()
+    started = time.perf_counter()
+    result = await graph.ainvoke({"messages": [HumanMessage(content="Plan a delivery round over these stops")]})
+    elapsed = time.perf_counter() - started
+    order = [m.tool_call_id for m in result["messages"] if isinstance(m, ToolMessage)]
+    return elapsed, order
+
+
+@click.command()
+@click.option('--stops', 'stops', default=5)
+@click.option('--latency', 'latency', default=0.3)
+@click.option('--max-concurrency', 'max_concurrency', default=4)
+def main(stops, latency, max_concurrency):
+    """Benchmarks sequential vs. parallel tool execution for a multi-stop query."""
+    names = STOPS[:stops]
+    expected = [f"geocode-{i}" for i in range(len(names))] + ["tsp"]
+    for mode, cap in (("sequential", 1), ("parallel", max_concurrency)):
+        elapsed, order = asyncio.run(_run(names, latency, cap))
+        assert order == expected, f"tool results out of order: {order}"
+        print(f"{mode:>10} (max {cap} per server): {elapsed:.2f}s for {len(names)} geocodes + 1 TSP")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Cost of push notifications to the task, inline vs. through the dispatcher.
+
+Runs `--tasks` concurrent fake tasks that each emit `--updates` status
+updates, `--step` seconds apart, to a local webhook that answers after
+`--latency` seconds. With the SDK's `InMemoryPushNotifier` every update is
+an inline POST, so the task waits on the webhook; with the queued notifier
+the task only waits for the snapshot to be queued, and superseded updates
+of a task are coalesced before they are sent. No API keys are needed.
+
+    uv run benchmark_push.py --tasks 20 --updates 10 --step 0.05 --latency 0.2
+"""
+import asyncio
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import click
+import httpx
+import uvicorn
+from a2a.server.tasks import InMemoryPushNotifier
+from a2a.types import PushNotificationConfig, Task, TaskState, TaskStatus
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+# The push notification modules are shared with the other agents in ../a2a_shared
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from a2a_shared.push_dispatcher import PushDispatcher
+from a2a_shared.push_notifier import QueuedInMemoryPushNotifier
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _webhook(latency: float, received: list[str]) -> Starlette:
+    async def notify(request: Request) -> Response:
+        task = await request.json()
+        await asyncio.sleep(latency)
+        received.append(task["status"]["state"])
+        return Response(status_code=200)
+
+    return Starlette(routes=[Route("/notify", notify, methods=["POST"])])
+
+
+async def _task(notifier, task_id: str, updates: int, step: float, blocked: list[float]) -> float:
+    started = time.perf_counter()
+    for i in range(updates):
+        state = TaskState.completed if i == updates - 1 else TaskState.working
+        task = Task(id=task_id, contextId=task_id, status=TaskStatus(state=state))
+        before = time.perf_counter()
+        await notifier.send_notification(task)
+        blocked.append(time.perf_counter() - before)
+        await asyncio.sleep(step)  # The agent's own work between updates
+    return time.perf_counter() - started
+
+
+async def _run(mode: str, tasks: int, updates: int, step: float, latency: float) -> None:
+    received: list[str] = []
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(_webhook(latency, received), port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    if mode == "inline":
+        client = httpx.AsyncClient()
+        notifier = InMemoryPushNotifier(client)
+    else:
+        dispatcher = PushDispatcher(dead_letter_file=None)
+        notifier = QueuedInMemoryPushNotifier(dispatcher)
+    config = PushNotificationConfig(url=f"http://127.0.0.1:{port}/notify")
+    for i in range(tasks):
+        await notifier.set_info(f"task-{i}", config)
+
+    blocked: list[float] = []
+    started = time.perf_counter()
+    durations = await asyncio.gather(*(_task(notifier, f"task-{i}", updates, step, blocked) for i in range(tasks)))
+    finished = time.perf_counter() - started
+    if mode == "inline":
+        await client.aclose()
+    else:
+        await dispatcher.aclose(timeout=60)  # Waits for the senders to finish
+    drained = time.perf_counter() - started
+    server.should_exit = True
+    await serving
+
+    durations = sorted(durations)
+    print(
+        f"{mode:>7}: task p50 {statistics.median(durations):.2f}s, "
+        f"{sum(blocked) / len(blocked) * 1000:.2f} ms blocked per update, "
+        f"all tasks done {finished:.2f}s, webhook drained {drained:.2f}s, "
+        f"{len(received)} POSTs for {tasks * updates} updates, "
+        f"{received.count('completed')}/{tasks} final states delivered"
+    )
+
+
+@click.command()
+@click.option('--tasks', 'tasks', default=20)
+@click.option('--updates', 'updates', default=10, help='Status updates per task')
+@click.option('--step', 'step', default=0.05, help='Seconds of agent work between updates')
+@click.option('--latency', 'latency', default=0.2, help='Webhook response time, seconds')
+def main(tasks, updates, step, latency):
+    """Benchmarks inline vs. queued push notification delivery."""
+    for mode in ("inline", "queued"):
+        asyncio.run(_run(mode, tasks, updates, step, latency))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Per-notification cost of signing push notifications.
+
+Times the pieces of a signed notification for a task carrying an artifact
+of `--artifact-kb`: serializing the body, hashing it, and the RS256
+signature with the key object `PushSigner` caches versus loading the PEM for
+every signature. Then sends `--notifications` notifications through a
+`PushDispatcher` to a local webhook, unsigned and signed, and reports the
+throughput of each. No API keys are needed.
+
+    uv run benchmark_push_signing.py --notifications 500 --artifact-kb 16
+"""
+import asyncio
+import hashlib
+import json
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+import jwt
+import uvicorn
+from a2a.types import Artifact, PushNotificationConfig, Task, TaskState, TaskStatus, TextPart
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+# The push notification modules are shared with the other agents in ../a2a_shared
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from a2a_shared.push_dispatcher import PushDispatcher
+from a2a_shared.push_signing import PushSigner
+
+
+def _task(i: int, artifact_kb: int) -> Task:
+    text = "lorem ipsum " * (artifact_kb * 1024 // 12)
+    return Task(
+        id=f"task-{i}",
+        contextId="benchmark",
+        status=TaskStatus(state=TaskState.completed),
+        artifacts=[Artifact(artifactId="result", parts=[TextPart(text=text)])],
+    )
+
+
+def _per_call(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _send(notifications: int, artifact_kb: int, signer) -> float:
+    received = 0
+
+    async def notify(request: Request) -> Response:
+        nonlocal received
+        await request.body()
+        received += 1
+        return Response(status_code=200)
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        Starlette(routes=[Route("/notify", notify, methods=["POST"])]), port=port, log_level="warning"
+    ))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    dispatcher = PushDispatcher(queue_size=notifications, dead_letter_file=None, signer=signer)
+    config = PushNotificationConfig(url=f"http://127.0.0.1:{port}/notify")
+    tasks = [_task(i, artifact_kb) for i in range(notifications)]
+    started = time.perf_counter()
+    for task in tasks:
+        dispatcher.submit(config, task)
+    await dispatcher.aclose(timeout=600)
+    elapsed = time.perf_counter() - started
+    server.should_exit = True
+    await serving
+    assert received == notifications, f"{received}/{notifications} delivered"
+    return elapsed
+
+
+@click.command()
+@click.option('--notifications', 'notifications', default=500)
+@click.option('--artifact-kb', 'artifact_kb', default=16, help='Size of the task artifact in KiB')
+@click.option('--repeat', 'repeat', default=200, help='Repetitions of each micro-benchmark')
+def main(notifications, artifact_kb, repeat):
+    """Benchmarks push notification signing overhead."""
+    task = _task(0, artifact_kb)
+    with tempfile.TemporaryDirectory() as keys_dir:
+        signer = PushSigner(keys_dir=keys_dir)
+        pem = next(signer.keys_dir.glob("*.pem")).read_bytes()
+        body = json.dumps(task.model_dump(mode="json", exclude_none=True), ensure_ascii=False, separators=(",", ":")).encode()
+        digest = hashlib.sha256(body).hexdigest()
+        claims = {"iat": int(time.time()), "request_body_sha256": digest}
+
+        print(f"Task body {len(body) / 1024:.1f} KiB, {signer.key_size}-bit RSA key")
+        print(f"  serialize body          {_per_call(lambda: json.dumps(task.model_dump(mode='json', exclude_none=True), ensure_ascii=False, separators=(',', ':')), repeat):7.3f} ms")
+        print(f"  sha256 of body          {_per_call(lambda: hashlib.sha256(body).hexdigest(), repeat):7.3f} ms")
+        print(f"  sign, cached key        {_per_call(lambda: signer.sign(digest), repeat):7.3f} ms")
+        print(f"  sign, PEM loaded each   {_per_call(lambda: jwt.encode(claims, pem, algorithm='RS256'), max(repeat // 10, 1)):7.3f} ms")
+
+        unsigned = asyncio.run(_send(notifications, artifact_kb, None))
+        signed = asyncio.run(_send(notifications, artifact_kb, signer))
+        signer.close()
+    print(f"{notifications} notifications to a local webhook:")
+    print(f"  unsigned {notifications / unsigned:7.0f}/s")
+    print(f"  signed   {notifications / signed:7.0f}/s ({(signed - unsigned) / notifications * 1000:+.3f} ms per notification)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,377 @@
+import asyncio
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.utils import search_where
+from loguru import logger
+
+BLOB_MARKER = "\x00blob:"
+BLOB_REF = re.compile(rb"\x00blob:([0-9a-f]{64})")
+
+
+class BlobStore:
+    """Content-addressed files under `root`, written once and shared by every checkpoint.
+
+    A blob's mtime is its last use: storing it again touches the file, so
+    `collect` only deletes blobs no checkpoint has written for its grace period.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Orders a put against collect's age check and unlink of the same file
+        self._lock = threading.Lock()
+
+    def put(self, data: str) -> str:
+        raw = data.encode()
+        digest = hashlib.sha256(raw).hexdigest()
+        if not self.touch(digest):
+            path = self._path(digest)
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(raw)
+            with self._lock:
+                os.replace(tmp, path)
+        return digest
+
+    def touch(self, digest: str) -> bool:
+        """Marks a stored blob as just used; False if it is not there (any more)."""
+        with self._lock:
+            try:
+                os.utime(self._path(digest))
+            except FileNotFoundError:
+                return False
+        return True
+
+    def get(self, digest: str) -> str:
+        return self._path(digest).read_text()
+
+    def collect(self, live: set[str], grace_seconds: float) -> int:
+        """Deletes blobs not in `live` that are older than `grace_seconds`; returns how many."""
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        for path in self.root.glob("*/*"):
+            if path.name in live:
+                continue
+            with self._lock:
+                try:
+                    if path.stat().st_mtime >= cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+
+class BlobOffloadingSerializer:
+    """Serializer that moves strings over `threshold` bytes into a BlobStore.
+
+    Large tool outputs (route and isochrone GeoJSON) sit in the message
+    history that every checkpoint repeats; stored by content hash they are
+    written once and each checkpoint only carries a short reference.
+    """
+
+    def __init__(self, blobs: BlobStore, threshold: int = 4096, inner: Optional[SerializerProtocol] = None):
+        self.blobs = blobs
+        self.threshold = threshold
+        self.inner = inner or JsonPlusSerializer()
+        # The same history strings come back with every checkpoint of a
+        # thread; dict lookup on an identical str object skips re-hashing it.
+        # A hit still touches the blob, which `collect` may have deleted since
+        self._digests: OrderedDict[str, str] = OrderedDict()
+        self._digests_lock = threading.Lock()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.inner.dumps(self._offload(obj))
+
+    def loads(self, data: bytes) -> Any:
+        return self._restore(self.inner.loads(data))
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        return self.inner.dumps_typed(self._offload(obj))
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        return self._restore(self.inner.loads_typed(data))
+
+    def _offload(self, obj: Any) -> Any:
+        return self._map(obj, lambda s: BLOB_MARKER + self._digest(s) if len(s) > self.threshold else s)
+
+    def _digest(self, data: str) -> str:
+        with self._digests_lock:
+            digest = self._digests.get(data)
+            if digest is not None:
+                self._digests.move_to_end(data)
+        if digest is not None and self.blobs.touch(digest):
+            return digest
+        digest = self.blobs.put(data)
+        with self._digests_lock:
+            self._digests[data] = digest
+            while len(self._digests) > 256:
+                self._digests.popitem(last=False)
+        return digest
+
+    def _restore(self, obj: Any) -> Any:
+        return self._map(obj, lambda s: self.blobs.get(s[len(BLOB_MARKER):]) if s.startswith(BLOB_MARKER) else s)
+
+    def _map(self, obj: Any, convert) -> Any:
+        # Rebuilds containers instead of mutating them: the values belong to the live graph state
+        if isinstance(obj, str):
+            return convert(obj)
+        if isinstance(obj, BaseMessage):
+            content = self._map(obj.content, convert)
+            return obj if content is obj.content else obj.model_copy(update={"content": content})
+        if isinstance(obj, dict):
+            return {k: self._map(v, convert) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self._map(v, convert) for v in obj]
+        if isinstance(obj, tuple):
+            return tuple(self._map(v, convert) for v in obj)
+        return obj
+
+
+def _connect(path: str, auto_vacuum: bool = False) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    if auto_vacuum:
+        # Only takes effect on a new file, and must precede the switch to WAL
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+class DurableSqliteSaver(SqliteSaver):
+    """File-backed, pruned LangGraph checkpointer.
+
+    Writes go through a single connection under a lock (SQLite allows one
+    writer); reads check out one of `read_connections` pooled connections,
+    so concurrent threads load their state in parallel under WAL. The async
+    methods run the sync ones in worker threads.
+
+    A background compaction thread keeps the last `keep_last` checkpoints of
+    every thread that was written to, deletes blobs nothing refers to any
+    more and truncates the WAL.
+    """
+
+    def __init__(
+        self,
+        db_file: str = "tmp/checkpoints.db",
+        blob_dir: str = "tmp/checkpoint_blobs",
+        keep_last: int = 10,
+        read_connections: int = 4,
+        blob_threshold: int = 4096,
+        compact_interval: float = 60,
+        blob_grace_seconds: float = 3600,
+    ):
+        path = Path(db_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db_file = str(path)
+        self.keep_last = keep_last
+        self.compact_interval = compact_interval
+        self.blob_grace_seconds = blob_grace_seconds
+        self.blobs = BlobStore(blob_dir)
+
+        writer = _connect(self.db_file, auto_vacuum=True)
+        super().__init__(writer, serde=BlobOffloadingSerializer(self.blobs, threshold=blob_threshold))
+        self.setup()
+
+        self._readers: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for _ in range(read_connections):
+            self._readers.put(_connect(self.db_file))
+
+        self._dirty: set[tuple[str, str]] = set()
+        self._dirty_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.counters = {"compactions": 0, "pruned_checkpoints": 0, "pruned_writes": 0, "removed_blobs": 0}
+        self._compactor = threading.Thread(target=self._compact_loop, name="checkpoint-compactor", daemon=True)
+        self._compactor.start()
+
+    def __enter__(self) -> "DurableSqliteSaver":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @contextmanager
+    def cursor(self, transaction: bool = True) -> Iterator[sqlite3.Cursor]:
+        if transaction:
+            with super().cursor(transaction=True) as cur:
+                yield cur
+            return
+        with self._reader() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # Same as SqliteSaver.list, but both cursors come from one pooled reader
+        where, params = search_where(config, filter, before)
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata "
+            f"FROM checkpoints {where} ORDER BY checkpoint_id DESC"
+        )
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._reader() as conn:
+            rows = conn.execute(query, params).fetchall()
+            for thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata in rows:
+                writes = conn.execute(
+                    "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "AND checkpoint_id = ? ORDER BY task_id, idx",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchall()
+                yield CheckpointTuple(
+                    {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+                    self.serde.loads_typed((type_, checkpoint)),
+                    self.jsonplus_serde.loads(metadata) if metadata is not None else {},
+                    (
+                        {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                        if parent_id
+                        else None
+                    ),
+                    [(task_id, channel, self.serde.loads_typed((t, v))) for task_id, channel, t, v in writes],
+                )
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        with self._dirty_lock:
+            self._dirty.add((str(config["configurable"]["thread_id"]), config["configurable"].get("checkpoint_ns", "")))
+        return saved
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def compact(self) -> None:
+        """Prunes threads written since the last run, drops orphaned blobs and truncates the WAL."""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        pruned_checkpoints = pruned_writes = 0
+        with self.cursor() as cur:
+            for thread_id, checkpoint_ns in dirty:
+                keep = (
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT ?"
+                )
+                args = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_last)
+                cur.execute(
+                    f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({keep})", args
+                )
+                pruned_writes += cur.rowcount
+                cur.execute(
+                    f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({keep})", args
+                )
+                pruned_checkpoints += cur.rowcount
+
+        live: set[str] = set()
+        with self._reader() as conn:
+            for (value,) in conn.execute("SELECT checkpoint FROM checkpoints UNION ALL SELECT value FROM writes"):
+                if value:
+                    live.update(match.decode() for match in BLOB_REF.findall(value))
+        removed_blobs = self.blobs.collect(live, self.blob_grace_seconds)
+
+        with self.lock:
+            self.conn.execute("PRAGMA incremental_vacuum").fetchall()
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+        self.counters["compactions"] += 1
+        self.counters["pruned_checkpoints"] += pruned_checkpoints
+        self.counters["pruned_writes"] += pruned_writes
+        self.counters["removed_blobs"] += removed_blobs
+        if pruned_checkpoints or removed_blobs:
+            logger.debug(
+                f"Compacted checkpoints: pruned {pruned_checkpoints} checkpoints in {len(dirty)} threads, "
+                f"removed {removed_blobs} blobs"
+            )
+
+    def close(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._compactor.join(timeout=5)
+        self.compact()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        self.conn.close()
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _compact_loop(self) -> None:
+        while not self._stop.wait(self.compact_interval):
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Checkpoint compaction failed: {e}")
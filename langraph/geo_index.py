@@ -0,0 +1,430 @@
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, Mapping, Optional
+
+from loguru import logger
+
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE = 111_320
+
+TEXT_KEYS = ("address", "query", "text", "location", "place", "name", "search")
+RADIUS_KEYS = ("buffer", "radius", "distance", "range")
+POINT_KEYS = ("lon", "lng", "longitude", "lat", "latitude")
+
+
+def normalize_place(text: str) -> str:
+    """Case-, accent-, punctuation- and word-order-insensitive form of a place name."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    return " ".join(sorted(tokens))
+
+
+def haversine_m(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _is_point(value: Any) -> bool:
+    return (
+        isinstance(value, (list, tuple))
+        and len(value) == 2
+        and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)
+        and -180 <= value[0] <= 180
+        and -90 <= value[1] <= 90
+    )
+
+
+def find_point(args: Mapping[str, Any]) -> Optional[tuple[float, float]]:
+    """(lon, lat) from tool arguments: lon/lat keys, a [lon, lat] pair or [[lon, lat]]."""
+    lon = next((args[k] for k in ("lon", "lng", "longitude") if isinstance(args.get(k), (int, float))), None)
+    lat = next((args[k] for k in ("lat", "latitude") if isinstance(args.get(k), (int, float))), None)
+    if lon is not None and lat is not None:
+        return float(lon), float(lat)
+    for value in args.values():
+        if _is_point(value):
+            return float(value[0]), float(value[1])
+        if isinstance(value, (list, tuple)) and len(value) == 1 and _is_point(value[0]):
+            return float(value[0][0]), float(value[0][1])
+    return None
+
+
+def find_radius(args: Mapping[str, Any]) -> Optional[float]:
+    for key in RADIUS_KEYS:
+        value = args.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    return None
+
+
+def _text_key(args: Mapping[str, Any]) -> Optional[str]:
+    for key in TEXT_KEYS:
+        if isinstance(args.get(key), str) and args[key].strip():
+            return key
+    keys = [k for k, v in args.items() if isinstance(v, str) and v.strip()]
+    return keys[0] if len(keys) == 1 else None
+
+
+def find_text(args: Mapping[str, Any]) -> Optional[str]:
+    key = _text_key(args)
+    return args[key] if key else None
+
+
+def _point_keys(args: Mapping[str, Any]) -> set[str]:
+    """Argument names that carry the point `find_point` reads."""
+    return {
+        k for k, v in args.items()
+        if k in POINT_KEYS or _is_point(v) or (isinstance(v, (list, tuple)) and len(v) == 1 and _is_point(v[0]))
+    }
+
+
+def _features(payload: Any) -> list[dict]:
+    if isinstance(payload, Mapping):
+        if isinstance(payload.get("features"), list):
+            return [f for f in payload["features"] if isinstance(f, Mapping)]
+        if payload.get("type") == "Feature":
+            return [payload]
+    if isinstance(payload, list):
+        return [f for f in payload if isinstance(f, Mapping) and f.get("type") == "Feature"]
+    return []
+
+
+def _feature_point(feature: Mapping[str, Any]) -> Optional[tuple[float, float]]:
+    coordinates = (feature.get("geometry") or {}).get("coordinates")
+    return (float(coordinates[0]), float(coordinates[1])) if _is_point(coordinates) else None
+
+
+def _feature_name(feature: Mapping[str, Any]) -> Optional[str]:
+    properties = feature.get("properties") or {}
+    tags = properties.get("osm_tags") or {}
+    return properties.get("label") or properties.get("name") or tags.get("name")
+
+
+def _parse_geocode(content: Any) -> Optional[tuple[str, float, float]]:
+    """Best match from a geocoding result: GeoJSON features or a flat lon/lat object."""
+    try:
+        payload = json.loads(content) if isinstance(content, str) else content
+    except ValueError:
+        return None
+    features = _features(payload)
+    if features:
+        point = _feature_point(features[0])
+        return (_feature_name(features[0]) or "", *point) if point else None
+    if isinstance(payload, Mapping):
+        point = find_point(payload)
+        if point:
+            return str(payload.get("label") or payload.get("name") or ""), *point
+    return None
+
+
+@dataclass
+class Place:
+    key: str
+    params: str
+    name: str
+    lon: float
+    lat: float
+    content: str
+
+
+@dataclass
+class PoiArea:
+    params: str
+    lon: float
+    lat: float
+    radius: float
+    features: list[dict]
+    complete: bool
+
+
+class GeoIndex:
+    """Local index of places and POI searches resolved by earlier geo_pal tool calls.
+
+    Every entry is keyed by the tool and its other arguments (country and
+    boundary filters, result size, layers...) besides the text, point or
+    circle, so it only answers calls made with the same options. Forward
+    geocoding is answered by normalized name; reverse geocoding by the
+    nearest earlier reverse lookup within `reverse_radius_m`, found through
+    a grid of `cell_degrees` cells. Both return the stored tool result as
+    it was. A POI search is answered when an earlier, complete search with
+    the same filters covered a circle that contains the new one. Everything is bounded (LRU) and written through to SQLite,
+    and the most recent entries are loaded back on start.
+    """
+
+    def __init__(
+        self,
+        db_file: str = "tmp/geo_index.db",
+        max_places: int = 10_000,
+        max_poi_areas: int = 500,
+        cell_degrees: float = 0.01,
+        reverse_radius_m: float = 50,
+    ):
+        self.max_places = max_places
+        self.max_poi_areas = max_poi_areas
+        self.cell_degrees = cell_degrees
+        self.reverse_radius_m = reverse_radius_m
+
+        self._lock = threading.RLock()
+        self._places: OrderedDict[str, Place] = OrderedDict()
+        self._grid: defaultdict[tuple[int, int], set[str]] = defaultdict(set)
+        self._areas: OrderedDict[int, PoiArea] = OrderedDict()
+        self.counters = {"geocode_hits": 0, "reverse_hits": 0, "poi_hits": 0, "misses": 0, "learned": 0}
+
+        path = Path(db_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(places)")]
+        if columns and "params" not in columns:
+            # Entries from before the tool arguments were part of the key can't tell their options apart
+            logger.info("Dropping geocode index places stored without their tool arguments")
+            self._conn.execute("DROP TABLE places")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS places (key TEXT PRIMARY KEY, params TEXT, name TEXT, lon REAL, lat REAL, "
+            "content TEXT, updated_at REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS poi_areas (id INTEGER PRIMARY KEY, params TEXT, lon REAL, lat REAL, "
+            "radius REAL, features TEXT, complete INTEGER, updated_at REAL)"
+        )
+        self._conn.commit()
+        self._load()
+
+    # Tool integration
+
+    def answer(self, tool_name: str, args: Mapping[str, Any]) -> Optional[str]:
+        """Tool result served from the index, or None if the call has to go out."""
+        kind = self._kind(tool_name)
+        if kind is None:
+            return None
+        result, counter = None, "misses"
+        if kind == "geocode":
+            text = find_text(args)
+            place = self.lookup(text, self._geocode_params(tool_name, args)) if text else None
+            if place is not None:
+                result, counter = place.content, "geocode_hits"
+        elif kind == "reverse":
+            point = find_point(args)
+            place = self.nearest(*point, self._reverse_params(tool_name, args)) if point else None
+            if place is not None:
+                result, counter = place.content, "reverse_hits"
+        elif kind == "poi":
+            point, radius = find_point(args), find_radius(args)
+            if point and radius is not None:
+                features = self.pois_within(self._poi_params(tool_name, args), *point, radius)
+                if features is not None:
+                    result, counter = json.dumps({"type": "FeatureCollection", "features": features}), "poi_hits"
+        with self._lock:
+            self.counters[counter] += 1
+        return result
+
+    def learn(self, tool_name: str, args: Mapping[str, Any], content: Any) -> None:
+        """Indexes a successful tool result; unrecognized shapes are ignored."""
+        kind = self._kind(tool_name)
+        if kind == "geocode":
+            text = find_text(args)
+            parsed = _parse_geocode(content)
+            if text and parsed:
+                name, lon, lat = parsed
+                self.add_place(
+                    self._geocode_params(tool_name, args), text, name or text, lon, lat,
+                    content if isinstance(content, str) else json.dumps(content),
+                )
+        elif kind == "reverse":
+            point = find_point(args)
+            parsed = _parse_geocode(content)
+            if point and parsed:
+                # Filed under the point that was asked about, which is what later calls are compared to
+                self.add_reverse(
+                    self._reverse_params(tool_name, args), parsed[0], *point,
+                    content if isinstance(content, str) else json.dumps(content),
+                )
+        elif kind == "poi":
+            point, radius = find_point(args), find_radius(args)
+            try:
+                payload = json.loads(content) if isinstance(content, str) else content
+            except ValueError:
+                return
+            features = _features(payload)
+            searched = features or (isinstance(payload, Mapping) and payload.get("features") == [])
+            if point and radius is not None and searched:
+                limit = args.get("limit")
+                complete = not isinstance(limit, int) or len(features) < limit
+                self.add_poi_area(self._poi_params(tool_name, args), *point, radius, features, complete)
+
+    # Lookups
+
+    def lookup(self, text: str, params: str) -> Optional[Place]:
+        with self._lock:
+            place = self._places.get(self._place_key(params, normalize_place(text)))
+            if place is not None:
+                self._places.move_to_end(place.key)
+            return place
+
+    def nearby(
+        self, lon: float, lat: float, radius_m: float, params: Optional[str] = None
+    ) -> Iterator[tuple[float, Place]]:
+        """Known places within `radius_m`, closest first; only those stored under `params` if given."""
+        with self._lock:
+            found = []
+            for cell in self._cells_around(lon, lat, radius_m):
+                for key in self._grid.get(cell, ()):
+                    place = self._places[key]
+                    if params is not None and place.params != params:
+                        continue
+                    distance = haversine_m(lon, lat, place.lon, place.lat)
+                    if distance <= radius_m:
+                        found.append((distance, place))
+        return iter(sorted(found, key=lambda item: item[0]))
+
+    def nearest(
+        self, lon: float, lat: float, params: Optional[str] = None, max_distance_m: Optional[float] = None
+    ) -> Optional[Place]:
+        return next(
+            (place for _, place in self.nearby(lon, lat, max_distance_m or self.reverse_radius_m, params)), None
+        )
+
+    def pois_within(self, params: str, lon: float, lat: float, radius_m: float) -> Optional[list[dict]]:
+        """POIs inside the circle, if an earlier complete search covered all of it."""
+        with self._lock:
+            for area_id, area in reversed(self._areas.items()):
+                if area.params != params or not area.complete:
+                    continue
+                if haversine_m(lon, lat, area.lon, area.lat) + radius_m > area.radius:
+                    continue
+                self._areas.move_to_end(area_id)
+                return [
+                    feature for feature in area.features
+                    if (point := _feature_point(feature)) and haversine_m(lon, lat, *point) <= radius_m
+                ]
+        return None
+
+    # Updates
+
+    def add_place(self, params: str, text: str, name: str, lon: float, lat: float, content: str) -> None:
+        self._store_place(Place(self._place_key(params, normalize_place(text)), params, name, lon, lat, content))
+
+    def add_reverse(self, params: str, name: str, lon: float, lat: float, content: str) -> None:
+        self._store_place(Place(self._place_key(params, f"@{lon:.6f},{lat:.6f}"), params, name, lon, lat, content))
+
+    def _store_place(self, place: Place) -> None:
+        with self._lock:
+            self._insert_place(place)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (place.key, place.params, place.name, place.lon, place.lat, place.content, time.time()),
+            )
+            evicted = self._evict_places()
+            self._conn.executemany("DELETE FROM places WHERE key = ?", [(k,) for k in evicted])
+            self._conn.commit()
+            self.counters["learned"] += 1
+
+    def add_poi_area(self, params: str, lon: float, lat: float, radius: float, features: list[dict], complete: bool) -> None:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO poi_areas (params, lon, lat, radius, features, complete, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (params, lon, lat, radius, json.dumps(features), int(complete), time.time()),
+            )
+            self._areas[cursor.lastrowid] = PoiArea(params, lon, lat, radius, features, complete)
+            evicted = []
+            while len(self._areas) > self.max_poi_areas:
+                evicted.append(self._areas.popitem(last=False)[0])
+            self._conn.executemany("DELETE FROM poi_areas WHERE id = ?", [(i,) for i in evicted])
+            self._conn.commit()
+            self.counters["learned"] += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self.counters, "places": len(self._places), "poi_areas": len(self._areas)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Internals
+
+    @staticmethod
+    def _kind(tool_name: str) -> Optional[str]:
+        name = tool_name.lower()
+        if "reverse" in name:
+            return "reverse"
+        if "geocode" in name:
+            return "geocode"
+        if "poi" in name:
+            return "poi"
+        return None
+
+    @staticmethod
+    def _params(tool_name: str, args: Mapping[str, Any], exclude: set[str]) -> str:
+        """The tool and its arguments other than `exclude`, in one canonical form."""
+        rest = {k: v for k, v in args.items() if k not in exclude and v is not None}
+        return json.dumps([tool_name, rest], sort_keys=True, default=str)
+
+    def _geocode_params(self, tool_name: str, args: Mapping[str, Any]) -> str:
+        return self._params(tool_name, args, {_text_key(args)})
+
+    def _reverse_params(self, tool_name: str, args: Mapping[str, Any]) -> str:
+        return self._params(tool_name, args, _point_keys(args))
+
+    def _poi_params(self, tool_name: str, args: Mapping[str, Any]) -> str:
+        # Everything but the circle itself must match for a search to be reused
+        return self._params(tool_name, args, {*RADIUS_KEYS, "limit", *_point_keys(args)})
+
+    @staticmethod
+    def _place_key(params: str, name: str) -> str:
+        return json.dumps([params, name])
+
+    def _cell(self, lon: float, lat: float) -> tuple[int, int]:
+        return math.floor(lon / self.cell_degrees), math.floor(lat / self.cell_degrees)
+
+    def _cells_around(self, lon: float, lat: float, radius_m: float) -> Iterator[tuple[int, int]]:
+        dlat = radius_m / METERS_PER_DEGREE
+        dlon = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        x0, y0 = self._cell(lon - dlon, lat - dlat)
+        x1, y1 = self._cell(lon + dlon, lat + dlat)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield x, y
+
+    def _insert_place(self, place: Place) -> None:
+        previous = self._places.pop(place.key, None)
+        if previous is not None:
+            self._grid[self._cell(previous.lon, previous.lat)].discard(previous.key)
+        self._places[place.key] = place
+        self._grid[self._cell(place.lon, place.lat)].add(place.key)
+
+    def _evict_places(self) -> list[str]:
+        evicted = []
+        while len(self._places) > self.max_places:
+            key, place = self._places.popitem(last=False)
+            cell = self._cell(place.lon, place.lat)
+            self._grid[cell].discard(key)
+            if not self._grid[cell]:
+                del self._grid[cell]
+            evicted.append(key)
+        return evicted
+
+    def _load(self) -> None:
+        rows = self._conn.execute(
+            "SELECT key, params, name, lon, lat, content FROM places ORDER BY updated_at DESC LIMIT ?", (self.max_places,)
+        ).fetchall()
+        for row in reversed(rows):
+            self._insert_place(Place(*row))
+        rows = self._conn.execute(
+            "SELECT id, params, lon, lat, radius, features, complete FROM poi_areas ORDER BY id DESC LIMIT ?",
+            (self.max_poi_areas,),
+        ).fetchall()
+        for area_id, params, lon, lat, radius, features, complete in reversed(rows):
+            self._areas[area_id] = PoiArea(params, lon, lat, radius, json.loads(features), bool(complete))
+        if self._places or self._areas:
+            logger.info(f"Loaded {len(self._places)} places and {len(self._areas)} POI searches into the geocode index")
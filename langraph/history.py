@@ -0,0 +1,95 @@
+from typing import Callable, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.graph.message import Messages, add_messages
+
+SUMMARY_ID = "conversation-summary"
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+
+def _turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+    """Splits the history at every user message; anything before the first one is its own turn."""
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else message.text()
+
+
+def _summarize_turn(turn: list[BaseMessage], line_chars: int) -> Optional[str]:
+    question = next((m for m in turn if isinstance(m, HumanMessage)), None)
+    answers = [m for m in turn if isinstance(m, AIMessage) and not m.tool_calls and _text(m)]
+    tools = sorted({m.name for m in turn if isinstance(m, ToolMessage) and m.name})
+    if question is None:
+        return None
+    line = f"- User asked: {_clip(_text(question), line_chars)}"
+    if tools:
+        line += f" (tools used: {', '.join(tools)})"
+    if answers:
+        line += f" / Answer: {_clip(_text(answers[-1]), line_chars)}"
+    return line
+
+
+def _collapse_tool_output(message: ToolMessage) -> ToolMessage:
+    if _text(message).startswith("[Output of "):
+        return message
+    return message.model_copy(update={
+        "content": f"[Output of {message.name or 'tool'} from an earlier turn omitted ({len(_text(message))} chars)]"
+    })
+
+
+def windowed_messages(
+    max_tokens: int = 6000,
+    keep_tool_outputs: int = 2,
+    summary_lines: int = 20,
+    line_chars: int = 160,
+) -> Callable[[Messages, Messages], list[BaseMessage]]:
+    """`add_messages` replacement that keeps the history under a token budget.
+
+    After merging the update like `add_messages`, tool outputs older than the
+    last `keep_tool_outputs` turns are collapsed to a one-line stub, then the
+    oldest turns are dropped until the history fits in `max_tokens`
+    (approximate). Dropped turns are folded into a running summary message at
+    the top. The turn in progress, from the latest user message on, is never
+    touched, so pending tool calls always stay paired with their results.
+    """
+
+    def reducer(left: Messages, right: Messages) -> list[BaseMessage]:
+        merged = add_messages(left, right)
+        summary = next((m for m in merged if m.id == SUMMARY_ID), None)
+        turns = _turns([m for m in merged if m.id != SUMMARY_ID])
+
+        for turn in turns[:-max(keep_tool_outputs, 1)]:
+            for i, message in enumerate(turn):
+                if isinstance(message, ToolMessage):
+                    turn[i] = _collapse_tool_output(message)
+
+        summary_text = _text(summary).split("\n")[1:] if summary is not None else []
+        while len(turns) > 1 and count_tokens_approximately(_flatten(summary_text, turns)) > max_tokens:
+            line = _summarize_turn(turns.pop(0), line_chars)
+            if line:
+                summary_text.append(line)
+        summary_text = summary_text[-summary_lines:]
+
+        return _flatten(summary_text, turns)
+
+    return reducer
+
+
+def _flatten(summary_lines: Sequence[str], turns: list[list[BaseMessage]]) -> list[BaseMessage]:
+    messages = [m for turn in turns for m in turn]
+    if summary_lines:
+        content = "\n".join([SUMMARY_HEADER, *summary_lines])
+        messages.insert(0, SystemMessage(content=content, id=SUMMARY_ID))
+    return messages
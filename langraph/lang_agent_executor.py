@@ -1,12 +1,15 @@
 import logging
+from uuid import uuid4
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import Event, EventQueue
 from a2a.server.tasks import TaskUpdater
 from a2a.types import (
+    Artifact,
     InternalError,
     InvalidParamsError,
     Part,
     Task,
+    TaskArtifactUpdateEvent,
     TaskState,
     TextPart,
     UnsupportedOperationError,
@@ -16,16 +19,17 @@ from a2a.utils import (
     new_task,
 )
 from a2a.utils.errors import ServerError
-from langgraph_agent import AdditionAgent
+from langgraph_agent import GeoPalAgent
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class AdditionAgentExecutor(AgentExecutor):
-    """Addition Agent Executor with proper event queue handling."""
+class GeoPalAgentExecutor(AgentExecutor):
+    """GeoPal Agent Executor with proper event queue handling."""
     
     def __init__(self):
-        self.agent = AdditionAgent()
+        # One compiled graph for all tasks; conversations are keyed by contextId
+        self.agent = GeoPalAgent()
     
     async def execute(
         self,
@@ -55,6 +59,9 @@ class AdditionAgentExecutor(AgentExecutor):
                 raise ServerError(error=InternalError())
         
         updater = TaskUpdater(event_queue, task.id, task.contextId)
+        # The answer is streamed as appended chunks of this one artifact
+        artifact_id = str(uuid4())
+        artifact_started = False
         
         try:
             async for item in self.agent.stream(query, task.contextId):
@@ -66,7 +73,15 @@ class AdditionAgentExecutor(AgentExecutor):
                 is_task_complete = item['is_task_complete']
                 require_user_input = item['require_user_input']
                 
-                if not is_task_complete and not require_user_input:
+                if item.get('is_delta'):
+                    self._add_artifact_chunk(
+                        updater,
+                        artifact_id,
+                        [Part(root=TextPart(text=item['content']))],
+                        append=artifact_started,
+                    )
+                    artifact_started = True
+                elif not is_task_complete and not require_user_input:
                     # Add status message for tool execution
                     logger.info(f"Tool execution status: {item['content']}")
                     updater.update_status(
@@ -89,10 +104,13 @@ class AdditionAgentExecutor(AgentExecutor):
                     )
                     break
                 else:
-                    # Final result
-                    updater.add_artifact(
-                        [Part(root=TextPart(text=item['content']))],
-                        name='addition_result',  # Changed from 'conversion_result'
+                    # Close the streamed artifact; the final item only carries unstreamed text
+                    self._add_artifact_chunk(
+                        updater,
+                        artifact_id,
+                        [Part(root=TextPart(text=item['content']))] if item['content'] else [],
+                        append=artifact_started,
+                        last_chunk=True,
                     )
                     updater.complete()
                     break
@@ -103,9 +121,9 @@ class AdditionAgentExecutor(AgentExecutor):
             if not event_queue.is_closed():
                 try:
                     updater.update_status(
-                        TaskState.error,
+                        TaskState.failed,
                         new_agent_text_message(
-                            "An error occurred during calculation",
+                            f"An error occurred: {str(e)}",
                             task.contextId,
                             task.id,
                         ),
@@ -115,6 +133,29 @@ class AdditionAgentExecutor(AgentExecutor):
                     pass  # Queue might have closed during error handling
             raise ServerError(error=InternalError()) from e
     
+    def _add_artifact_chunk(
+        self,
+        updater: TaskUpdater,
+        artifact_id: str,
+        parts: list[Part],
+        append: bool,
+        last_chunk: bool = False,
+    ) -> None:
+        # TaskUpdater.add_artifact cannot set append/lastChunk, so enqueue the event directly
+        updater.event_queue.enqueue_event(
+            TaskArtifactUpdateEvent(
+                taskId=updater.task_id,
+                contextId=updater.context_id,
+                append=append,
+                lastChunk=last_chunk,
+                artifact=Artifact(
+                    artifactId=artifact_id,
+                    name='geopal_result',
+                    parts=parts,
+                ),
+            )
+        )
+
     def _validate_request(self, context: RequestContext) -> bool:
         # Add actual validation logic if needed
         user_input = context.get_user_input()
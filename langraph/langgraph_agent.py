@@ -1,18 +1,24 @@
 import asyncio
+import json
 import os
+from uuid import uuid4
+from weakref import WeakValueDictionary
 from dotenv import load_dotenv
-from typing import List, TypedDict, Annotated
+from typing import Any, AsyncIterator, List, Optional, TypedDict, Annotated
 
 from loguru import logger
 from langchain_mistralai import ChatMistralAI
-from langchain_core.messages import HumanMessage, BaseMessage
+from langchain_core.messages import AIMessage, HumanMessage, BaseMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
 from langgraph.graph import StateGraph, START, END
-from langgraph.types import CachePolicy
-from langgraph.graph.message import add_messages
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
-from langgraph.prebuilt import ToolNode
+from langgraph.types import Send
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
+from checkpointer import DurableSqliteSaver
+from geo_index import GeoIndex
+from history import windowed_messages
+from mcp_manager import MCPConnectionManager
+from tool_cache import make_tool_cache, tool_cache_policy, tool_result_key
 
 # Load environment variables
 load_dotenv()
@@ -37,74 +43,294 @@ else:
 
 ORS_SERVER_PATH = os.path.join(os.path.dirname(__file__), "ors_mcp_server.py")
 
+# Process-wide: keeps streamable-HTTP sessions to geo_pal open and caches its tool list
+mcp_manager = MCPConnectionManager(
+    {
+       "geo_pal": {
+        "url": "https://server.smithery.ai/@Raghu6798/geopal_traveling_and_logistics/mcp?api_key=e3b06a92-b690-4c3a-9e46-fa480791e61b&profile=cognitive-weasel-8FCgUK",
+        "transport": "streamable_http",
+    }
+    },
+    pool_size=int(os.getenv("GEO_PAL_MCP_SESSIONS", "2")),
+    keepalive_interval=float(os.getenv("GEO_PAL_MCP_KEEPALIVE_SECONDS", "30")),
+    tools_ttl=float(os.getenv("GEO_PAL_MCP_TOOLS_TTL_SECONDS", "300")),
+)
+
+# Results of deterministic geo_pal tool calls, keyed by tool name and arguments
+tool_cache = make_tool_cache(
+    backend=os.getenv("GEO_PAL_TOOL_CACHE", "memory"),
+    db_file=os.getenv("GEO_PAL_TOOL_CACHE_DB", "tmp/tool_cache.db"),
+    max_entries=int(os.getenv("GEO_PAL_TOOL_CACHE_SIZE", "1024")),
+)
+
+# Places and POI searches from earlier tool results, so repeat and nearby
+# lookups are answered locally; persisted across restarts
+geo_index = GeoIndex(
+    db_file=os.getenv("GEO_PAL_GEO_INDEX_DB", "tmp/geo_index.db"),
+    max_places=int(os.getenv("GEO_PAL_GEO_INDEX_PLACES", "10000")),
+    max_poi_areas=int(os.getenv("GEO_PAL_GEO_INDEX_POI_AREAS", "500")),
+    reverse_radius_m=float(os.getenv("GEO_PAL_REVERSE_GEOCODE_METERS", "50")),
+)
+
+def merge_tool_results(left: Optional[dict], right: Optional[dict]) -> dict:
+    # None clears the results once they have been turned into ToolMessages
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
 class AgentState(TypedDict):
-    messages: Annotated[List[BaseMessage], add_messages]
-
-async def run_ors_agent():
-    logger.info("Initializing ORS FastMCP server connection...")
-    mcp_client = MultiServerMCPClient(
-        {
-           "geo_pal": {
-            "url": "https://server.smithery.ai/@Raghu6798/geopal_traveling_and_logistics/mcp?api_key=e3b06a92-b690-4c3a-9e46-fa480791e61b&profile=cognitive-weasel-8FCgUK",
-            "transport": "streamable_http",
-        }
-        }
-    )
-
-    logger.info("Loading ORS tools from FastMCP server...")
-    tools = await mcp_client.get_tools(server_name="geo_pal")
-    logger.debug(f"Loaded {len(tools)} tools: {[t.name for t in tools]}")
-
-    logger.info("Initializing Mistral AI model...")
-    model = ChatMistralAI(
-        model="mistral-small-latest",
-        api_key=MISTRAL_API_KEY
-    )
-    logger.info("Mistral AI model initialized successfully")
-    model_with_tools = model.bind_tools(tools)
-
-    def call_model(state: AgentState):
+    # Like add_messages, but bounded: old tool outputs are collapsed and the
+    # oldest turns are folded into a summary once the token budget is exceeded
+    messages: Annotated[List[BaseMessage], windowed_messages(
+        max_tokens=int(os.getenv("GEO_PAL_HISTORY_MAX_TOKENS", "6000")),
+        keep_tool_outputs=int(os.getenv("GEO_PAL_HISTORY_TOOL_TURNS", "2")),
+    )]
+    tool_results: Annotated[dict, merge_tool_results]
+
+def build_graph(
+    model_with_tools,
+    tools_by_server: dict[str, list[BaseTool]],
+    index: Optional[GeoIndex] = None,
+    max_concurrency: int = 4,
+    call_timeout: Optional[float] = 30,
+) -> StateGraph:
+    """LLM <-> tools loop where the tool calls of one model turn run concurrently.
+
+    Every tool call is sent to its own node, so LangGraph runs them as
+    parallel tasks of one step. Calls to the same MCP server share a
+    semaphore of `max_concurrency` slots, each call gets `call_timeout`
+    seconds once it holds a slot, and the ToolMessages go back to the model
+    in the order the calls were made.
+    """
+    async def call_model(state: AgentState, config: RunnableConfig):
         messages = state["messages"]
         logger.debug(f"Calling model with messages: {messages}")
-        response = model_with_tools.invoke(messages)
+        # Passing the run config lets `stream_mode="messages"` / `astream_events`
+        # see the model's token callbacks, so the call is streamed under the hood
+        response = await model_with_tools.ainvoke(messages, config)
         return {"messages": response}
 
-    tool_node = ToolNode(tools)
+    tools_by_name = {tool.name: tool for tools in tools_by_server.values() for tool in tools}
+
+    def make_tool_node(tool: BaseTool, server_slots: asyncio.Semaphore):
+        # The node's output is keyed by the call's arguments, not its
+        # tool_call_id, so a cached result can answer a later identical call
+        async def call_tool(call: dict, config: RunnableConfig):
+            key = tool_result_key(call["name"], call["args"])
+            indexed = index.answer(call["name"], call["args"]) if index is not None else None
+            if indexed is not None:
+                logger.debug(f"Answered {call['name']} from the geocode index")
+                return {"tool_results": {key: {"content": indexed, "status": "success"}}}
+            try:
+                async with server_slots:
+                    content = await asyncio.wait_for(tool.ainvoke(call["args"], config), timeout=call_timeout)
+                result = {"content": content, "status": "success"}
+            except asyncio.TimeoutError:
+                message = f"{call['name']} timed out after {call_timeout}s"
+                logger.warning(f"Tool {message}")
+                return {"tool_results": {key: {"content": f"Error: {message}", "status": "error"}}}
+            except Exception as e:
+                logger.warning(f"Tool {call['name']} failed: {e}")
+                return {"tool_results": {key: {"content": f"Error: {e}", "status": "error"}}}
+            if index is not None:
+                try:
+                    await asyncio.to_thread(index.learn, call["name"], call["args"], result["content"])
+                except Exception as e:
+                    logger.warning(f"Could not index {call['name']} result: {e}")
+            return {"tool_results": {key: result}}
+        return call_tool
+
+    def route_tools(state: AgentState):
+        tool_calls = state["messages"][-1].tool_calls
+        if not tool_calls:
+            return END
+        # One task per call, so each lands on its tool's node and CachePolicy
+        sends = [
+            Send(f"tool_{call['name']}", {"name": call["name"], "args": call["args"]})
+            for call in tool_calls
+            if call["name"] in tools_by_name
+        ]
+        return sends or "tool_messages"
+
+    def tool_messages(state: AgentState):
+        results = state.get("tool_results") or {}
+        messages = []
+        for call in state["messages"][-1].tool_calls:
+            result = results.get(
+                tool_result_key(call["name"], call["args"]),
+                {"content": f"Error: {call['name']} is not a valid tool", "status": "error"},
+            )
+            messages.append(ToolMessage(
+                content=result["content"],
+                name=call["name"],
+                tool_call_id=call["id"],
+                status=result["status"],
+            ))
+        return {"messages": messages, "tool_results": None}
 
     builder = StateGraph(AgentState)
     builder.add_node("llm", call_model)
-    builder.add_node("tools", tool_node)
+    builder.add_node("tool_messages", tool_messages)
+    for tools in tools_by_server.values():
+        server_slots = asyncio.Semaphore(max_concurrency)
+        for tool in tools:
+            builder.add_node(f"tool_{tool.name}", make_tool_node(tool, server_slots), cache_policy=tool_cache_policy(tool.name))
+            builder.add_edge(f"tool_{tool.name}", "tool_messages")
     builder.add_edge(START, "llm")
 
-    builder.add_conditional_edges(
-        "llm",
-        lambda state: "tools" if state["messages"][-1].tool_calls else END,
-    )
+    builder.add_conditional_edges("llm", route_tools)
+
+    builder.add_edge("tool_messages", "llm")
+    return builder
+
+class GeoPalAgent:
+    """GeoPal graph compiled once and shared by every A2A task.
+
+    `stream` runs one turn of the conversation keyed by `context_id` and
+    turns LangGraph's `astream_events` into the executor's response items:
+    token deltas of the answer, tool start/end progress, then a final item.
+    Turns of the same context are serialized; different contexts run
+    concurrently on the shared graph.
+    """
+
+    SUPPORTED_CONTENT_TYPES = ['text', 'text/plain']
 
-    builder.add_edge("tools", "llm")
+    def __init__(self):
+        self.model = ChatMistralAI(
+            model="mistral-small-latest",
+            api_key=MISTRAL_API_KEY
+        )
+        # Conversations survive restarts; only the last few checkpoints per thread
+        # are kept and large tool outputs are stored once as content-addressed blobs
+        self.checkpointer = DurableSqliteSaver(
+            db_file=os.getenv("GEO_PAL_CHECKPOINT_DB", "tmp/checkpoints.db"),
+            blob_dir=os.getenv("GEO_PAL_CHECKPOINT_BLOBS", "tmp/checkpoint_blobs"),
+            keep_last=int(os.getenv("GEO_PAL_CHECKPOINTS_PER_THREAD", "10")),
+            read_connections=int(os.getenv("GEO_PAL_CHECKPOINT_READERS", "4")),
+            blob_threshold=int(os.getenv("GEO_PAL_CHECKPOINT_BLOB_BYTES", "4096")),
+            compact_interval=float(os.getenv("GEO_PAL_CHECKPOINT_COMPACT_SECONDS", "60")),
+        )
+        self.graph = None
+        self._tools: Optional[List[BaseTool]] = None
+        self._build_lock = asyncio.Lock()
+        self._context_locks: WeakValueDictionary[str, asyncio.Lock] = WeakValueDictionary()
 
-    async with AsyncSqliteSaver.from_conn_string(":memory:") as memory:
-        agent_executor = builder.compile(checkpointer=memory)
+    async def setup(self):
+        """Loads the geo_pal tools and compiles the graph; call once at startup."""
+        return await self._get_graph()
 
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self.checkpointer.close)
+        await mcp_manager.aclose()
+
+    async def stream(self, query: str, context_id: str) -> AsyncIterator[dict[str, Any]]:
+        graph = await self._get_graph()
+        config = {"configurable": {"thread_id": context_id}}
+        lock = self._context_locks.setdefault(context_id, asyncio.Lock())
+        async with lock:
+            streamed = False
+            try:
+                async for event in graph.astream_events(
+                    {"messages": [HumanMessage(content=query)]},
+                    config=config,
+                    version="v2",
+                ):
+                    kind = event["event"]
+                    if kind == "on_chat_model_stream" and event["metadata"].get("langgraph_node") == "llm":
+                        content = event["data"]["chunk"].content
+                        if isinstance(content, str) and content:
+                            streamed = True
+                            yield {
+                                "is_task_complete": False,
+                                "require_user_input": False,
+                                "is_delta": True,
+                                "content": content,
+                            }
+                    elif kind == "on_tool_start":
+                        yield {
+                            "is_task_complete": False,
+                            "require_user_input": False,
+                            "content": f"Calling {event['name']} with {_clip_args(event['data'].get('input'))}",
+                        }
+                    elif kind == "on_tool_end":
+                        yield {
+                            "is_task_complete": False,
+                            "require_user_input": False,
+                            "content": f"{event['name']} finished",
+                        }
+
+                final = ""
+                if not streamed:
+                    # The model answered without streaming; send the answer in one piece
+                    state = await graph.aget_state(config)
+                    messages = state.values.get("messages") or []
+                    final = messages[-1].text() if messages and isinstance(messages[-1], AIMessage) else ""
+                yield {
+                    "is_task_complete": True,
+                    "require_user_input": False,
+                    "content": final,
+                }
+            except Exception as e:
+                logger.exception(f"Error while processing {context_id}: {e}")
+                yield {
+                    "is_task_complete": True,
+                    "require_user_input": False,
+                    "content": f"Error: {str(e)}",
+                }
+
+    async def _get_graph(self):
+        # The tool list is cached by the MCP manager; a new list object means the
+        # server's schemas changed and the graph has to be rebuilt
+        tools = await mcp_manager.get_tools("geo_pal")
+        if tools is not self._tools:
+            async with self._build_lock:
+                if tools is not self._tools:
+                    logger.info(f"Compiling GeoPal graph with {len(tools)} tools: {[t.name for t in tools]}")
+                    builder = build_graph(
+                        self.model.bind_tools(tools),
+                        {"geo_pal": tools},
+                        index=geo_index,
+                        max_concurrency=int(os.getenv("GEO_PAL_MCP_MAX_CONCURRENCY", "4")),
+                        call_timeout=float(os.getenv("GEO_PAL_TOOL_TIMEOUT_SECONDS", "30")),
+                    )
+                    self.graph = builder.compile(checkpointer=self.checkpointer, cache=tool_cache)
+                    self._tools = tools
+        return self.graph
+
+
+def _clip_args(args: Any, limit: int = 200) -> str:
+    text = json.dumps(args, default=str) if args is not None else "{}"
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+async def run_ors_agent(context_id: Optional[str] = None):
+    # One conversation per A2A contextId; the CLI session is a single context
+    thread_id = context_id or uuid4().hex
+    agent = GeoPalAgent()
+    await agent.setup()
+    try:
         while True:
-            query = input("\nEnter your query (type 'bye' or 'exit' to quit): ").strip()
+            query = (await asyncio.to_thread(input, "\nEnter your query (type 'bye' or 'exit' to quit): ")).strip()
             if query.lower() in {"bye", "exit"}:
                 print("Exiting the agent. Goodbye!")
                 break
 
-            thread_id = f"user_thread_{hash(query) % 10000}"  # simple thread id
-
             logger.info(f"Running query for thread: {thread_id} -> {query}")
-            try:
-                result = await agent_executor.ainvoke(
-                    {"messages": [HumanMessage(content=query)]},
-                    config={"configurable": {"thread_id": thread_id}}
-                )
-                final_response = result["messages"][-1].content
-                logger.success(f"Final response for {thread_id}: {final_response}")
-                print(f"\n--- {thread_id} ---\n{final_response}")
-            except Exception as e:
-                logger.exception(f"Error while processing {thread_id}: {e}")
+            print(f"\n--- {thread_id} ---")
+            async for item in agent.stream(query, thread_id):
+                if item.get("is_delta"):
+                    # Print model tokens as they arrive
+                    print(item["content"], end="", flush=True)
+                elif not item["is_task_complete"]:
+                    logger.info(item["content"])
+                elif item["content"]:
+                    print(item["content"])
+            print()
+            if tool_cache is not None:
+                logger.debug(f"Tool cache stats: {tool_cache.stats()}")
+            logger.debug(f"Geocode index stats: {geo_index.stats()}")
+    finally:
+        await agent.aclose()
 
 if __name__ == "__main__":
     logger.info("Starting ORS agent runner")
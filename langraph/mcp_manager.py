@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from typing import Any, Optional
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+from loguru import logger
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+# Error codes the client transport raises itself when the session is gone,
+# e.g. after a server restart; any other McpError came from the server.
+_SESSION_LOST_CODES = {CONNECTION_CLOSED, 32600}
+
+
+class _SessionSlot:
+    """One persistent MCP session, owned by a long-lived task.
+
+    The streamable-HTTP transport runs inside anyio task groups, which must be
+    entered and exited by the same task, so each session lives in its own
+    owner task that also sends the keepalive pings.
+    """
+
+    def __init__(self, client: MultiServerMCPClient, server_name: str, keepalive_interval: float):
+        self.client = client
+        self.server_name = server_name
+        self.keepalive_interval = keepalive_interval
+        self.session: Optional[ClientSession] = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._owner: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> ClientSession:
+        async with self._lock:
+            if self._owner is None or self._owner.done():
+                self._ready.clear()
+                self._closing.clear()
+                self._error = None
+                self._owner = asyncio.create_task(self._own())
+            await self._ready.wait()
+            if self.session is None:
+                raise ConnectionError(f"Could not connect to MCP server '{self.server_name}': {self._error}")
+            return self.session
+
+    async def reset(self) -> None:
+        self._closing.set()
+        if self._owner is not None:
+            await asyncio.wait({self._owner})
+
+    async def _own(self) -> None:
+        try:
+            async with self.client.session(self.server_name) as session:
+                self.session = session
+                self._ready.set()
+                logger.info(f"Opened persistent MCP session to '{self.server_name}'")
+                while not self._closing.is_set():
+                    try:
+                        await asyncio.wait_for(self._closing.wait(), timeout=self.keepalive_interval)
+                    except asyncio.TimeoutError:
+                        await session.send_ping()
+        except Exception as e:
+            self._error = e
+            logger.warning(f"MCP session to '{self.server_name}' closed: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+
+class PooledMCPSession:
+    """Stands in for a ClientSession and spreads calls over persistent sessions.
+
+    Tools loaded through `load_mcp_tools(pooled_session)` call
+    `pooled_session.call_tool(...)`, which picks the next session round-robin
+    and, if the transport broke, reconnects and retries the call once.
+    """
+
+    def __init__(
+        self,
+        client: MultiServerMCPClient,
+        server_name: str,
+        pool_size: int = 2,
+        keepalive_interval: float = 30,
+    ):
+        self.server_name = server_name
+        self._slots = [_SessionSlot(client, server_name, keepalive_interval) for _ in range(pool_size)]
+        self._next_slot = itertools.cycle(self._slots)
+
+    async def call_tool(self, name: str, arguments: Optional[dict[str, Any]] = None, **kwargs):
+        return await self._with_session(lambda session: session.call_tool(name, arguments, **kwargs))
+
+    async def list_tools(self, cursor: Optional[str] = None, **kwargs):
+        return await self._with_session(lambda session: session.list_tools(cursor=cursor, **kwargs))
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(slot.reset() for slot in self._slots))
+
+    async def _with_session(self, request):
+        slot = next(self._next_slot)
+        try:
+            return await request(await slot.get())
+        except McpError as e:
+            if e.error.code not in _SESSION_LOST_CODES:
+                raise
+            logger.warning(f"MCP session to '{self.server_name}' was lost ({e}), reconnecting")
+            await slot.reset()
+            return await request(await slot.get())
+        except Exception as e:
+            logger.warning(f"MCP request to '{self.server_name}' failed ({e}), reconnecting")
+            await slot.reset()
+            return await request(await slot.get())
+
+
+class MCPConnectionManager:
+    """Process-wide owner of MCP sessions and tool lists.
+
+    Keeps a pool of persistent sessions per server and caches the converted
+    LangChain tools for `tools_ttl` seconds. The tools stay bound to the
+    pooled session, so a tool call never pays the connect/initialize
+    handshake. After the TTL the tool list is fetched again and only
+    rebuilt if its schema fingerprint changed.
+    """
+
+    def __init__(
+        self,
+        connections: dict[str, dict[str, Any]],
+        pool_size: int = 2,
+        keepalive_interval: float = 30,
+        tools_ttl: float = 300,
+    ):
+        self.client = MultiServerMCPClient(connections)
+        self.pool_size = pool_size
+        self.keepalive_interval = keepalive_interval
+        self.tools_ttl = tools_ttl
+        self._sessions: dict[str, PooledMCPSession] = {}
+        self._tools: dict[str, tuple[str, float, list[BaseTool]]] = {}
+        self._lock = asyncio.Lock()
+
+    def session(self, server_name: str) -> PooledMCPSession:
+        if server_name not in self._sessions:
+            self._sessions[server_name] = PooledMCPSession(
+                self.client,
+                server_name,
+                pool_size=self.pool_size,
+                keepalive_interval=self.keepalive_interval,
+            )
+        return self._sessions[server_name]
+
+    async def get_tools(self, server_name: str) -> list[BaseTool]:
+        async with self._lock:
+            cached = self._tools.get(server_name)
+            if cached is not None and time.monotonic() - cached[1] < self.tools_ttl:
+                return cached[2]
+
+            session = self.session(server_name)
+            listed = await session.list_tools()
+            fingerprint = hashlib.sha256(
+                json.dumps([tool.model_dump(mode="json") for tool in listed.tools], sort_keys=True).encode()
+            ).hexdigest()
+            if cached is not None and cached[0] == fingerprint:
+                tools = cached[2]
+            else:
+                tools = await load_mcp_tools(session)
+                logger.info(f"Loaded {len(tools)} tools from MCP server '{server_name}'")
+            self._tools[server_name] = (fingerprint, time.monotonic(), tools)
+            return tools
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(session.aclose() for session in self._sessions.values()))
+        self._sessions.clear()
+        self._tools.clear()
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Optional
+
+from langgraph.cache.base import BaseCache, FullKey, Namespace
+from langgraph.cache.sqlite import SqliteCache
+from langgraph.types import CachePolicy
+
+# Seconds a tool result stays valid, matched against the tool name. Addresses
+# barely move; anything that depends on the road network or traffic goes
+# stale quickly.
+TOOL_TTLS = {
+    "geocode": 7 * 24 * 3600,
+    "poi": 24 * 3600,
+    "isochrone": 3600,
+    "direction": 600,
+    "route": 600,
+    "optimize": 600,
+}
+DEFAULT_TOOL_TTL = 600
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, float):
+        # ~1 cm at the equator, so repeated coordinates from the model match
+        return round(value, 7)
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, Mapping):
+        return {str(k): _canonical(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def tool_result_key(name: str, args: Mapping[str, Any]) -> str:
+    """Stable key for a tool call: tool name plus canonicalized arguments."""
+    payload = json.dumps([name, _canonical(args)], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def tool_ttl(name: str, ttls: Optional[Mapping[str, int]] = None, default: int = DEFAULT_TOOL_TTL) -> int:
+    lowered = name.lower()
+    for fragment, ttl in (ttls or TOOL_TTLS).items():
+        if fragment in lowered:
+            return ttl
+    return default
+
+
+def tool_cache_policy(name: str, ttls: Optional[Mapping[str, int]] = None, default: int = DEFAULT_TOOL_TTL) -> CachePolicy:
+    """CachePolicy for a single-tool node whose input is `{"name": ..., "args": ...}`."""
+    return CachePolicy(
+        key_func=lambda call: tool_result_key(call["name"], call["args"]),
+        ttl=tool_ttl(name, ttls, default),
+    )
+
+
+class LRUCache(BaseCache):
+    """In-memory LangGraph cache bounded to `max_entries`, least recently used out first."""
+
+    def __init__(self, max_entries: int = 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries: OrderedDict[FullKey, tuple[str, bytes, Optional[float]]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, keys: Sequence[FullKey]) -> dict[FullKey, Any]:
+        now = time.time()
+        values = {}
+        with self._lock:
+            for ns, key in keys:
+                full_key = (tuple(ns), key)
+                entry = self._entries.get(full_key)
+                if entry is None:
+                    continue
+                encoding, raw, expiry = entry
+                if expiry is not None and now >= expiry:
+                    del self._entries[full_key]
+                    continue
+                self._entries.move_to_end(full_key)
+                values[full_key] = self.serde.loads_typed((encoding, raw))
+        return values
+
+    async def aget(self, keys: Sequence[FullKey]) -> dict[FullKey, Any]:
+        return self.get(keys)
+
+    def set(self, pairs: Mapping[FullKey, tuple[Any, Optional[int]]]) -> None:
+        now = time.time()
+        with self._lock:
+            for (ns, key), (value, ttl) in pairs.items():
+                full_key = (tuple(ns), key)
+                self._entries[full_key] = (*self.serde.dumps_typed(value), now + ttl if ttl is not None else None)
+                self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def aset(self, pairs: Mapping[FullKey, tuple[Any, Optional[int]]]) -> None:
+        self.set(pairs)
+
+    def clear(self, namespaces: Optional[Sequence[Namespace]] = None) -> None:
+        with self._lock:
+            if namespaces is None:
+                self._entries.clear()
+                return
+            dropped = {tuple(ns) for ns in namespaces}
+            for full_key in [k for k in self._entries if k[0] in dropped]:
+                del self._entries[full_key]
+
+    async def aclear(self, namespaces: Optional[Sequence[Namespace]] = None) -> None:
+        self.clear(namespaces)
+
+
+class ToolResultCache(BaseCache):
+    """Wraps a LangGraph cache store and counts hits and misses per node.
+
+    LangGraph namespaces cached node writes by node name, so with one node
+    per tool the counters come out per tool. Writes that carry a failed tool
+    call are not stored, so a transient MCP error is retried next time
+    instead of being replayed for the whole TTL.
+    """
+
+    def __init__(self, store: BaseCache):
+        super().__init__(serde=store.serde)
+        self.store = store
+        self._lock = threading.Lock()
+        self.counters: defaultdict[str, dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def get(self, keys: Sequence[FullKey]) -> dict[FullKey, Any]:
+        values = self.store.get(keys)
+        self._count(keys, values)
+        return values
+
+    async def aget(self, keys: Sequence[FullKey]) -> dict[FullKey, Any]:
+        values = await self.store.aget(keys)
+        self._count(keys, values)
+        return values
+
+    def set(self, pairs: Mapping[FullKey, tuple[Any, Optional[int]]]) -> None:
+        self.store.set(self._cacheable(pairs))
+
+    async def aset(self, pairs: Mapping[FullKey, tuple[Any, Optional[int]]]) -> None:
+        await self.store.aset(self._cacheable(pairs))
+
+    def clear(self, namespaces: Optional[Sequence[Namespace]] = None) -> None:
+        self.store.clear(namespaces)
+
+    async def aclear(self, namespaces: Optional[Sequence[Namespace]] = None) -> None:
+        await self.store.aclear(namespaces)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                node: {**c, "hit_rate": c["hits"] / (c["hits"] + c["misses"]) if c["hits"] + c["misses"] else 0.0}
+                for node, c in self.counters.items()
+            }
+
+    def _count(self, keys: Sequence[FullKey], values: Mapping[FullKey, Any]) -> None:
+        found = {(tuple(ns), key) for ns, key in values}
+        with self._lock:
+            for ns, key in keys:
+                self.counters[ns[-1]]["hits" if (tuple(ns), key) in found else "misses"] += 1
+
+    @staticmethod
+    def _cacheable(pairs: Mapping[FullKey, tuple[Any, Optional[int]]]) -> dict:
+        def failed(writes) -> bool:
+            return any(
+                channel == "tool_results" and any(r.get("status") == "error" for r in value.values())
+                for channel, value in writes
+                if isinstance(value, Mapping)
+            )
+
+        return {key: entry for key, entry in pairs.items() if not failed(entry[0])}
+
+
+def make_tool_cache(backend: str = "memory", db_file: str = "tmp/tool_cache.db", max_entries: int = 1024) -> Optional[ToolResultCache]:
+    """Builds the tool-result cache for `backend` ("memory", "sqlite" or "off")."""
+    if backend == "off":
+        return None
+    if backend == "sqlite":
+        path = Path(db_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return ToolResultCache(SqliteCache(path=str(path)))
+    if backend == "memory":
+        return ToolResultCache(LRUCache(max_entries=max_entries))
+    raise ValueError(f"Unknown tool cache backend: {backend}")
@@ -1,19 +1,28 @@
 import logging
 import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Optional
+
+# The A2A server modules shared by every agent live in ../a2a_shared
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 import click
-import httpx
 
 from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore, InMemoryPushNotifier
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
 )
-from llama_index_agent import BrandImageAgent
+from image_artifacts import ImageStore, image_route
 from llama_index_agent_executor import BrandGenAgentExecutor
+from a2a_shared.push_dispatcher import PushDispatcher
+from a2a_shared.push_notifier import SqlitePushNotifier, make_push_notifier
+from a2a_shared.push_signing import PushSigner
+from a2a_shared.task_store import SqliteTaskStore, make_task_store
+from a2a_shared.workers import WorkerRequestHandler, make_request_handler, run_workers
 from dotenv import load_dotenv
 
 
@@ -22,16 +31,126 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TASK_STORE = os.getenv('A2A_TASK_STORE', 'sqlite')
+TASK_DB = os.getenv('A2A_TASK_DB', 'tmp/tasks.db')
+TASK_TTL_SECONDS = float(os.getenv('A2A_TASK_TTL_SECONDS', str(24 * 3600)))
+
 
 class MissingAPIKeyError(Exception):
     """Exception for missing API key."""
     pass
 
 
+def build_app(host: str, port: int, worker_url: Optional[str] = None):
+    """Builds the A2A Starlette app; `worker_url` is set when running as one of several workers."""
+    capabilities = AgentCapabilities(streaming=True, pushNotifications=True)
+
+    skill = AgentSkill(
+        id="Brand_Image_Generation_Agent",
+        name="Deep_Research_agent",
+        description="Generates an Image of a brand given it's metadata",
+        tags=['Image Gen']
+    )
+
+    batch_skill = AgentSkill(
+        id="Brand_Image_Batch",
+        name="Brand_Image_Batch",
+        description=(
+            'Generates one brand image per product of a catalog. Send a data part '
+            '{"products": [{"product_name", "description", "brand_colors", "visual_style"}, ...]}; '
+            'each image is streamed as a chunk of the brand_catalog artifact as soon as it is ready'
+        ),
+        tags=['Image Gen', 'Batch'],
+        inputModes=['application/json'],
+        outputModes=['application/json', 'image/png', 'image/jpeg'],
+    )
+
+    agent_card = AgentCard(
+        name='Integer Addition Agent',
+        description='Just an Addition Agent',
+        url='http://localhost:10000/',
+        version='1.0.0',
+        defaultInputModes=['text/plain', 'application/json'],
+        defaultOutputModes=['text/plain', 'image/png', 'image/jpeg'],
+        capabilities=capabilities,
+        skills=[skill, batch_skill],
+    )
+
+    # Notifications carry a JWT from a cached, rotating RSA key; receivers verify it against the JWKS route
+    push_signer = PushSigner(
+        keys_dir=os.getenv('A2A_PUSH_KEYS_DIR', 'tmp/push_keys'),
+        rotate_seconds=float(os.getenv('A2A_PUSH_KEY_ROTATE_SECONDS', str(30 * 24 * 3600))),
+    ) if os.getenv('A2A_PUSH_SIGNING', 'on') != 'off' else None
+    # Webhook deliveries are queued and retried in the background, off the task's event loop path
+    push_dispatcher = PushDispatcher(
+        queue_size=int(os.getenv('A2A_PUSH_QUEUE_SIZE', '1000')),
+        max_attempts=int(os.getenv('A2A_PUSH_MAX_ATTEMPTS', '5')),
+        backoff_seconds=float(os.getenv('A2A_PUSH_BACKOFF_SECONDS', '0.5')),
+        timeout_seconds=float(os.getenv('A2A_PUSH_TIMEOUT_SECONDS', '10')),
+        connections=int(os.getenv('A2A_PUSH_CONNECTIONS', '20')),
+        senders_per_url=int(os.getenv('A2A_PUSH_SENDERS_PER_URL', '4')),
+        dead_letter_file=os.getenv('A2A_PUSH_DEAD_LETTER_FILE', 'tmp/push_dead_letters.jsonl'),
+        signer=push_signer,
+    )
+    # Tasks survive restarts and expire once finished; large artifacts are stored out of line
+    task_store = make_task_store(
+        backend=TASK_STORE,
+        db_file=TASK_DB,
+        hot_size=int(os.getenv('A2A_TASK_HOT_SIZE', '256')),
+        ttl_seconds=TASK_TTL_SECONDS,
+        artifact_inline_bytes=int(os.getenv('A2A_TASK_ARTIFACT_INLINE_BYTES', str(16 * 1024))),
+        shared=worker_url is not None,
+    )
+    push_notifier = make_push_notifier(TASK_STORE, push_dispatcher, db_file=TASK_DB, ttl_seconds=TASK_TTL_SECONDS)
+    # Generated images go back as FileParts: inline below the threshold,
+    # otherwise a URI served from the downloaded bytes; workers share them on disk
+    image_store = ImageStore(
+        max_bytes=int(os.getenv('BRAND_IMAGE_STORE_MB', '256')) * 1024 * 1024,
+        directory=os.getenv('BRAND_IMAGE_STORE_DIR', 'tmp/images') if worker_url else None,
+    )
+    executor = BrandGenAgentExecutor(
+        image_store=image_store,
+        public_url=os.getenv('BRAND_IMAGE_PUBLIC_URL', f'http://{host}:{port}'),
+        inline_max_bytes=int(os.getenv('BRAND_IMAGE_INLINE_MAX_BYTES', str(64 * 1024))),
+    )
+    request_handler = make_request_handler(
+        worker_url,
+        db_file=TASK_DB,
+        agent_executor=executor,
+        task_store=task_store,
+        push_notifier=push_notifier,
+    )
+    server = A2AStarletteApplication(
+        agent_card=agent_card,
+        http_handler=request_handler
+    )
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        # Release pooled image downloads and the decode workers on shutdown
+        await executor.agent.aclose()
+        if isinstance(request_handler, WorkerRequestHandler):
+            await request_handler.aclose()
+        await push_dispatcher.aclose()
+        if push_signer:
+            push_signer.close()
+        if isinstance(push_notifier, SqlitePushNotifier):
+            push_notifier.close()
+        if isinstance(task_store, SqliteTaskStore):
+            task_store.close()
+
+    routes = [image_route(image_store)]
+    if push_signer:
+        routes.append(push_signer.route())
+    return server.build(routes=routes, lifespan=lifespan)
+
+
 @click.command()
 @click.option('--host', 'host', default='localhost')
 @click.option('--port', 'port', default=10000)
-def main(host, port):
+@click.option('--workers', 'workers', default=int(os.getenv('A2A_WORKERS', '1')), help='Worker processes sharing the port')
+def main(host, port, workers):
     """Starts the Llama Index Brand Image Generation server."""
     try:
         if not os.getenv('OPENROUTER_API_KEY'):
@@ -39,39 +158,14 @@ def main(host, port):
                 'OPENROUTER API KEY environment variable not set.'
             )
 
-        capabilities = AgentCapabilities(streaming=True, pushNotifications=True)
-
-        skill = AgentSkill(
-            id="Brand_Image_Generation_Agent",
-            name="Deep_Research_agent",
-            description="Generates an Image of a brand given it's metadata",
-            tags=['Image Gen']
-        )
-
-        agent_card = AgentCard(
-            name='Integer Addition Agent',
-            description='Just an Addition Agent',
-            url='http://localhost:10000/',
-            version='1.0.0',
-            defaultInputModes=['text/plain'],
-            defaultOutputModes=['text/plain'],
-            capabilities=AgentCapabilities(streaming=True),
-            skills=[skill],
-        )
-
-        httpx_client = httpx.AsyncClient()
-        request_handler = DefaultRequestHandler(
-            agent_executor=BrandGenAgentExecutor(),
-            task_store=InMemoryTaskStore(),
-            push_notifier=InMemoryPushNotifier(httpx_client),
-        )
-        server = A2AStarletteApplication(
-            agent_card=agent_card,
-            http_handler=request_handler
-        )
+        if workers > 1:
+            if TASK_STORE != 'sqlite':
+                raise ValueError('--workers needs the shared sqlite task store (A2A_TASK_STORE=sqlite)')
+            run_workers(__file__, 'build_app', host, port, workers, db_file=TASK_DB)
+            return
 
         import uvicorn
-        uvicorn.run(server.build(), host=host, port=port)
+        uvicorn.run(build_app(host, port), host=host, port=port)
 
     except MissingAPIKeyError as e:
         logger.error(f'Error: {e}')
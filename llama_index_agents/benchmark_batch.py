@@ -0,0 +1,62 @@
+"""Wall-clock time of a catalog request through the batch brand-image path.
+
+Generates one image per product with prompts built by
+`create_marketing_prompt` (no LLM) and compares running the catalog one
+product at a time with the bounded fan-out of `generate_batch`. Together and
+the image CDN are stubs with a fixed latency, so no API keys or network
+access are needed. The expected time is about
+2 x latency x ceil(products / concurrency).
+
+    uv run benchmark_batch.py --products 50 --concurrency 8 --latency 0.2 --rate 0
+"""
+import asyncio
+import math
+import os
+import time
+
+import click
+
+os.environ.setdefault("BRAND_IMAGE_CACHE", "off")
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+
+from benchmark_image_pipeline import StubTogether, png, stub_cdn
+from brand_batch import ProductSpec, generate_batch
+from image_pipeline import ImagePipeline
+from llama_index_agent import create_marketing_prompt
+
+
+async def _run(specs: list[ProductSpec], latency: float, concurrency: int, rate: float) -> tuple[float, float]:
+    pipeline = ImagePipeline(backend=StubTogether(latency), transport=stub_cdn(latency, png(256)))
+    started = time.perf_counter()
+    first = None
+    indexes = []
+    async for result in generate_batch(specs, pipeline, create_marketing_prompt, concurrency, rate):
+        assert result.error is None, result.error
+        first = first or time.perf_counter() - started
+        indexes.append(result.index)
+    elapsed = time.perf_counter() - started
+    assert sorted(indexes) == list(range(len(specs)))
+    await pipeline.aclose()
+    return first, elapsed
+
+
+@click.command()
+@click.option('--products', 'products', default=50)
+@click.option('--concurrency', 'concurrency', default=8)
+@click.option('--latency', 'latency', default=0.2)
+@click.option('--rate', 'rate', default=0.0)
+def main(products, concurrency, latency, rate):
+    """Benchmarks sequential vs. bounded concurrent catalog generation."""
+    specs = [
+        ProductSpec(f"Product {i}", f"Catalog item number {i}", "green and silver", "modern minimalist")
+        for i in range(products)
+    ]
+    expected = 2 * latency * math.ceil(products / concurrency)
+    for mode, cap in (("sequential", 1), ("batch", concurrency)):
+        first, elapsed = asyncio.run(_run(specs, latency, cap, rate))
+        print(f"{mode:>10} (concurrency {cap}): first result {first:.2f}s, {products} products in {elapsed:.2f}s")
+    print(f"  expected for the batch: ~{expected:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Latency of repeat brand campaigns with the prompt-to-image cache.
+
+Sends the same campaign prompts three times through `ImagePipeline`: with an
+empty cache, again on the warm cache, and after reopening the cache from its
+index file as a restarted server would. Half of the warm requests differ from
+the originals only in whitespace and case, which normalizes to the same key.
+Together and the image CDN are stubs with a fixed latency, so no API keys or
+network access are needed.
+
+    uv run benchmark_image_cache.py --campaigns 8 --latency 0.5
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+import click
+
+# The agent module is only imported for its prompt builder; keep its own cache off
+os.environ.setdefault("BRAND_IMAGE_CACHE", "off")
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+
+from benchmark_image_pipeline import StubTogether, png, stub_cdn
+from image_cache import ImageCache
+from image_pipeline import ImagePipeline
+from llama_index_agent import create_marketing_prompt
+
+PRODUCTS = ["EcoWater Bottle", "Trail Runner Shoe", "Nimbus Headphones", "Solar Lantern", "Oak Desk", "Aero Kettle"]
+
+
+async def _run(prompts: list[str], cache: ImageCache, latency: float, image: bytes) -> tuple[float, int]:
+    backend = StubTogether(latency)
+    calls = 0
+    generate = backend.generate
+
+    async def counting_generate(prompt, **kwargs):
+        nonlocal calls
+        calls += 1
+        return await generate(prompt, **kwargs)
+
+    backend.generate = counting_generate
+    pipeline = ImagePipeline(backend=backend, transport=stub_cdn(latency, image), cache=cache)
+    started = time.perf_counter()
+    await asyncio.gather(*(pipeline.generate(p) for p in prompts))
+    elapsed = time.perf_counter() - started
+    await pipeline.aclose()
+    return elapsed, calls
+
+
+@click.command()
+@click.option('--campaigns', 'campaigns', default=8)
+@click.option('--latency', 'latency', default=0.5)
+def main(campaigns, latency):
+    """Benchmarks cold, warm and restarted prompt-to-image cache lookups."""
+    image = png()
+    prompts = [
+        create_marketing_prompt(PRODUCTS[i % len(PRODUCTS)], f"Campaign {i}", "green and silver", "modern minimalist")
+        for i in range(campaigns)
+    ]
+    # Same campaigns, re-sent with different spacing / casing
+    repeats = [p.upper() if i % 2 else f"  {p}  " for i, p in enumerate(prompts)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        runs = [("cold", prompts, ImageCache(cache_dir)), ("warm", repeats, None), ("restarted", prompts, None)]
+        cache = None
+        for name, batch, fresh in runs:
+            cache = fresh or (cache if name == "warm" else ImageCache(cache_dir))
+            elapsed, calls = asyncio.run(_run(batch, cache, latency, image))
+            print(f"{name:>10}: {elapsed:.3f}s for {len(batch)} campaigns, {calls} generations, {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
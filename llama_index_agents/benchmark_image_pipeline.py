@@ -0,0 +1,83 @@
+"""Concurrent brand-image requests through the image pipeline.
+
+Runs N image generations at once, the way the A2A server does, and compares
+the old blocking path (synchronous generate + download + decode on the event
+loop) with `ImagePipeline`. Together and the image CDN are replaced by stubs
+with a fixed latency, so no API keys or network access are needed.
+
+    uv run benchmark_image_pipeline.py --requests 8 --latency 0.3
+"""
+import asyncio
+import time
+from io import BytesIO
+from types import SimpleNamespace
+
+import click
+import httpx
+from PIL import Image
+
+from image_pipeline import ImagePipeline, _decode
+
+
+def png(size: int = 1024) -> bytes:
+    out = BytesIO()
+    Image.new("RGB", (size, size), (40, 160, 90)).save(out, format="PNG")
+    return out.getvalue()
+
+
+class StubTogether:
+    """Answers `images.generate` after `latency` seconds with a fake CDN URL."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.images = self
+
+    async def generate(self, prompt, **kwargs):
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(data=[SimpleNamespace(url=f"https://cdn.example/{abs(hash(prompt))}.png")])
+
+
+def stub_cdn(latency: float, image: bytes) -> httpx.MockTransport:
+    async def cdn(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        return httpx.Response(200, content=image, headers={"content-type": "image/png"})
+
+    return httpx.MockTransport(cdn)
+
+
+def _stub_pipeline(latency: float, image: bytes) -> ImagePipeline:
+    return ImagePipeline(backend=StubTogether(latency), transport=stub_cdn(latency, image))
+
+
+async def _blocking(prompts: list[str], latency: float, image: bytes) -> None:
+    async def one(prompt: str):
+        time.sleep(latency)  # Together.images.generate
+        time.sleep(latency)  # requests.get
+        _decode(image, 256)
+
+    await asyncio.gather(*(one(p) for p in prompts))
+
+
+async def _pipelined(prompts: list[str], latency: float, image: bytes) -> None:
+    pipeline = _stub_pipeline(latency, image)
+    results = await asyncio.gather(*(pipeline.generate(p) for p in prompts))
+    assert all(r.width == r.height for r in results)
+    await pipeline.aclose()
+
+
+@click.command()
+@click.option('--requests', 'requests', default=8)
+@click.option('--latency', 'latency', default=0.3)
+def main(requests, latency):
+    """Benchmarks blocking vs. async image generation for concurrent requests."""
+    image = png()
+    prompts = [f"Premium product photography {i}" for i in range(requests)]
+    for mode, run in (("blocking", _blocking), ("pipelined", _pipelined)):
+        started = time.perf_counter()
+        asyncio.run(run(prompts, latency, image))
+        elapsed = time.perf_counter() - started
+        print(f"{mode:>10}: {elapsed:.2f}s for {requests} images ({requests / elapsed:.1f} images/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Latency of 100 sequential `BrandImageAgent.invoke` calls.
+
+Compares the old pattern, a fresh event loop per call (`asyncio.run`), with
+the sync facade that runs every call on one long-lived background loop. The
+LLM is LlamaIndex's mock function-calling model scripted to call
+`generate_image` once; Together and the image CDN are a local HTTP stub with
+a fixed latency, reached through the real Together and httpx clients, so the
+number of TCP connections each mode opens is counted too. No API keys or
+network access are needed.
+
+    uv run benchmark_invoke.py --calls 100 --latency 0.02
+"""
+import asyncio
+import os
+import socket
+import statistics
+import threading
+import time
+
+import click
+
+os.environ.setdefault("BRAND_IMAGE_CACHE", "off")
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+os.environ.setdefault("TOGETHER_API_KEY", "benchmark")
+
+import uvicorn
+from llama_index.core.llms import ChatMessage
+from llama_index.core.llms.mock import MockFunctionCallingLLM
+from llama_index.core.tools import ToolSelection
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from benchmark_image_pipeline import png
+
+IMAGE = png(256)
+connections: set[tuple[str, int]] = set()
+
+
+def _stub_app(latency: float) -> Starlette:
+    async def generate(request: Request) -> JSONResponse:
+        connections.add(request.client)
+        await asyncio.sleep(latency)
+        url = f"{request.base_url}image.png"
+        return JSONResponse({"id": "stub", "model": "stub", "object": "list", "data": [{"index": 0, "url": url}]})
+
+    async def image(request: Request) -> Response:
+        connections.add(request.client)
+        await asyncio.sleep(latency)
+        return Response(IMAGE, media_type="image/png")
+
+    return Starlette(routes=[
+        Route("/v1/images/generations", generate, methods=["POST"]),
+        Route("/image.png", image),
+    ])
+
+
+def _serve(latency: float) -> str:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(_stub_app(latency), log_level="warning"))
+    threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def _scripted_turn(messages, **kwargs) -> ChatMessage:
+    if any(m.role == "tool" for m in messages):
+        return ChatMessage(role="assistant", content="Done.")
+    call = ToolSelection(tool_id="img", tool_name="generate_image", tool_kwargs={"prompt": "EcoWater Bottle on a desk"})
+    return ChatMessage(role="assistant", content="", additional_kwargs={"tool_calls": [call]})
+
+
+def _measure(invoke, calls: int) -> list[float]:
+    connections.clear()
+    latencies = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        result = invoke()
+        latencies.append(time.perf_counter() - started)
+        assert result == "Done.", result
+    return latencies
+
+
+@click.command()
+@click.option('--calls', 'calls', default=100)
+@click.option('--latency', 'latency', default=0.02)
+def main(calls, latency):
+    """Benchmarks a loop per call vs. the background-loop sync facade."""
+    os.environ["TOGETHER_BASE_URL"] = f"{_serve(latency)}/v1"
+    from llama_index_agent import BrandImageAgent
+
+    agent = BrandImageAgent()
+    agent.agent.llm = MockFunctionCallingLLM(response_generator=_scripted_turn)
+    query = "Generate an image of the EcoWater Bottle"
+    modes = (
+        ("loop per call", lambda: asyncio.run(agent.ainvoke(query))),
+        ("background loop", lambda: agent.invoke(query)),
+    )
+    for name, invoke in modes:
+        latencies = sorted(_measure(invoke, calls))
+        print(
+            f"{name:>16}: mean {statistics.mean(latencies) * 1000:.1f} ms, "
+            f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms, "
+            f"{len(connections)} connections for {calls} calls"
+        )
+    agent.close()
+
+
+if __name__ == '__main__':
+    main()
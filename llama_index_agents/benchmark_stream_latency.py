@@ -0,0 +1,80 @@
+"""Time to first event and total time of `BrandImageAgent.stream`.
+
+Runs N brand-image requests one after another through the real FunctionAgent
+workflow and reports when the first progress event (tool call, token delta
+or image) reached the caller and when the task completed. The LLM is
+LlamaIndex's mock function-calling model scripted to call
+`generate_brand_image_complete` once, and Together and the image CDN are
+stubs with a fixed latency, so no API keys or network access are needed.
+
+    uv run benchmark_stream_latency.py --requests 20 --latency 0.3
+"""
+import asyncio
+import os
+import statistics
+import time
+
+import click
+
+os.environ.setdefault("BRAND_IMAGE_CACHE", "off")
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+
+from llama_index.core.llms import ChatMessage
+from llama_index.core.llms.mock import MockFunctionCallingLLM
+from llama_index.core.tools import ToolSelection
+
+import llama_index_agent
+from benchmark_image_pipeline import StubTogether, png, stub_cdn
+from llama_index_agent import BrandImageAgent
+
+QUERY = "Generate a brand image for EcoWater Bottle, a steel bottle, green and silver, modern minimalist."
+
+
+def _scripted_turn(messages, **kwargs) -> ChatMessage:
+    if any(m.role == "tool" for m in messages):
+        return ChatMessage(role="assistant", content="Your EcoWater Bottle image is ready.")
+    call = ToolSelection(
+        tool_id="brand",
+        tool_name="generate_brand_image_complete",
+        tool_kwargs={
+            "product_name": "EcoWater Bottle",
+            "description": "Stainless steel bottle",
+            "brand_colors": "green and silver",
+            "visual_style": "modern minimalist",
+        },
+    )
+    return ChatMessage(role="assistant", content="", additional_kwargs={"tool_calls": [call]})
+
+
+async def _run(requests: int) -> tuple[list[float], list[float]]:
+    agent = BrandImageAgent()
+    agent.agent.llm = MockFunctionCallingLLM(response_generator=_scripted_turn)
+    totals = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        async for item in agent.stream(QUERY):
+            if item['is_task_complete']:
+                totals.append(time.perf_counter() - started)
+    await agent.aclose()
+    return list(agent.first_event_seconds), totals
+
+
+def _ms(values: list[float], q: float) -> str:
+    values = sorted(values)
+    return f"{values[min(len(values) - 1, int(q * len(values)))] * 1000:.0f} ms"
+
+
+@click.command()
+@click.option('--requests', 'requests', default=20)
+@click.option('--latency', 'latency', default=0.3)
+def main(requests, latency):
+    """Measures time to first event of the workflow-driven brand image stream."""
+    llama_index_agent.image_pipeline.backend = StubTogether(latency)
+    llama_index_agent.image_pipeline.transport = stub_cdn(latency, png())
+    first_events, totals = asyncio.run(_run(requests))
+    print(f"first event: p50 {_ms(first_events, 0.5)}, p95 {_ms(first_events, 0.95)}")
+    print(f"   complete: p50 {_ms(totals, 0.5)}, p95 {_ms(totals, 0.95)} (mean {statistics.mean(totals):.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Throughput of the A2A server at 1, 2, 4 and 8 worker processes.
+
+Starts `__main__.py --workers N` for each N and sends `message/send` batch
+requests (one product each, so no LLM is involved) from `--concurrency`
+clients. Together and the image CDN are a local stub server in its own
+processes, with a fixed latency and a 1024px JPEG. So each request does the
+agent's real CPU work: decoding and thumbnailing the image, hashing it,
+building the artifacts and saving the task. After the run every task is read
+back with `tasks/get` on a fresh connection. Whichever worker answers must
+find it in the shared task store. No API keys or network access are needed.
+
+    uv run benchmark_workers.py --requests 400 --concurrency 32 --workers 1,2,4,8
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from io import BytesIO
+from pathlib import Path
+
+import click
+import httpx
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+
+def _jpeg(size: int = 1024) -> bytes:
+    out = BytesIO()
+    Image.effect_noise((size, size), 40).convert("RGB").save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+def stub_app() -> Starlette:
+    """Together's image endpoint and the CDN, run by uvicorn in separate processes."""
+    latency = float(os.getenv("STUB_LATENCY", "0.05"))
+    image = _jpeg()
+
+    async def generate(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        url = f"{request.base_url}image.jpg"
+        return JSONResponse({"id": "stub", "model": "stub", "object": "list", "data": [{"index": 0, "url": url}]})
+
+    async def download(request: Request) -> Response:
+        await asyncio.sleep(latency)
+        return Response(image, media_type="image/jpeg")
+
+    return Starlette(routes=[
+        Route("/v1/images/generations", generate, methods=["POST"]),
+        Route("/image.jpg", download),
+    ])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _batch(n: int) -> dict:
+    products = [
+        {"product_name": f"Bottle {uuid.uuid4().hex[:8]}", "description": "Reusable water bottle",
+         "brand_colors": "green and white", "visual_style": "minimalist"}
+        for _ in range(n)
+    ]
+    return {"role": "user", "messageId": str(uuid.uuid4()), "parts": [{"kind": "data", "data": {"products": products}}]}
+
+
+def _rpc(method: str, params: dict) -> dict:
+    return {"jsonrpc": "2.0", "id": str(uuid.uuid4()), "method": method, "params": params}
+
+
+def _start_server(workers: int, port: int, stub_url: str, workdir: Path) -> tuple[subprocess.Popen, Path]:
+    env = dict(
+        os.environ,
+        OPENROUTER_API_KEY=os.getenv("OPENROUTER_API_KEY", "benchmark"),
+        TOGETHER_API_KEY="benchmark",
+        TOGETHER_BASE_URL=f"{stub_url}/v1",
+        BRAND_IMAGE_CACHE="off",
+        A2A_TASK_DB=str(workdir / f"tasks-{workers}.db"),
+        BRAND_IMAGE_STORE_DIR=str(workdir / f"images-{workers}"),
+    )
+    log = workdir / f"server-{workers}.log"
+    server = subprocess.Popen(
+        [sys.executable, "__main__.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        env=env, stdout=subprocess.DEVNULL, stderr=log.open("w"),
+    )
+    return server, log
+
+
+def _wait_ready(server: subprocess.Popen, log: Path, workers: int, timeout: float = 180) -> None:
+    deadline = time.monotonic() + timeout
+    while log.read_text().count("Application startup complete") < workers:
+        if server.poll() is not None or time.monotonic() > deadline:
+            raise click.ClickException(f"Server with {workers} workers did not start, see {log}")
+        time.sleep(0.5)
+
+
+async def _load(url: str, requests: int, concurrency: int, products: int) -> tuple[float, list[float], list[str], int]:
+    latencies: list[float] = []
+    task_ids: list[str] = []
+    errors = 0
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        async def one_client() -> None:
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                reply = (await client.post(url, json=_rpc("message/send", {"message": _batch(products)}))).json()
+                latencies.append(time.perf_counter() - started)
+                result = reply.get("result")
+                if result and result["status"]["state"] == "completed":
+                    task_ids.append(result["id"])
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies, task_ids, errors
+
+
+async def _read_back(url: str, task_ids: list[str]) -> int:
+    found = 0
+    for task_id in task_ids:
+        # A new connection each time, so the kernel may hand it to any worker
+        async with httpx.AsyncClient(timeout=30) as client:
+            reply = (await client.post(url, json=_rpc("tasks/get", {"id": task_id}))).json()
+        found += "result" in reply
+    return found
+
+
+@click.command()
+@click.option('--requests', 'requests', default=400)
+@click.option('--concurrency', 'concurrency', default=32)
+@click.option('--products', 'products', default=1, help='Products per batch request')
+@click.option('--latency', 'latency', default=0.05, help='Stub latency per Together / CDN call, seconds')
+@click.option('--workers', 'worker_counts', default='1,2,4,8')
+def main(requests, concurrency, products, latency, worker_counts):
+    """Benchmarks request throughput of the A2A server per worker count."""
+    os.chdir(Path(__file__).parent)
+    stub_port = _free_port()
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmark_workers:stub_app", "--factory",
+         "--port", str(stub_port), "--workers", "4", "--log-level", "warning"],
+        env=dict(os.environ, STUB_LATENCY=str(latency)),
+    )
+    print(f"{os.cpu_count()} CPUs, {requests} requests x {products} products, {concurrency} concurrent clients")
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for workers in [int(n) for n in worker_counts.split(",")]:
+                port = _free_port()
+                server, log = _start_server(workers, port, f"http://127.0.0.1:{stub_port}", Path(workdir))
+                try:
+                    _wait_ready(server, log, workers)
+                    url = f"http://127.0.0.1:{port}/"
+                    asyncio.run(_load(url, concurrency, concurrency, products))  # Warm up every worker
+                    elapsed, latencies, task_ids, errors = asyncio.run(_load(url, requests, concurrency, products))
+                    found = asyncio.run(_read_back(url, task_ids))
+                finally:
+                    server.terminate()
+                    server.wait(30)
+                latencies.sort()
+                print(
+                    f"{workers} workers: {len(task_ids) / elapsed:6.1f} req/s, "
+                    f"p50 {statistics.median(latencies) * 1000:.0f} ms, "
+                    f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms, "
+                    f"{errors} errors, tasks/get found {found}/{len(task_ids)}"
+                )
+    finally:
+        stub.terminate()
+        stub.wait(30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from a2a.types import DataPart, Message, TextPart
+
+from image_pipeline import GeneratedImage, ImagePipeline
+
+SPEC_FIELDS = ("product_name", "description", "brand_colors", "visual_style")
+
+
+@dataclass(frozen=True)
+class ProductSpec:
+    product_name: str
+    description: str
+    brand_colors: str
+    visual_style: str
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ProductSpec":
+        if not isinstance(data, dict):
+            raise ValueError(f"Product spec must be an object, got {type(data).__name__}")
+        missing = [f for f in SPEC_FIELDS if not str(data.get(f) or "").strip()]
+        if missing:
+            raise ValueError(f"Product spec {data.get('product_name')!r} is missing {', '.join(missing)}")
+        return cls(**{f: str(data[f]).strip() for f in SPEC_FIELDS})
+
+
+@dataclass
+class BatchResult:
+    index: int
+    spec: ProductSpec
+    prompt: str
+    image: Optional[GeneratedImage] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+def parse_batch_request(message: Message, max_products: int = 100) -> Optional[list[ProductSpec]]:
+    """Product specs of a batch request, or None for a regular chat message.
+
+    A batch is a DataPart `{"products": [...]}`, or the same JSON as the text
+    of the message. Raises ValueError for a batch that is empty, too large or
+    has an invalid spec.
+    """
+    payload = None
+    for part in message.parts:
+        root = part.root
+        if isinstance(root, DataPart) and "products" in root.data:
+            payload = root.data
+            break
+        if isinstance(root, TextPart) and root.text.lstrip().startswith("{"):
+            try:
+                data = json.loads(root.text)
+            except ValueError:
+                continue
+            if isinstance(data, dict) and "products" in data:
+                payload = data
+                break
+    if payload is None:
+        return None
+
+    products = payload["products"]
+    if not isinstance(products, list) or not products:
+        raise ValueError("'products' must be a non-empty list")
+    if len(products) > max_products:
+        raise ValueError(f"A batch holds at most {max_products} products, got {len(products)}")
+    return [ProductSpec.from_dict(p) for p in products]
+
+
+class RateLimiter:
+    """Spaces out starts to at most `rate` per second (0 disables it)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def generate_batch(
+    specs: list[ProductSpec],
+    pipeline: ImagePipeline,
+    build_prompt,
+    concurrency: int = 8,
+    rate: float = 0,
+) -> AsyncIterator[BatchResult]:
+    """Generates one image per spec and yields each result as soon as it completes.
+
+    Prompts come from `build_prompt(product_name, description, brand_colors,
+    visual_style)`, no LLM involved. At most `concurrency` generations are in
+    flight and at most `rate` start per second; a failed product is yielded
+    with its error instead of aborting the batch.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+
+    async def run(index: int, spec: ProductSpec) -> BatchResult:
+        prompt = build_prompt(spec.product_name, spec.description, spec.brand_colors, spec.visual_style)
+        result = BatchResult(index, spec, prompt)
+        async with slots:
+            await limiter.wait()
+            started = time.perf_counter()
+            try:
+                result.image = await pipeline.generate(prompt)
+            except Exception as e:
+                result.error = str(e)
+            result.seconds = time.perf_counter() - started
+        return result
+
+    tasks = [asyncio.create_task(run(i, spec)) for i, spec in enumerate(specs)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,166 @@
+import asyncio
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from a2a.types import FilePart, FileWithBytes, FileWithUri, Part
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from image_pipeline import GeneratedImage
+
+IMAGE_ROUTE = "/images/{image_id}"
+CHUNK_BYTES = 64 * 1024
+
+_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp"}
+_MIME_TYPES = {extension: mime_type for mime_type, extension in _EXTENSIONS.items()}
+
+
+class ImageStore:
+    """Downloaded image bytes kept for clients, keyed by content digest.
+
+    Bounded by total size; the least recently served image goes first. Images
+    are stored as-is, never re-encoded, so the route can stream the exact
+    bytes that were downloaded from Together.
+
+    With a `directory`, images are also written there, so any worker sharing
+    it can serve an image another worker stored. The directory is pruned to
+    `max_bytes` by file age.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._images: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+        self._size = 0
+        self._written = 0
+        self._lock = threading.Lock()
+
+    def put(self, content: bytes, mime_type: str) -> str:
+        image_id = f"{hashlib.sha256(content).hexdigest()}.{_EXTENSIONS.get(mime_type, 'bin')}"
+        with self._lock:
+            if image_id in self._images:
+                self._images.move_to_end(image_id)
+                return image_id
+            self._remember(image_id, content, mime_type)
+        if self.directory is not None:
+            self._write(image_id, content)
+        return image_id
+
+    def get(self, image_id: str) -> Optional[tuple[bytes, str]]:
+        with self._lock:
+            entry = self._images.get(image_id)
+            if entry is not None:
+                self._images.move_to_end(image_id)
+                return entry
+        if self.directory is None or Path(image_id).name != image_id:
+            return None
+        try:
+            content = (self.directory / image_id).read_bytes()
+        except OSError:
+            return None
+        mime_type = _MIME_TYPES.get(image_id.rsplit(".", 1)[-1], "application/octet-stream")
+        with self._lock:
+            self._remember(image_id, content, mime_type)
+        return content, mime_type
+
+    def _remember(self, image_id: str, content: bytes, mime_type: str) -> None:
+        self._images[image_id] = (content, mime_type)
+        self._size += len(content)
+        while self._size > self.max_bytes and len(self._images) > 1:
+            _, (dropped, _) = self._images.popitem(last=False)
+            self._size -= len(dropped)
+
+    def _write(self, image_id: str, content: bytes) -> None:
+        path = self.directory / image_id
+        if path.exists():
+            return
+        # Write-then-rename, so other workers never serve a partial file
+        tmp = path.with_name(f".{image_id}.{os.getpid()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        self._written += len(content)
+        if self._written > self.max_bytes // 8:
+            self._written = 0
+            self._prune()
+
+    def _prune(self) -> None:
+        files = []
+        for entry in os.scandir(self.directory):
+            try:
+                if not entry.name.startswith("."):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError:
+                continue  # Pruned by another worker meanwhile
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            Path(path).unlink(missing_ok=True)
+            total -= size
+
+
+def image_file_part(
+    image: GeneratedImage,
+    store: ImageStore,
+    base_url: str,
+    inline_max_bytes: int = 64 * 1024,
+) -> Part:
+    """FilePart for a generated image: inline bytes when small, a served URI otherwise.
+
+    Stores the image, which with a store directory writes its file, so async
+    callers run this in a worker thread.
+    """
+    image_id = store.put(image.content, image.mime_type)
+    metadata = {"width": image.width, "height": image.height, "size": len(image.content), "source_url": image.url}
+    if len(image.content) <= inline_max_bytes:
+        file = FileWithBytes(
+            bytes=base64.b64encode(image.content).decode("ascii"),
+            mimeType=image.mime_type,
+            name=image_id,
+        )
+    else:
+        file = FileWithUri(
+            uri=f"{base_url.rstrip('/')}{IMAGE_ROUTE.format(image_id=image_id)}",
+            mimeType=image.mime_type,
+            name=image_id,
+        )
+    return Part(root=FilePart(file=file, metadata=metadata))
+
+
+def image_route(store: ImageStore) -> Route:
+    """Starlette route serving stored images in chunks straight from memory."""
+
+    async def serve_image(request: Request) -> Response:
+        image_id = request.path_params["image_id"]
+        # A miss in memory reads the file another worker wrote
+        entry = await asyncio.to_thread(store.get, image_id)
+        if entry is None:
+            return Response(status_code=404)
+        content, mime_type = entry
+        # Content-addressed, so the id doubles as a strong, immutable ETag
+        headers = {
+            "ETag": f'"{image_id}"',
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "Content-Length": str(len(content)),
+        }
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "Content-Length"})
+
+        async def chunks() -> AsyncIterator[memoryview]:
+            view = memoryview(content)
+            for start in range(0, len(view), CHUNK_BYTES):
+                yield view[start:start + CHUNK_BYTES]
+
+        return StreamingResponse(chunks(), media_type=mime_type, headers=headers)
+
+    return Route(IMAGE_ROUTE, serve_image, methods=["GET"])
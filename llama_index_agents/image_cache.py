@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from image_pipeline import GeneratedImage
+
+INDEX_FILE = "index.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    key TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    prompt TEXT NOT NULL,
+    url TEXT NOT NULL,
+    mime_type TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_used ON images (used);
+"""
+
+
+def image_cache_key(prompt: str, model: str, steps: int) -> str:
+    """Stable key for a generation: whitespace/case-normalized prompt plus model and steps."""
+    normalized = " ".join(prompt.split()).casefold()
+    payload = json.dumps([normalized, model, steps], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ImageCache:
+    """Generated images on disk, keyed by `image_cache_key`, bounded to `max_bytes`.
+
+    Each entry is two files, the image bytes as downloaded and its PNG
+    thumbnail, named after the key. The entries and their metadata are rows
+    of a SQLite/WAL index in the same directory, so startup reads no images
+    and every worker sharing the directory sees the others' entries. An
+    insert evicts the least recently used entries of the whole directory in
+    one transaction, so `max_bytes` bounds all workers together. Recency from
+    hits is saved with the next insert or on `close`.
+
+    Files with no index row are removed on start once they are older than
+    `orphan_grace_seconds`, since a peer may be between writing an image and
+    indexing it. Methods block on disk I/O, so call them from a worker thread.
+    """
+
+    key = staticmethod(image_cache_key)
+
+    def __init__(
+        self,
+        cache_dir: str = "tmp/image_cache",
+        max_bytes: int = 512 * 1024 * 1024,
+        orphan_grace_seconds: float = 3600,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.orphan_grace_seconds = orphan_grace_seconds
+        self._conn = sqlite3.connect(
+            str(self.cache_dir / INDEX_FILE), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # Hits not yet written to the index, key -> time of use
+        self._touched: dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def get(self, key: str) -> Optional[GeneratedImage]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file, prompt, url, mime_type, width, height FROM images WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            file, prompt, url, mime_type, width, height = row
+            try:
+                content = (self.cache_dir / file).read_bytes()
+                thumbnail = (self.cache_dir / f"{key}.thumb.png").read_bytes()
+            except OSError:
+                # Evicted by a peer since the lookup, or removed behind our back
+                self._conn.execute("DELETE FROM images WHERE key = ? AND file = ?", (key, file))
+                self._touched.pop(key, None)
+                self.misses += 1
+                return None
+            self._touched[key] = time.time()
+            self.hits += 1
+        return GeneratedImage(
+            prompt=prompt,
+            url=url,
+            content=content,
+            mime_type=mime_type,
+            width=width,
+            height=height,
+            thumbnail=thumbnail,
+        )
+
+    def put(self, key: str, image: GeneratedImage) -> None:
+        size = len(image.content) + len(image.thumbnail)
+        if size > self.max_bytes:
+            return
+        file = f"{key}.{image.mime_type.rsplit('/', 1)[-1]}"
+        with self._lock:
+            self._write_file(self.cache_dir / file, image.content)
+            self._write_file(self.cache_dir / f"{key}.thumb.png", image.thumbnail)
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._save_touched()
+                previous = self._conn.execute("SELECT file FROM images WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, file, size, image.prompt, image.url, image.mime_type, image.width, image.height, now, now),
+                )
+                stale = [previous[0]] if previous and previous[0] != file else []
+                stale += self._evict()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._unlink(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        """Saves the recency of hits; the cache stays usable."""
+        with self._lock:
+            if self._touched:
+                self._save_touched()
+
+    def _load(self) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                stale = self._evict()
+                known = {
+                    name for key, file in self._conn.execute("SELECT key, file FROM images")
+                    for name in (file, f"{key}.thumb.png")
+                }
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._unlink(stale)
+        # Files without an index row are leftovers of an interrupted write, or a
+        # peer's image (or temporary file) that is about to be indexed
+        cutoff = time.time() - self.orphan_grace_seconds
+        for entry in os.scandir(self.cache_dir):
+            if entry.name in known or entry.name.startswith(INDEX_FILE):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                continue  # Removed by a peer meanwhile
+        stats = self.stats()
+        logger.info(f"Image cache: {stats['entries']} images, {stats['bytes']} bytes in {self.cache_dir}")
+
+    def _evict(self) -> list[str]:
+        """Drops the least recently used rows of the whole directory down to `max_bytes`; returns their files."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+        stale = []
+        if total <= self.max_bytes:
+            return stale
+        for key, file, size in self._conn.execute("SELECT key, file, size FROM images ORDER BY used").fetchall():
+            self._conn.execute("DELETE FROM images WHERE key = ?", (key,))
+            self._touched.pop(key, None)
+            stale += [file, f"{key}.thumb.png"]
+            total -= size
+            if total <= self.max_bytes:
+                break
+        return stale
+
+    def _save_touched(self) -> None:
+        self._conn.executemany(
+            "UPDATE images SET used = MAX(used, ?) WHERE key = ?", [(used, key) for key, used in self._touched.items()]
+        )
+        self._touched.clear()
+
+    def _unlink(self, names: list[str]) -> None:
+        for name in names:
+            (self.cache_dir / name).unlink(missing_ok=True)
+
+    @staticmethod
+    def _write_file(path: Path, data: bytes) -> None:
+        # Write-then-rename, so a crash never leaves a truncated file under the final name; the
+        # temporary name is per process and thread, as workers sharing the directory write at once
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
@@ -0,0 +1,202 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Optional
+from weakref import WeakKeyDictionary
+
+import httpx
+from loguru import logger
+from PIL import Image
+from together import AsyncTogether
+
+if TYPE_CHECKING:
+    from image_cache import ImageCache
+
+IMAGE_MODEL = "black-forest-labs/FLUX.1-schnell-Free"
+
+# Images generated during the current agent run, so the executor can return
+# the downloaded bytes instead of only the URL the tool reports to the model
+generated_images: ContextVar[Optional[list["GeneratedImage"]]] = ContextVar("generated_images", default=None)
+
+
+@dataclass
+class GeneratedImage:
+    prompt: str
+    url: str
+    content: bytes
+    mime_type: str
+    width: int
+    height: int
+    thumbnail: bytes
+
+
+@dataclass
+class _Generation:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+@dataclass
+class _LoopClients:
+    together: Any
+    http: httpx.AsyncClient
+    inflight: dict[str, _Generation] = field(default_factory=dict)
+
+
+def _decode(content: bytes, thumbnail_px: int) -> tuple[str, int, int, bytes]:
+    """Checks the downloaded bytes are an image and renders a PNG thumbnail."""
+    with Image.open(BytesIO(content)) as image:
+        image.load()
+        mime_type = Image.MIME.get(image.format or "", "application/octet-stream")
+        width, height = image.size
+        thumb = image.convert("RGB")
+        thumb.thumbnail((thumbnail_px, thumbnail_px))
+        out = BytesIO()
+        thumb.save(out, format="PNG", optimize=True)
+    return mime_type, width, height, out.getvalue()
+
+
+def _show(image: GeneratedImage) -> None:
+    # Only for local runs; imported lazily so servers never load a GUI backend
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(10, 8))
+    plt.imshow(Image.open(BytesIO(image.content)))
+    plt.axis('off')
+    plt.title("Generated Brand Image")
+    plt.show()
+    plt.close(fig)
+
+
+class ImagePipeline:
+    """Generates images with Together and downloads them without blocking the event loop.
+
+    Downloads share one pooled `httpx.AsyncClient`, PIL decoding and
+    thumbnailing run on a small thread pool, and matplotlib is only touched
+    when `display` is on (local runs), so concurrent requests overlap their
+    generation and download waits.
+
+    With a `cache`, an image already generated for the same normalized
+    prompt, model and steps is read from disk instead, and concurrent
+    requests for one prompt share a single generation. `backend` (anything
+    with an async `images.generate`) and `transport` replace Together and
+    the CDN, e.g. with stubs.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = IMAGE_MODEL,
+        steps: int = 1,
+        max_connections: int = 20,
+        download_timeout: float = 60,
+        workers: int = 4,
+        thumbnail_px: int = 256,
+        display: bool = False,
+        cache: Optional["ImageCache"] = None,
+        backend: Any = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.steps = steps
+        self.max_connections = max_connections
+        self.download_timeout = download_timeout
+        self.thumbnail_px = thumbnail_px
+        self.display = display
+        self.cache = cache
+        self.backend = backend
+        self.transport = transport
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="brand-image")
+        self._loops: WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients] = WeakKeyDictionary()
+
+    def _clients(self) -> _LoopClients:
+        # Pooled connections belong to the loop that opened them, so every
+        # event loop (the server's, the sync facade's background loop) keeps
+        # its own long-lived set
+        loop = asyncio.get_running_loop()
+        clients = self._loops.get(loop)
+        if clients is None:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            http = httpx.AsyncClient(
+                limits=limits, timeout=self.download_timeout, follow_redirects=True, transport=self.transport
+            )
+            clients = self._loops[loop] = _LoopClients(self.backend or AsyncTogether(api_key=self.api_key), http)
+        return clients
+
+    async def generate(self, prompt: str) -> GeneratedImage:
+        if self.cache is None:
+            image = await self._generate(prompt)
+        else:
+            image = await self._generate_cached(prompt)
+        if self.display:
+            _show(image)
+        collected = generated_images.get()
+        if collected is not None:
+            collected.append(image)
+        return image
+
+    async def _generate_cached(self, prompt: str) -> GeneratedImage:
+        inflight = self._clients().inflight
+        loop = asyncio.get_running_loop()
+        key = self.cache.key(prompt, self.model, self.steps)
+        image = await loop.run_in_executor(self.executor, self.cache.get, key)
+        if image is not None:
+            logger.debug(f"Image cache hit for {key[:12]}")
+            return replace(image, prompt=prompt)
+
+        # The generation is its own task, so a requester that goes away (a
+        # client disconnect) doesn't cancel it for the others sharing it;
+        # only the last one to leave does
+        generation = inflight.get(key)
+        if generation is None:
+            generation = inflight[key] = _Generation(asyncio.create_task(self._generate_and_store(key, prompt)))
+            generation.task.add_done_callback(
+                lambda _: inflight.pop(key) if inflight.get(key) is generation else None
+            )
+        generation.waiters += 1
+        try:
+            image = await asyncio.shield(generation.task)
+        finally:
+            generation.waiters -= 1
+            if not generation.waiters and not generation.task.done():
+                generation.task.cancel()
+        return replace(image, prompt=prompt)
+
+    async def _generate_and_store(self, key: str, prompt: str) -> GeneratedImage:
+        image = await self._generate(prompt)
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.cache.put, key, image)
+        except Exception as e:
+            logger.warning(f"Could not cache image {key[:12]}: {e}")
+        return image
+
+    async def _generate(self, prompt: str) -> GeneratedImage:
+        clients = self._clients()
+        response = await clients.together.images.generate(prompt=prompt, model=self.model, steps=self.steps, n=1)
+        url = response.data[0].url
+        logger.debug(f"Image generated: {url}")
+
+        download = await clients.http.get(url)
+        download.raise_for_status()
+        content = download.content
+
+        loop = asyncio.get_running_loop()
+        mime_type, width, height, thumbnail = await loop.run_in_executor(
+            self.executor, _decode, content, self.thumbnail_px
+        )
+        return GeneratedImage(prompt, url, content, mime_type, width, height, thumbnail)
+
+    async def aclose(self) -> None:
+        """Closes the clients of the running loop; the last loop to close also stops the workers."""
+        clients = self._loops.pop(asyncio.get_running_loop(), None)
+        if clients is not None:
+            await clients.http.aclose()
+            if self.backend is None:
+                await clients.together.close()
+        if all(loop.is_closed() for loop in list(self._loops)):
+            self.executor.shutdown(wait=False)
+            if self.cache is not None:
+                self.cache.close()
@@ -1,24 +1,41 @@
 import os
 from dotenv import load_dotenv
 import asyncio
+import contextvars
+import time
+from collections import deque
 from typing import AsyncIterable, Dict, Any
 from uuid import uuid4
 
-from llama_index.core.agent.workflow import FunctionAgent
+from llama_index.core.agent.workflow import AgentStream, FunctionAgent, ToolCall, ToolCallResult
 from llama_index.llms.openrouter import OpenRouter
 from llama_index.core.tools import FunctionTool
 
-from together import Together
-from PIL import Image
-from io import BytesIO
-import matplotlib.pyplot as plt
-import requests
 from loguru import logger
 
+from background_loop import BackgroundLoop
+from brand_batch import ProductSpec, generate_batch
+from image_cache import ImageCache
+from image_pipeline import GeneratedImage, ImagePipeline, generated_images
+
 load_dotenv()
 
 # Initialize clients
-client = Together(api_key=os.getenv("TOGETHER_API_KEY"))
+# Async Together client, pooled downloads and a decode thread pool; images are
+# only displayed with matplotlib when BRAND_IMAGE_DISPLAY is set (local runs)
+image_pipeline = ImagePipeline(
+    api_key=os.getenv("TOGETHER_API_KEY"),
+    max_connections=int(os.getenv("BRAND_IMAGE_HTTP_CONNECTIONS", "20")),
+    download_timeout=float(os.getenv("BRAND_IMAGE_DOWNLOAD_TIMEOUT_SECONDS", "60")),
+    workers=int(os.getenv("BRAND_IMAGE_WORKERS", "4")),
+    thumbnail_px=int(os.getenv("BRAND_IMAGE_THUMBNAIL_PX", "256")),
+    display=os.getenv("BRAND_IMAGE_DISPLAY", "false").lower() == "true",
+    # Repeat campaigns (same normalized prompt, model and steps) are served from disk
+    cache=ImageCache(
+        cache_dir=os.getenv("BRAND_IMAGE_CACHE_DIR", "tmp/image_cache"),
+        max_bytes=int(os.getenv("BRAND_IMAGE_CACHE_MB", "512")) * 1024 * 1024,
+    ) if os.getenv("BRAND_IMAGE_CACHE", "on") != "off" else None,
+)
 
 llm = OpenRouter(
     model="meta-llama/llama-3.3-8b-instruct:free",
@@ -28,9 +45,9 @@ llm = OpenRouter(
     is_function_calling_model=True
 )
 
-def generate_image(prompt: str) -> str:
+async def generate_image(prompt: str) -> str:
     """
-    Generates and displays an image based on the provided text prompt using Together AI.
+    Generates an image based on the provided text prompt using Together AI.
     
     Args:
         prompt (str): A descriptive text prompt for image generation
@@ -41,27 +58,13 @@ def generate_image(prompt: str) -> str:
     try:
         print(f"🖼️ Generating image with prompt: {prompt}")
         
-        response = client.images.generate(
-            prompt=prompt,
-            model="black-forest-labs/FLUX.1-schnell-Free",
-            steps=1,
-            n=1
-        )
-        
-        url = response.data[0].url
-        print(f"✅ Image generated successfully! URL: {url}")
+        image: GeneratedImage = await image_pipeline.generate(prompt)
+        print(f"✅ Image generated successfully! URL: {image.url}")
         
-        # Download and display the image
-        img_response = requests.get(url)
-        image = Image.open(BytesIO(img_response.content))
-        
-        plt.figure(figsize=(10, 8))
-        plt.imshow(image)
-        plt.axis('off')
-        plt.title("Generated Brand Image")
-        plt.show()
-        
-        return f"Image generated successfully and displayed. Direct URL: {url}"
+        return (
+            f"Image generated successfully ({image.width}x{image.height} {image.mime_type}, "
+            f"{len(image.content)} bytes). Direct URL: {image.url}"
+        )
         
     except Exception as e:
         error_msg = f"Error generating image: {str(e)}"
@@ -104,7 +107,7 @@ clean background, artistic product placement, luxury branding visual.
         # Return a fallback prompt
         return f"Professional {product_name} product photography with elegant lighting and premium styling"
 
-def generate_brand_image_complete(product_name: str, description: str, brand_colors: str, visual_style: str) -> str:
+async def generate_brand_image_complete(product_name: str, description: str, brand_colors: str, visual_style: str) -> str:
     """
     Complete brand image generation workflow: creates prompt and generates image.
     
@@ -124,7 +127,7 @@ def generate_brand_image_complete(product_name: str, description: str, brand_col
         prompt = create_marketing_prompt(product_name, description, brand_colors, visual_style)
         
         # Step 2: Generate image using the prompt
-        result = generate_image(prompt)
+        result = await generate_image(prompt)
         
         return f"Brand generation completed for {product_name}. {result}"
         
@@ -133,13 +136,17 @@ def generate_brand_image_complete(product_name: str, description: str, brand_col
         print(f"❌ {error_msg}")
         return error_msg
 
+# Owns the event loop of every synchronous `invoke`, so the OpenRouter and
+# Together clients keep their connections between calls
+background_loop = BackgroundLoop("brand-agent-loop")
+
 class BrandImageAgent:
     def __init__(self):
         self.agent = FunctionAgent(
             tools=[
-                FunctionTool.from_defaults(fn=generate_image),
+                FunctionTool.from_defaults(async_fn=generate_image),
                 FunctionTool.from_defaults(fn=create_marketing_prompt),
-                FunctionTool.from_defaults(fn=generate_brand_image_complete)
+                FunctionTool.from_defaults(async_fn=generate_brand_image_complete)
             ],
             llm=llm,
             system_prompt="""You are a professional brand and marketing image generation assistant. 
@@ -153,11 +160,30 @@ When a user provides product details, use generate_brand_image_complete to handl
 
 Always be helpful, professional, and focus on creating high-quality marketing visuals.""",
         )
+        # Seconds from the start of `stream` to its first real event, last 100 runs
+        self.first_event_seconds: deque[float] = deque(maxlen=100)
 
     def invoke(self, query: str, session_id: str = None) -> str:
         """
         Synchronous method to invoke the brand image agent.
         
+        Runs `ainvoke` on the shared background event loop and blocks until it
+        finishes; works from plain scripts as well as from code that already
+        runs an event loop.
+        
+        Args:
+            query (str): User query for brand image generation
+            session_id (str): Optional session identifier for conversation tracking
+            
+        Returns:
+            str: Agent response
+        """
+        return background_loop.run(self.ainvoke(query, session_id))
+
+    async def ainvoke(self, query: str, session_id: str = None) -> str:
+        """
+        Asynchronous method to invoke the brand image agent.
+        
         Args:
             query (str): User query for brand image generation
             session_id (str): Optional session identifier for conversation tracking
@@ -171,16 +197,12 @@ Always be helpful, professional, and focus on creating high-quality marketing vi
         logger.info(f"Invoking agent with query: {query}")
         
         try:
-            # Run the agent synchronously
-            response = asyncio.run(self.agent.run(query))
+            response = await self.agent.run(query)
             
             # Extract the content from the response
-            if hasattr(response, 'content'):
-                return response.content
-            elif hasattr(response, 'response'):
-                return response.response
-            else:
-                return str(response)
+            if hasattr(response, 'response'):
+                return response.response.content or ''
+            return str(response)
                 
         except Exception as e:
             logger.error(f"Error in invoke: {e}")
@@ -190,6 +212,10 @@ Always be helpful, professional, and focus on creating high-quality marketing vi
         """
         Asynchronous streaming method for the brand image agent.
         
+        Progress comes from the FunctionAgent's workflow events: LLM token
+        deltas, tool calls starting and finishing, and each generated image
+        as soon as its tool returns.
+        
         Args:
             query (str): User query for brand image generation
             session_id (str): Optional session identifier for conversation tracking
@@ -201,56 +227,65 @@ Always be helpful, professional, and focus on creating high-quality marketing vi
             session_id = str(uuid4())
             
         logger.info(f"Starting stream for query: {query}")
+        started = time.perf_counter()
+        first_event = True
+        images: list[GeneratedImage] = []
+        handler = self._start(query, images)
         
         try:
-            # Initial status
-            yield {
-                'is_task_complete': False,
-                'require_user_input': False,
-                'content': 'Starting brand image generation...',
-            }
-            
-            # Check if this is a complete workflow request
-            if any(keyword in query.lower() for keyword in ['product', 'brand', 'generate', 'image']):
-                yield {
-                    'is_task_complete': False,
-                    'require_user_input': False,
-                    'content': 'Analyzing product requirements...',
-                }
-                
-                # Simulate processing steps
-                await asyncio.sleep(0.5)
+            reported = 0
+            streamed = False
+            async for event in handler.stream_events():
+                if isinstance(event, AgentStream):
+                    if not event.delta:
+                        continue
+                    streamed = True
+                    item = {
+                        'is_task_complete': False,
+                        'require_user_input': False,
+                        'is_delta': True,
+                        'content': event.delta,
+                    }
+                elif isinstance(event, ToolCallResult):
+                    if len(images) > reported:
+                        # The tool produced images; hand them over before the LLM's closing turn
+                        new_images, reported = images[reported:], len(images)
+                        item = {
+                            'is_task_complete': False,
+                            'require_user_input': False,
+                            'content': ", ".join(
+                                f"Image ready ({image.width}x{image.height}): {image.url}" for image in new_images
+                            ),
+                            'images': new_images,
+                        }
+                    else:
+                        item = {
+                            'is_task_complete': False,
+                            'require_user_input': False,
+                            'content': f"{event.tool_name} finished",
+                        }
+                elif isinstance(event, ToolCall):
+                    item = {
+                        'is_task_complete': False,
+                        'require_user_input': False,
+                        'content': f"Calling {event.tool_name}...",
+                    }
+                else:
+                    continue
                 
-                yield {
-                    'is_task_complete': False,
-                    'require_user_input': False,
-                    'content': 'Creating marketing prompt...',
-                }
-                
-                await asyncio.sleep(0.5)
-                
-                yield {
-                    'is_task_complete': False,
-                    'require_user_input': False,
-                    'content': 'Generating brand image...',
-                }
+                if first_event:
+                    first_event = False
+                    self._record_first_event(time.perf_counter() - started)
+                yield item
             
-            # Run the agent
-            response = await self.agent.run(query)
+            response = await handler
+            content = response.response.content if hasattr(response, 'response') else str(response)
             
-            # Extract content
-            if hasattr(response, 'content'):
-                content = response.content
-            elif hasattr(response, 'response'):
-                content = response.response
-            else:
-                content = str(response)
-            
-            # Final response
+            # Final response; when the answer was streamed as deltas it is not repeated
             yield {
                 'is_task_complete': True,
                 'require_user_input': False,
-                'content': content,
+                'content': '' if streamed else content or '',
             }
             
         except Exception as e:
@@ -260,13 +295,90 @@ Always be helpful, professional, and focus on creating high-quality marketing vi
                 'require_user_input': False,
                 'content': f'An error occurred during brand image generation: {str(e)}',
             }
+        finally:
+            if not handler.done():
+                # The client went away; stop the workflow instead of generating for nobody
+                await handler.cancel_run()
+
+    async def stream_batch(
+        self,
+        specs: list[ProductSpec],
+        session_id: str = None,
+        concurrency: int = 8,
+        rate: float = 0,
+    ) -> AsyncIterable[Dict[str, Any]]:
+        """
+        Generates a brand image per product without the LLM, streaming each result as it completes.
+        
+        Prompts are built by `create_marketing_prompt`, so a catalog costs one
+        image round trip per product and runs `concurrency` products at a time,
+        starting at most `rate` per second.
+        
+        Args:
+            specs (list[ProductSpec]): Products of the catalog
+            session_id (str): Optional session identifier for conversation tracking
+            concurrency (int): Generations in flight at once
+            rate (float): Generations started per second, 0 for no limit
+            
+        Yields:
+            Dict[str, Any]: One chunk per product with its `batch_result`, then a summary
+        """
+        logger.info(f"Starting batch of {len(specs)} products for session {session_id}")
+        started = time.perf_counter()
+        done = failed = 0
+        async for result in generate_batch(specs, image_pipeline, create_marketing_prompt, concurrency, rate):
+            done += 1
+            if result.error:
+                failed += 1
+                content = f"[{done}/{len(specs)}] {result.spec.product_name} failed: {result.error}"
+            else:
+                content = f"[{done}/{len(specs)}] {result.spec.product_name} ready in {result.seconds:.1f}s"
+            yield {
+                'is_task_complete': False,
+                'require_user_input': False,
+                'content': content,
+                'batch_result': result,
+            }
+        
+        elapsed = time.perf_counter() - started
+        logger.info(f"Batch of {len(specs)} products finished in {elapsed:.1f}s, {failed} failed")
+        yield {
+            'is_task_complete': True,
+            'require_user_input': False,
+            'content': f"Generated {len(specs) - failed} of {len(specs)} brand images in {elapsed:.1f}s.",
+        }
+
+    def _start(self, query: str, images: list[GeneratedImage]):
+        # The workflow's tasks copy this context, so the image tools append to
+        # `images` without the variable leaking into the caller
+        context = contextvars.copy_context()
+        context.run(generated_images.set, images)
+        return context.run(self.agent.run, query)
+
+    def _record_first_event(self, seconds: float) -> None:
+        self.first_event_seconds.append(seconds)
+        logger.info(f"Time to first event: {seconds * 1000:.0f} ms")
+
+    async def aclose(self) -> None:
+        """Closes the pooled HTTP clients and the image worker pool."""
+        if background_loop.running:
+            await asyncio.wrap_future(background_loop.submit(image_pipeline.aclose()))
+            background_loop.stop()
+        await image_pipeline.aclose()
+
+    def close(self) -> None:
+        """Synchronous `aclose` for callers that only used `invoke`."""
+        if background_loop.running:
+            background_loop.run(image_pipeline.aclose())
+            background_loop.stop()
 
     SUPPORTED_CONTENT_TYPES = ['text', 'text/plain']
 
 # Example usage
 async def main():
     try:
-        # Initialize the agent
+        # Initialize the agent; show the images when running locally
+        image_pipeline.display = True
         brand_agent = BrandImageAgent()
         
         print("🎨 Brand Image Generation Assistant")
@@ -285,7 +397,7 @@ Visual Style: Modern minimalist
 Use your complete workflow to create and generate the image.
 """
         
-        result = brand_agent.invoke(query)
+        result = await brand_agent.ainvoke(query)
         print(f"Invoke Result: {result}")
         
         # Example with stream method
@@ -293,6 +405,8 @@ Use your complete workflow to create and generate the image.
         async for chunk in brand_agent.stream(query):
             print(f"Stream Chunk: {chunk}")
         
+        await brand_agent.aclose()
+        
     except Exception as e:
         print(f"❌ Main execution error: {e}")
         import traceback
@@ -1,12 +1,19 @@
+import asyncio
 import logging
+import os
+from typing import Optional
+from uuid import uuid4
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import Event, EventQueue
 from a2a.server.tasks import TaskUpdater
 from a2a.types import (
+    Artifact,
+    DataPart,
     InternalError,
     InvalidParamsError,
     Part,
     Task,
+    TaskArtifactUpdateEvent,
     TaskState,
     TextPart,
     UnsupportedOperationError,
@@ -16,6 +23,9 @@ from a2a.utils import (
     new_task,
 )
 from a2a.utils.errors import ServerError
+from brand_batch import BatchResult, parse_batch_request
+from image_artifacts import ImageStore, image_file_part
+from image_pipeline import GeneratedImage
 from llama_index_agent import BrandImageAgent
 
 logging.basicConfig(level=logging.INFO)
@@ -24,16 +34,36 @@ logger = logging.getLogger(__name__)
 class BrandGenAgentExecutor(AgentExecutor):
     """Addition Agent Executor with proper event queue handling."""
     
-    def __init__(self):
+    def __init__(
+        self,
+        image_store: Optional[ImageStore] = None,
+        public_url: str = 'http://localhost:10000',
+        inline_max_bytes: int = 64 * 1024,
+    ):
         self.agent = BrandImageAgent()
+        # Images above inline_max_bytes are served from image_store under public_url
+        self.image_store = image_store or ImageStore()
+        self.public_url = public_url
+        self.inline_max_bytes = inline_max_bytes
+        # Catalog requests: products per batch, generations in flight and started per second
+        self.batch_max_products = int(os.getenv('BRAND_BATCH_MAX_PRODUCTS', '100'))
+        self.batch_concurrency = int(os.getenv('BRAND_BATCH_CONCURRENCY', '8'))
+        self.batch_rate = float(os.getenv('BRAND_BATCH_RATE_PER_SECOND', '4'))
     
     async def execute(
         self,
         context: RequestContext,
         event_queue: EventQueue,
     ) -> None:
+        # A catalog of product specs skips the LLM and goes to the batch path
+        try:
+            specs = parse_batch_request(context.message, self.batch_max_products)
+        except ValueError as e:
+            logger.error(f"Invalid batch request: {e}")
+            raise ServerError(error=InvalidParamsError(message=str(e))) from e
+        
         # Validate request first
-        error = self._validate_request(context)
+        error = specs is None and self._validate_request(context)
         if error:
             raise ServerError(error=InvalidParamsError())
         
@@ -55,9 +85,19 @@ class BrandGenAgentExecutor(AgentExecutor):
                 raise ServerError(error=InternalError())
         
         updater = TaskUpdater(event_queue, task.id, task.contextId)
+        # The answer is streamed as appended chunks of this one artifact
+        artifact_id = str(uuid4())
+        artifact_started = False
+        artifact_name = 'brand_result' if specs is None else 'brand_catalog'
+        if specs is None:
+            response_items = self.agent.stream(query, task.contextId)
+        else:
+            response_items = self.agent.stream_batch(
+                specs, task.contextId, self.batch_concurrency, self.batch_rate
+            )
         
         try:
-            async for item in self.agent.stream(query, task.contextId):
+            async for item in response_items:
                 # Check if queue is still open before each update
                 if event_queue.is_closed():
                     logger.warning("Event queue closed during streaming - stopping execution")
@@ -66,9 +106,36 @@ class BrandGenAgentExecutor(AgentExecutor):
                 is_task_complete = item['is_task_complete']
                 require_user_input = item['require_user_input']
                 
-                if not is_task_complete and not require_user_input:
+                if item.get('is_delta'):
+                    self._add_artifact_chunk(
+                        updater,
+                        artifact_id,
+                        artifact_name,
+                        [Part(root=TextPart(text=item['content']))],
+                        append=artifact_started,
+                    )
+                    artifact_started = True
+                elif 'batch_result' in item:
+                    # One chunk per finished product, in completion order
+                    self._add_artifact_chunk(
+                        updater,
+                        artifact_id,
+                        artifact_name,
+                        await self._batch_parts(item['batch_result']),
+                        append=artifact_started,
+                    )
+                    artifact_started = True
+                elif not is_task_complete and not require_user_input:
                     # Add status message for tool execution
                     logger.info(f"Tool execution status: {item['content']}")
+                    # The bytes were already downloaded; hand them over instead of only the CDN URL.
+                    # Artifact ids are passed explicitly because add_artifact's default id is shared by every call
+                    for image in item.get('images', []):
+                        updater.add_artifact(
+                            [await self._image_part(image)],
+                            artifact_id=str(uuid4()),
+                            name='brand_image',
+                        )
                     updater.update_status(
                         TaskState.working,
                         new_agent_text_message(
@@ -89,10 +156,14 @@ class BrandGenAgentExecutor(AgentExecutor):
                     )
                     break
                 else:
-                    # Final result
-                    updater.add_artifact(
-                        [Part(root=TextPart(text=item['content']))],
-                        name='addition_result',  # Changed from 'conversion_result'
+                    # Close the streamed artifact; the final item only carries unstreamed text
+                    self._add_artifact_chunk(
+                        updater,
+                        artifact_id,
+                        artifact_name,
+                        [Part(root=TextPart(text=item['content']))] if item['content'] else [],
+                        append=artifact_started,
+                        last_chunk=True,
                     )
                     updater.complete()
                     break
@@ -115,6 +186,51 @@ class BrandGenAgentExecutor(AgentExecutor):
                     pass  # Queue might have closed during error handling
             raise ServerError(error=InternalError()) from e
     
+    def _add_artifact_chunk(
+        self,
+        updater: TaskUpdater,
+        artifact_id: str,
+        name: str,
+        parts: list[Part],
+        append: bool,
+        last_chunk: bool = False,
+    ) -> None:
+        # TaskUpdater.add_artifact cannot set append/lastChunk, so enqueue the event directly
+        updater.event_queue.enqueue_event(
+            TaskArtifactUpdateEvent(
+                taskId=updater.task_id,
+                contextId=updater.context_id,
+                append=append,
+                lastChunk=last_chunk,
+                artifact=Artifact(
+                    artifactId=artifact_id,
+                    name=name,
+                    parts=parts,
+                ),
+            )
+        )
+
+    async def _image_part(self, image: GeneratedImage) -> Part:
+        # Storing the image writes and prunes its file, so it runs off the event loop
+        return await asyncio.to_thread(
+            image_file_part, image, self.image_store, self.public_url, self.inline_max_bytes
+        )
+
+    async def _batch_parts(self, result: BatchResult) -> list[Part]:
+        # The product's index and status travel as data so clients can match results to their catalog
+        summary = {
+            'index': result.index,
+            'product_name': result.spec.product_name,
+            'status': 'failed' if result.error else 'completed',
+            'seconds': round(result.seconds, 3),
+        }
+        if result.error:
+            return [Part(root=DataPart(data={**summary, 'error': result.error}))]
+        return [
+            Part(root=DataPart(data={**summary, 'prompt': result.prompt})),
+            await self._image_part(result.image),
+        ]
+
     def _validate_request(self, context: RequestContext) -> bool:
         # Add actual validation logic if needed
         user_input = context.get_user_input()